@@ -1,14 +1,21 @@
 import datetime
-import json as js
+
+from artist_registry import ARTIST_FILE, ArtistRegistry
+
+PROMPT = "Choose an action - (a)dd artist, (d)isplay info, (n)ame search, (y)ear of birth range: (a/d/n/y)\n Or any other key to exit the program."
+EXIT_MESSAGE = "Exiting program."
 
 class Artist:
-    def __init__(self, first_name: str, family_name: str, artworks: list, birth_year: int, death_year = None):
+    def __init__(self, first_name: str, family_name: str, artworks: list, birth_year: int, death_year = None,
+                 age: int = 0):
         self.first_name: str = first_name
         self.family_name: str = family_name
         self.artworks: list = artworks
         self.birth_year: int = birth_year
         self.death_year = death_year
-def calculate_age(self) -> int:
+        self.age = self.calculate_age()
+
+    def calculate_age(self) -> int:
         if self.death_year is None:
             current_year: int = datetime.datetime.now().year
             return current_year - self.birth_year
@@ -17,7 +24,7 @@ def calculate_age(self) -> int:
         else:
             raise ValueError("Unable to calculate age.")
 
-def add_artist():
+def add_artist(registry):
     artist = Artist(first_name="", family_name="", artworks=[], birth_year=0, death_year=None)
     
     artist.first_name = input("First Name: ")
@@ -30,29 +37,16 @@ def add_artist():
         artist.death_year = None
     artworks_input = input("Artworks (comma separated): ")
     artist.artworks = [artwork.strip() for artwork in artworks_input.split(",")]
+    artist.age = artist.calculate_age()
     print(f"Artist {artist.first_name} {artist.family_name} added successfully.")
-    dump_info(artist)
+    dump_info(registry, artist)
 
-def dump_info(artist):
+def dump_info(registry, artist):
+    # Appends the artist to the file, the artists saved before are not read or written again
     try:
-        try:
-            with open("artist_info.json", "r") as f:
-                data = js.load(f)
-                if not isinstance(data, list):
-                    # Convert old format (single artist) to list format
-                    data = [data]
-        except FileNotFoundError:
-            data = []
-        
-        data.append(artist.__dict__)
-        
-        # Write updated list back to file
-        with open("artist_info.json", "w") as f:
-            js.dump(data, f, indent=4)
-        print(f"Artist information saved to artist_info.json")
-        print("\nReturning to main menu.\n")
-        return main()
-    except Exception as e:
+        registry.add(artist)
+        print(f"Artist information saved to {registry.path}")
+    except OSError as e:
         print(f"Error saving artist information: {e}")
         
 def display_info(artist):
@@ -65,31 +59,43 @@ def display_info(artist):
     )
     print(info)
 
+def display_list(artists):
+    if not artists:
+        print("No matching artists found.")
+    for i, artist in enumerate(artists, 1):
+        print(f"\n----| Artist {i} |----")
+        display_info(artist)
+
 def main():
-    artists = []
-    try:
-        with open("artist_info.json", "r") as f:
-            data = js.load(f)
-            if isinstance(data, list):
-                artists = [Artist(**artist_data) for artist_data in data]
+    registry = ArtistRegistry(ARTIST_FILE, Artist)
+    if registry.artists:
+        print(f"\nMain menu: \nLoaded information from file ({len(registry.artists)} artists).\n")
+    while True:
+        main_menu = input(PROMPT).strip().lower()
+        if main_menu == "a":
+            try:
+                add_artist(registry)
+            except ValueError as e:
+                print(f"Invalid input: {e}")
+        elif main_menu == "d":
+            if registry.artists:
+                display_list(registry.artists)
             else:
-                artists = [Artist(**data)]
-            print("\nMain menu: \nLoaded information from file.\n")
-    except FileNotFoundError:
-        artists = []
-    main_menu = input("Choose an action - (a)dd artist, (d)isplay info: (a/d)\n Or any other key to exit the program.").strip().lower()
-    if main_menu == "a":
-        artist = add_artist()
-    elif main_menu == "d":
-        if artists:
-            for i, artist in enumerate(artists, 1):
-                print(f"\n----| Artist {i} |----")
-                display_info(artist)
+                print("No artist information available. Please add an artist first.")
+        elif main_menu == "n":
+            display_list(registry.find_by_name(input("Name (full or family name): ")))
+        elif main_menu == "y":
+            try:
+                start = int(input("Born from year: "))
+                end = int(input("Born up to year: "))
+            except ValueError:
+                print("Please enter a year.")
+                continue
+            display_list(registry.born_between(start, end))
         else:
-            print("No artist information available. Please add an artist first.")
-        return main()
-    else:
-        print("Exiting program.")
+            print(EXIT_MESSAGE)
+            break
+        print("\nReturning to main menu.\n")
         
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,109 @@
+# Artist registry for 535-artist.py and 535-artist_logic.py: loaded once, indexed, appended in place
+
+import bisect
+import json as js
+import os
+
+ARTIST_FILE = "artist_info.json"
+# Enough of the file's end to find the closing bracket of the array
+TAIL_SIZE = 4096
+
+
+def name_key(name):
+    return " ".join(name.split()).casefold()
+
+
+class ArtistRegistry:
+    # artist_factory builds an artist from its saved dict, e.g. the Artist class of the script.
+    # Artists are saved as their __dict__, the file stays a plain JSON array.
+    def __init__(self, path=ARTIST_FILE, artist_factory=None):
+        self.path = path
+        self.artist_factory = artist_factory
+        self.artists = []
+        # Full name and family name -> artists, birth year -> artists plus the sorted years for ranges
+        self.by_name = {}
+        self.by_birth_year = {}
+        self.birth_years = []
+        # The old format (a single artist object) is converted on the first write
+        self.needs_rewrite = False
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                data = js.load(f)
+        except FileNotFoundError:
+            return
+        if not isinstance(data, list):
+            data = [data]
+            self.needs_rewrite = True
+        for artist_data in data:
+            self.register(self.artist_factory(**artist_data))
+
+    def register(self, artist):
+        self.artists.append(artist)
+        for key in {name_key(f"{artist.first_name} {artist.family_name}"), name_key(artist.family_name)}:
+            self.by_name.setdefault(key, []).append(artist)
+        year = artist.birth_year
+        if year not in self.by_birth_year:
+            self.by_birth_year[year] = []
+            bisect.insort(self.birth_years, year)
+        self.by_birth_year[year].append(artist)
+
+    def add(self, artist):
+        self.register(artist)
+        if self.needs_rewrite:
+            self.rewrite()
+        else:
+            self.append_record(artist.__dict__)
+
+    def find_by_name(self, name):
+        # Full name ("Albrecht Dürer") or family name only, case-insensitive
+        return list(self.by_name.get(name_key(name), ()))
+
+    def born_between(self, start, end):
+        lo = bisect.bisect_left(self.birth_years, start)
+        hi = bisect.bisect_right(self.birth_years, end)
+        return [artist for year in self.birth_years[lo:hi] for artist in self.by_birth_year[year]]
+
+    # --- Persistence ---
+    def encode(self, data):
+        # Same layout as js.dump(list, indent=4)
+        return ("    " + js.dumps(data, indent=4).replace("\n", "\n    ")).encode("utf-8")
+
+    def append_record(self, data):
+        # Replaces the closing bracket with ", <artist>\n]": the cost does not grow with the file
+        try:
+            f = open(self.path, "r+b")
+        except FileNotFoundError:
+            with open(self.path, "wb") as f:
+                f.write(b"[\n" + self.encode(data) + b"\n]\n")
+                f.flush()
+                os.fsync(f.fileno())
+            return
+        with f:
+            end = f.seek(0, os.SEEK_END)
+            start = max(0, end - TAIL_SIZE)
+            f.seek(start)
+            tail = f.read().rstrip()
+            if not tail.endswith(b"]"):
+                # Not the array format we write, e.g. emptied by hand
+                f.close()
+                self.rewrite()
+                return
+            before = tail[:-1].rstrip()
+            empty = before.endswith(b"[")
+            f.seek(start + len(before))
+            f.write((b"\n" if empty else b",\n") + self.encode(data) + b"\n]\n")
+            f.truncate()
+            f.flush()
+            os.fsync(f.fileno())
+
+    def rewrite(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            js.dump([artist.__dict__ for artist in self.artists], f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.needs_rewrite = False
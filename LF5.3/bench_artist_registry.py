@@ -0,0 +1,97 @@
+# Benchmark: adding artists with the ArtistRegistry vs. the old read-modify-write of artist_info.json
+
+import argparse
+import json as js
+import os
+import random as rd
+import tempfile
+import time
+from types import SimpleNamespace
+
+from artist_registry import ArtistRegistry
+
+FIRST_NAMES = ["Albrecht", "Paula", "Caspar", "Käthe", "Gabriele", "Franz", "Hannah", "Max", "Emil", "Sophie"]
+FAMILY_NAMES = ["Dürer", "Modersohn-Becker", "Friedrich", "Kollwitz", "Münter", "Marc", "Höch", "Ernst", "Nolde",
+                "Taeuber-Arp"]
+LOOKUPS = 1000
+
+
+def make_artists(count, seed=1):
+    rnd = rd.Random(seed)
+    for i in range(count):
+        birth_year = rnd.randint(1400, 2000)
+        yield {
+            "first_name": rnd.choice(FIRST_NAMES),
+            "family_name": f"{rnd.choice(FAMILY_NAMES)} {i}",
+            "artworks": [f"Werk {i}-{k}" for k in range(rnd.randint(0, 3))],
+            "birth_year": birth_year,
+            "death_year": birth_year + rnd.randint(20, 90),
+            "age": 0,
+        }
+
+
+def legacy_add(path, artist_data):
+    # What dump_info() and the recursive main() did per artist: read, append, rewrite, read again
+    try:
+        with open(path, "r") as f:
+            data = js.load(f)
+    except FileNotFoundError:
+        data = []
+    data.append(artist_data)
+    with open(path, "w") as f:
+        js.dump(data, f, indent=4)
+    with open(path, "r") as f:
+        js.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vergleicht das Hinzufügen von Künstlern.")
+    parser.add_argument("--count", type=int, default=10000)
+    parser.add_argument("--legacy-count", type=int, default=2000,
+                        help="Künstler für das alte Verfahren (wächst quadratisch)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        legacy_path = os.path.join(workdir, "legacy.json")
+        started = time.perf_counter()
+        for artist_data in make_artists(args.legacy_count):
+            legacy_add(legacy_path, artist_data)
+        legacy_s = time.perf_counter() - started
+
+        path = os.path.join(workdir, "artist_info.json")
+        registry = ArtistRegistry(path, SimpleNamespace)
+        started = time.perf_counter()
+        for artist_data in make_artists(args.count):
+            registry.add(SimpleNamespace(**artist_data))
+        registry_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        registry = ArtistRegistry(path, SimpleNamespace)
+        load_s = time.perf_counter() - started
+        with open(path, "r") as f:
+            assert len(js.load(f)) == args.count
+
+        names = [artist.family_name for artist in rd.sample(registry.artists, min(LOOKUPS, args.count))]
+        started = time.perf_counter()
+        for name in names:
+            registry.find_by_name(name)
+        indexed_s = time.perf_counter() - started
+        started = time.perf_counter()
+        for name in names:
+            [artist for artist in registry.artists if artist.family_name == name]
+        scan_s = time.perf_counter() - started
+        started = time.perf_counter()
+        born = registry.born_between(1600, 1750)
+        range_s = time.perf_counter() - started
+
+        print(f"Alt (lesen, anhängen, neu schreiben): {args.legacy_count} Künstler in {legacy_s:.2f} s "
+              f"({legacy_s / args.legacy_count * 1e3:.2f} ms je Künstler)")
+        print(f"ArtistRegistry (anhängen):           {args.count} Künstler in {registry_s:.2f} s "
+              f"({registry_s / args.count * 1e3:.3f} ms je Künstler)")
+        print(f"Registry laden:                      {load_s:.3f} s ({os.path.getsize(path) / 1e6:.1f} MB)")
+        print(f"{len(names)} Namenssuchen:                  Index {indexed_s * 1e3:.2f} ms   Scan {scan_s * 1e3:.1f} ms")
+        print(f"Geboren 1600-1750:                   {len(born)} Künstler in {range_s * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
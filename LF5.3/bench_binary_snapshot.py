@@ -0,0 +1,85 @@
+# Benchmark: JSON envelope vs. binary snapshot - file size, full load and random access
+
+import argparse
+import json as js
+import os
+import random as rd
+import tempfile
+import time
+
+from bench_inventory import generate_catalogue
+from museum_binary import BinarySnapshot, json_to_binary, lookup_exhibits
+from museum_model import Exhibit, Museum
+
+LOOKUPS = 1000
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def read_json(path):
+    with open(path, "r") as f:
+        return js.load(f)["exhibits"]
+
+
+def read_binary(path):
+    with BinarySnapshot(path) as snapshot:
+        return list(snapshot)
+
+
+def lookup_json(path, ids):
+    # Without an index every lookup has to parse the whole file first
+    with open(path, "r") as f:
+        data = js.load(f)
+    by_id = {d["_id"]: d for d in data["exhibits"]}
+    return [Exhibit.from_dict(by_id[i]) for i in ids]
+
+
+def lookup_museum(path, ids):
+    # What the app does for a few lookups: load the museum, then ask it
+    museum = Museum(path)
+    return [museum.get_exhibit_by_id(i) for i in ids]
+
+
+def lookup_binary(path, ids):
+    found = lookup_exhibits(path, ids)
+    return [found[i] for i in ids]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vergleicht JSON und Binär-Snapshot.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for count in args.sizes:
+            json_path = os.path.join(workdir, f"catalogue_{count}.json")
+            binary_path = os.path.join(workdir, f"catalogue_{count}.mbin")
+            generate_catalogue(json_path, count)
+            # Same encoding as Museum.save, the generator writes one compact line per exhibit
+            Museum(json_path).save()
+            _, convert_s = timed(lambda: json_to_binary(json_path, binary_path))
+            ids = [rd.randint(1, count) for _ in range(LOOKUPS)]
+
+            _, json_read = timed(lambda: read_json(json_path))
+            _, binary_read = timed(lambda: read_binary(binary_path))
+            _, json_load = timed(lambda: Museum(json_path))
+            _, binary_load = timed(lambda: Museum(binary_path))
+            _, json_lookup = timed(lambda: lookup_json(json_path, ids))
+            _, binary_lookup = timed(lambda: lookup_binary(binary_path, ids))
+            _, museum_lookup = timed(lambda: lookup_museum(binary_path, ids))
+
+            print(f"\n{count} Exponate (Umwandlung {convert_s:.2f} s):")
+            print(f"  Dateigröße           JSON {os.path.getsize(json_path) / 1e6:8.1f} MB   "
+                  f"binär {os.path.getsize(binary_path) / 1e6:8.1f} MB")
+            print(f"  Datensätze lesen     JSON {json_read:8.3f} s    binär {binary_read:8.3f} s")
+            print(f"  Museum laden         JSON {json_load:8.3f} s    binär {binary_load:8.3f} s")
+            print(f"  {LOOKUPS} Zugriffe per ID JSON {json_lookup:8.3f} s    binär {binary_lookup:8.3f} s   "
+                  f"über Museum {museum_lookup:8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# Benchmark: resident bytes per exhibit, dict-based vs. slotted Exhibit
+
+import argparse
+import gc
+import json as js
+import random as rd
+import tracemalloc
+
+from museum_model import Exhibit
+
+CREATORS = ["Unbekannt", "Stadt", "Frau Testi", "Albrecht Dürer", "Käthe Kollwitz", "Caspar David Friedrich"]
+
+
+class DictExhibit:
+    # Shape of Exhibit before __slots__: plain attributes, no interning
+    def __init__(self, title, creator, year, description, status, _uid=None, _id=None, kh_epoche=None, **kwargs):
+        self._uid = _uid
+        self._id = _id
+        self.title = title
+        self.creator = creator
+        self.year = year
+        self.description = description
+        self.status = status
+        self.kh_epoche = kh_epoche
+
+
+def make_catalogue_json(count, seed=42):
+    rnd = rd.Random(seed)
+    exhibits = []
+    for i in range(1, count + 1):
+        year = rnd.randint(-500, 2025)
+        exhibit = Exhibit(f"Objekt {i}", rnd.choice(CREATORS), year, f"Beschreibung zu Objekt {i}",
+                          rnd.choice(Exhibit.STATUS_OPTIONS), _id=i)
+        exhibits.append(exhibit.to_dict())
+    return js.dumps({"exhibits": exhibits})
+
+
+def measure(factory, text):
+    # Parse inside the measurement, so every string is a separate object as after
+    # loading museum_exhibits.json; the raw records are dropped before taking the size
+    gc.collect()
+    tracemalloc.start()
+    records = js.loads(text)["exhibits"]
+    objects = [factory(d) for d in records]
+    del records
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size / len(objects)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Speicherbedarf pro Exponat messen.")
+    parser.add_argument("-n", "--count", type=int, default=100000)
+    args = parser.parse_args()
+
+    text = make_catalogue_json(args.count)
+    before = measure(lambda d: DictExhibit(**d), text)
+    after = measure(Exhibit.from_dict, text)
+    print(f"{args.count} Exponate")
+    print(f"vorher  (__dict__):            {before:8.1f} Bytes/Exponat")
+    print(f"nachher (__slots__, intern):   {after:8.1f} Bytes/Exponat")
+    print(f"Ersparnis:                     {100 * (1 - after / before):8.1f} %")
+
+
+if __name__ == "__main__":
+    main()
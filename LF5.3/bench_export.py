@@ -0,0 +1,80 @@
+# Benchmark: streaming export (museum_export.py) vs. loading everything and dumping it in one call.
+# Every variant runs in a fresh process, so its peak memory can be compared.
+
+import argparse
+import json as js
+import multiprocessing as mp
+import os
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+from bench_inventory import generate_catalogue
+from museum_export import export
+
+
+def in_memory_yaml(source, target):
+    # What convert_jsondic_to_yaml.py did
+    with open(source, "r") as f:
+        data = js.load(f)
+    with open(target, "w") as f:
+        yaml.dump(data["exhibits"], f, Dumper=getattr(yaml, "CDumper", yaml.Dumper))
+
+
+def in_memory_jsonl(source, target):
+    with open(source, "r") as f:
+        data = js.load(f)
+    with open(target, "w") as f:
+        f.write("\n".join(js.dumps(d, ensure_ascii=False) for d in data["exhibits"]) + "\n")
+
+
+def run_variant(name, source, target, queue):
+    started = time.perf_counter()
+    if name == "alt: YAML im Speicher":
+        in_memory_yaml(source, target)
+    elif name == "alt: JSONL im Speicher":
+        in_memory_jsonl(source, target)
+    else:
+        export(source, target)
+    elapsed = time.perf_counter() - started
+    # ru_maxrss is in KiB on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 if resource else float("nan")
+    queue.put((elapsed, peak))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vergleicht Streaming-Export und Export im Speicher.")
+    parser.add_argument("--count", type=int, default=200000)
+    args = parser.parse_args()
+
+    ctx = mp.get_context("spawn")
+    with tempfile.TemporaryDirectory() as workdir:
+        source = os.path.join(workdir, "catalogue.json")
+        generate_catalogue(source, args.count)
+        variants = [("alt: JSONL im Speicher", "alt.jsonl")]
+        if yaml is not None:
+            variants.append(("alt: YAML im Speicher", "alt.yaml"))
+        variants += [("Streaming YAML", "export.yaml"), ("Streaming JSONL", "export.jsonl"),
+                     ("Streaming CSV", "export.csv"), ("Streaming JSONL + gzip", "export.jsonl.gz")]
+        print(f"{args.count} Exponate, Quelle {os.path.getsize(source) / 1e6:.1f} MB")
+        for name, filename in variants:
+            target = os.path.join(workdir, filename)
+            queue = ctx.Queue()
+            process = ctx.Process(target=run_variant, args=(name, source, target, queue))
+            process.start()
+            elapsed, peak = queue.get()
+            process.join()
+            print(f"  {name:<24} {elapsed:6.2f} s  {args.count / elapsed:9.0f} Datensätze/s  "
+                  f"Spitze {peak:7.1f} MB  Ziel {os.path.getsize(target) / 1e6:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# Benchmark suite for the inventory core: load, lookup, search, gallery display and save
+
+import argparse
+import contextlib
+import io
+import json as js
+import os
+import platform
+import random as rd
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from museum_main_inventory_app import display_gallery
+from museum_model import Exhibit, Museum
+from museum_service import MuseumService
+
+CREATORS = ["Unbekannt", "Stadt", "Albrecht Dürer", "Käthe Kollwitz", "Caspar David Friedrich", "Paula Modersohn-Becker"]
+WORDS = ["Münze", "Urkunde", "Gemälde", "Skulptur", "Spinnrad", "Vase", "Brief", "Karte", "Helm", "Krug"]
+QUERIES = ["münze", "dürer", "1888", "zustand", "im lager", "xyz"]
+LOOKUPS = 10000
+
+
+def generate_catalogue(path, count, gallery_count=100, gallery_size=50, seed=42):
+    # Writes the museum_exhibits.json envelope item by item, so 1M exhibits fit in memory
+    rnd = rd.Random(seed)
+    with open(path, "w") as f:
+        f.write('{"exhibits": [\n')
+        for i in range(1, count + 1):
+            exhibit = {
+                "_uid": f"00000000-0000-4000-8000-{i:012d}",
+                "_id": i,
+                "title": f"{rnd.choice(WORDS)} {i}",
+                "creator": rnd.choice(CREATORS),
+                "year": rnd.randint(-500, 2025) if rnd.random() < 0.9 else "Unbekannt",
+                "description": f"{rnd.choice(WORDS)} in gutem Zustand, Inventar {i}",
+                "status": rnd.choice(Exhibit.STATUS_OPTIONS),
+            }
+            f.write(("" if i == 1 else ",\n") + js.dumps(exhibit))
+        f.write('\n], "galleries": [\n')
+        for g in range(gallery_count):
+            gallery = {
+                "name": f"Galerie {g + 1}",
+                "start": "",
+                "end": "",
+                "location": f"Saal {g + 1}",
+                "exhibit_ids": rnd.sample(range(1, count + 1), min(gallery_size, count)),
+            }
+            f.write(("" if g == 0 else ",\n") + js.dumps(gallery))
+        f.write("\n]}\n")
+
+
+def peak_rss_kb():
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def measure(fn):
+    # One timed run, then one run under tracemalloc for the allocation figures
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        result = fn()
+        wall = time.perf_counter() - started
+        tracemalloc.start()
+        fn()
+        allocated, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, {
+        "wall_s": round(wall, 6),
+        "alloc_net_bytes": allocated,
+        "alloc_peak_bytes": peak,
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+
+def run_size(count, galleries, workdir):
+    path = os.path.join(workdir, f"catalogue_{count}.json")
+    generate_catalogue(path, count, galleries)
+    results = {"file_bytes": os.path.getsize(path)}
+
+    museum, results["load"] = measure(lambda: Museum(path))
+    _, results["load_streaming"] = measure(lambda: Museum(path, streaming=True))
+
+    ids = [rd.randint(1, count) for _ in range(LOOKUPS)]
+    _, results["get_exhibit_by_id"] = measure(lambda: [museum.get_exhibit_by_id(i) for i in ids])
+    results["get_exhibit_by_id"]["per_call_us"] = round(results["get_exhibit_by_id"]["wall_s"] / LOOKUPS * 1e6, 3)
+
+    hits, results["search"] = measure(lambda: [museum.search(q) for q in QUERIES])
+    results["search"]["per_query_ms"] = round(results["search"]["wall_s"] / len(QUERIES) * 1e3, 3)
+    results["search"]["hits"] = sum(len(h) for h in hits)
+
+    service = MuseumService(museum)
+    _, results["display_gallery"] = measure(lambda: [display_gallery(service, gal) for gal in museum.galleries])
+    _, results["save"] = measure(museum.save)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline_path):
+    with open(baseline_path, "r") as f:
+        baseline = js.load(f)
+    print(f"\nVergleich mit {baseline_path} (Commit {baseline.get('commit')}):")
+    for size, stages in current["sizes"].items():
+        old_stages = baseline.get("sizes", {}).get(size, {})
+        for stage, values in stages.items():
+            if not isinstance(values, dict) or stage not in old_stages:
+                continue
+            old, new = old_stages[stage]["wall_s"], values["wall_s"]
+            change = f"{100 * (new - old) / old:+.1f} %" if old else "n/a"
+            print(f"  {size:>8} {stage:<20} {old:10.4f} s -> {new:10.4f} s  {change}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark für die Museum Inventory App.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000])
+    parser.add_argument("--galleries", type=int, default=100)
+    parser.add_argument("--output", help="Ergebnisse als JSON speichern")
+    parser.add_argument("--compare", help="JSON-Ergebnis eines früheren Laufs zum Vergleich")
+    args = parser.parse_args()
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sizes": {},
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for count in args.sizes:
+            results = run_size(count, args.galleries, workdir)
+            report["sizes"][str(count)] = results
+            print(f"\n{count} Exponate ({results['file_bytes'] / 1e6:.1f} MB):")
+            for stage, values in results.items():
+                if isinstance(values, dict):
+                    print(f"  {stage:<20} {values['wall_s']:10.4f} s  "
+                          f"Allokationen (Spitze) {values['alloc_peak_bytes'] / 1e6:8.1f} MB  "
+                          f"RSS {values['peak_rss_kb']} KB")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            js.dump(report, f, indent=4)
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# Benchmark: descriptions in memory vs. lazy descriptions in the side store (museum_texts.py).
+# Every mode loads the catalogue in a fresh process; then detail views hit a few popular exhibits
+# most of the time, as visitors do, and two searches run over the descriptions.
+
+import argparse
+import gc
+import json as js
+import multiprocessing as mp
+import os
+import random as rd
+import tempfile
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from bench_inventory import CREATORS, WORDS
+from museum_model import Exhibit, Museum
+
+VIEWS = 100000
+# Share of the detail views going to the popular exhibits, and how many of them there are
+HOT_SHARE = 0.9
+HOT_EXHIBITS = 1000
+# A rare query and one found in almost every description
+QUERIES = ["inventar 4711:", "spinnrad"]
+
+
+def generate_catalogue(path, count, description_length, seed=42):
+    rnd = rd.Random(seed)
+    with open(path, "w") as f:
+        f.write('{"exhibits": [\n')
+        for i in range(1, count + 1):
+            words = []
+            while sum(len(word) + 1 for word in words) < description_length:
+                words.append(rnd.choice(WORDS))
+            exhibit = {
+                "_id": i,
+                "title": f"{rnd.choice(WORDS)} {i}",
+                "creator": rnd.choice(CREATORS),
+                "year": rnd.randint(-500, 2025),
+                "description": f"Inventar {i}: " + " ".join(words),
+                "status": rnd.choice(Exhibit.STATUS_OPTIONS),
+            }
+            f.write(("" if i == 1 else ",\n") + js.dumps(exhibit))
+        f.write('\n], "galleries": []}\n')
+
+
+def run_mode(path, lazy_texts, queue):
+    gc.collect()
+    tracemalloc.start()
+    museum = Museum(path, streaming=True, lazy_texts=lazy_texts)
+    gc.collect()
+    resident, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    rnd = rd.Random(7)
+    count = len(museum.exhibits)
+    hot = rnd.sample(range(1, count + 1), min(HOT_EXHIBITS, count))
+    ids = [rnd.choice(hot) if rnd.random() < HOT_SHARE else rnd.randint(1, count) for _ in range(VIEWS)]
+    started = time.perf_counter()
+    for exhibit_id in ids:
+        museum.get_exhibit_by_id(exhibit_id).display_info()
+    views = time.perf_counter() - started
+
+    searches = []
+    for query in QUERIES:
+        started = time.perf_counter()
+        found = len(museum.search(query))
+        searches.append((time.perf_counter() - started, found))
+    texts = museum.texts.statistics() if museum.texts is not None else None
+    # ru_maxrss is in KiB on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 if resource else float("nan")
+    queue.put((resident, peak, views, searches, texts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vergleicht Beschreibungen im Speicher und im Textspeicher.")
+    parser.add_argument("-n", "--count", type=int, default=20000)
+    parser.add_argument("--description-length", type=int, default=500)
+    args = parser.parse_args()
+
+    ctx = mp.get_context("spawn")
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "catalogue.json")
+        generate_catalogue(path, args.count, args.description_length)
+        print(f"{args.count} Exponate, Beschreibungen ~{args.description_length} Zeichen, "
+              f"{VIEWS} Detailansichten ({HOT_SHARE:.0%} auf {HOT_EXHIBITS} beliebte Exponate)")
+        for name, lazy_texts in (("im Speicher", False), ("Textspeicher", True)):
+            queue = ctx.Queue()
+            process = ctx.Process(target=run_mode, args=(path, lazy_texts, queue))
+            process.start()
+            resident, peak, views, searches, texts = queue.get()
+            process.join()
+            print(f"  {name:<12} belegt {resident / 1e6:7.1f} MB  Spitze {peak:7.1f} MB  "
+                  f"Ansicht {views / VIEWS * 1e6:6.2f} µs")
+            for query, (elapsed, found) in zip(QUERIES, searches):
+                print(f"  {'':<12} Suche {query!r:<18} {elapsed * 1e3:7.1f} ms ({found} Treffer)")
+            if texts:
+                print(f"  {'':<12} Cache {texts['hits']} Treffer, {texts['misses']} Fehlgriffe "
+                      f"({100 * texts['hit_rate']:.1f} %)")
+
+
+if __name__ == "__main__":
+    main()
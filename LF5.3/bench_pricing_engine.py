@@ -0,0 +1,76 @@
+# Benchmark: pricing one million visitors - old per-visitor logic, the engine per visitor and as batch
+
+import argparse
+import random as rd
+import time
+
+import pricing_engine
+from pricing_engine import PricingEngine, total
+
+
+def make_visitors(count, seed=1):
+    rnd = rd.Random(seed)
+    ages = [rnd.randint(0, 95) for _ in range(count)]
+    members = [rnd.random() < 0.15 for _ in range(count)]
+    students = [rnd.random() < 0.2 for _ in range(count)]
+    group_sizes = [rnd.choice((1, 1, 1, 2, 4, 12, 30)) for _ in range(count)]
+    return ages, members, students, group_sizes
+
+
+def legacy_price(age, is_member, is_student, base_price=15.00):
+    # The rules as price_logic.py computed them before the engine (no group discount)
+    if age >= 65:
+        c_price = base_price * 0.75
+    elif age <= 16:
+        c_price = base_price * 0.5
+    else:
+        c_price = base_price
+    if is_member:
+        c_price *= 0.9
+    elif is_student:
+        c_price *= 0.9
+    return c_price
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Misst die Preisberechnung für viele Besucher.")
+    parser.add_argument("--count", type=int, default=1000000)
+    args = parser.parse_args()
+
+    ages, members, students, group_sizes = make_visitors(args.count)
+    engine = PricingEngine()
+    legacy, legacy_s = timed(lambda: list(map(legacy_price, ages, members, students)))
+    single, single_s = timed(lambda: [engine.price(a, is_member=m, is_student=s)
+                                      for a, m, s in zip(ages, members, students)])
+    numpy_min_batch = pricing_engine.NUMPY_MIN_BATCH
+    pricing_engine.NUMPY_MIN_BATCH = float("inf")
+    python, python_s = timed(lambda: engine.price_batch(ages, is_member=members, is_student=students))
+    pricing_engine.NUMPY_MIN_BATCH = numpy_min_batch
+    assert legacy == single == python
+    print(f"{args.count} Besucher:")
+    print(f"  alte Logik je Besucher        {legacy_s:6.3f} s")
+    print(f"  PricingEngine.price           {single_s:6.3f} s")
+    print(f"  price_batch ohne NumPy        {python_s:6.3f} s")
+    if pricing_engine.np is not None:
+        vectorised, numpy_s = timed(lambda: engine.price_batch(ages, is_member=members, is_student=students))
+        assert vectorised == legacy
+        grouped, grouped_s = timed(lambda: engine.price_batch(ages, group_sizes, is_member=members,
+                                                              is_student=students))
+        arrays = [pricing_engine.np.asarray(column) for column in (ages, members, students)]
+        _, array_s = timed(lambda: engine.price_batch(arrays[0], is_member=arrays[1], is_student=arrays[2]))
+        print(f"  price_batch mit NumPy         {numpy_s:6.3f} s   (Spalten als Arrays {array_s:.3f} s)")
+        print(f"  ... mit Gruppenrabatt         {grouped_s:6.3f} s")
+    else:
+        print("  NumPy nicht installiert, vektorisierter Pfad übersprungen.")
+    (day_total, total_s) = timed(lambda: total(python))
+    print(f"  Tagessumme {day_total:,.2f} € in {total_s:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
-import json as js
-import yaml
+from museum_export import write_yaml
+from museum_storage import iter_inventory
 
-with open("museum/sample_entry.json", "r") as json_file:
-    data = js.load(json_file)
+# Streams the "database" array item by item instead of loading the whole file
 with open("museum/converted_from_json.yaml", "w") as yaml_file:
-    yaml.dump(data, yaml_file)
\ No newline at end of file
+    records = (item for section, item in iter_inventory("museum/sample_entry.json") if section == "database")
+    write_yaml(yaml_file, records, None, key="database")
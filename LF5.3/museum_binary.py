@@ -0,0 +1,317 @@
+# Binary snapshot format for the Museum Inventory App
+#
+# Layout (little endian):
+#   header        magic, format version, counts and section offsets
+#   records       one fixed-width row per exhibit, in inventory order
+#   index         exhibit ids sorted ascending (int64), then the matching row numbers (uint32)
+#   string heap   UTF-8 strings the rows point to; repeated values are stored once
+#   galleries     the gallery list as JSON, it is small and read as a whole
+# Readers map the file and decode a row only when it is asked for.
+
+import argparse
+import array
+import bisect
+import json as js
+import mmap
+import os
+import struct
+import time
+
+from museum_storage import JsonStorage, iter_inventory
+
+BINARY_SUFFIX = ".mbin"
+MAGIC = b"MUSEUMB1"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sHHIQQQQQQ")
+STRING_FIELDS = ("_uid", "title", "creator", "year", "description", "status", "kh_epoche")
+# Values that repeat across many exhibits; only these are de-duplicated in the heap
+SHARED_FIELDS = ("creator", "year", "status", "kh_epoche")
+# _id, _version, year kind, bit mask of None strings, integer year, then (heap offset, length) per string field
+RECORD = struct.Struct("<qIBBq" + "II" * len(STRING_FIELDS))
+YEAR_INT, YEAR_STRING = 0, 1
+ALIGN = 8
+WRITE_CHUNK = 10000
+
+
+class BinarySnapshot:
+    # Read-only view of a binary snapshot; rows are decoded on demand
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise ValueError(f"{path} ist keine Museum-Binärdatei.")
+        try:
+            (magic, version, _, self.count, self.records_offset, index_offset, self.heap_offset, _,
+             self.galleries_offset, self.galleries_size) = HEADER.unpack_from(self.map, 0)
+        except struct.error:
+            magic, version = None, None
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"{path} ist keine Museum-Binärdatei.")
+        view = memoryview(self.map)
+        self.ids = view[index_offset:index_offset + 8 * self.count].cast("q")
+        rows_offset = index_offset + 8 * self.count
+        self.rows = view[rows_offset:rows_offset + 4 * self.count].cast("I")
+        # Decoded shared strings by heap offset, so equal values are one object
+        self.shared = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        if getattr(self, "ids", None) is not None:
+            self.ids.release()
+            self.rows.release()
+            self.ids = self.rows = None
+        if getattr(self, "map", None) is not None:
+            self.map.close()
+            self.map = None
+        self.file.close()
+
+    def decode(self, values, heap, base):
+        # Exhibit record as stored in the JSON envelope; heap[base:] is the string heap
+        (target_id, version, kind, nulls, year,
+         uid_at, uid_len, title_at, title_len, creator_at, creator_len, year_at, year_len,
+         description_at, description_len, status_at, status_len, epoch_at, epoch_len) = values
+        shared = self.shared
+        creator = shared.get(creator_at)
+        if creator is None:
+            creator = shared[creator_at] = heap[base + creator_at:base + creator_at + creator_len].decode("utf-8")
+        status = shared.get(status_at)
+        if status is None:
+            status = shared[status_at] = heap[base + status_at:base + status_at + status_len].decode("utf-8")
+        kh_epoche = shared.get(epoch_at)
+        if kh_epoche is None:
+            kh_epoche = shared[epoch_at] = heap[base + epoch_at:base + epoch_at + epoch_len].decode("utf-8")
+        if kind == YEAR_STRING:
+            year = shared.get(year_at)
+            if year is None:
+                year = shared[year_at] = heap[base + year_at:base + year_at + year_len].decode("utf-8")
+        d = {
+            "_uid": heap[base + uid_at:base + uid_at + uid_len].decode("utf-8"),
+            "_id": target_id,
+            "title": heap[base + title_at:base + title_at + title_len].decode("utf-8"),
+            "creator": creator,
+            "year": year,
+            "description": heap[base + description_at:base + description_at + description_len].decode("utf-8"),
+            "status": status,
+            "kh_epoche": kh_epoche,
+            "_version": version,
+        }
+        if nulls:
+            for i, field in enumerate(STRING_FIELDS):
+                if nulls >> i & 1:
+                    d[field] = None
+        return d
+
+    def row(self, row):
+        values = RECORD.unpack_from(self.map, self.records_offset + row * RECORD.size)
+        return self.decode(values, self.map, self.heap_offset)
+
+    def find(self, target_id):
+        # Row number of an _id via binary search over the sorted index
+        i = bisect.bisect_left(self.ids, target_id)
+        if i < self.count and self.ids[i] == target_id:
+            return self.rows[i]
+        return None
+
+    def get(self, target_id):
+        row = self.find(target_id)
+        return None if row is None else self.row(row)
+
+    def __iter__(self):
+        # Sequential scan: one unpack over the record table and a private copy of the heap
+        heap = self.map[self.heap_offset:self.galleries_offset]
+        records = memoryview(self.map)[self.records_offset:self.records_offset + self.count * RECORD.size]
+        try:
+            for values in RECORD.iter_unpack(records):
+                yield self.decode(values, heap, 0)
+        finally:
+            records.release()
+
+    def galleries(self):
+        if not self.galleries_size:
+            return []
+        return js.loads(self.map[self.galleries_offset:self.galleries_offset + self.galleries_size])
+
+
+def pad(f):
+    f.write(b"\0" * (-f.tell() % ALIGN))
+
+
+def write_binary(path, exhibits, galleries):
+    # exhibits is an iterable of exhibit dicts and is consumed once; galleries is read
+    # only after it, so a converter may fill it while the exhibits stream by
+    # Readers cache shared strings by offset: offset 0 is reserved for None/integer years,
+    # and every shared string ends in a NUL byte, so even "" gets an offset of its own
+    heap = bytearray(b"\0")
+    shared = {}
+    index = []
+
+    def ref(value, field):
+        value = str(value)
+        if field in SHARED_FIELDS:
+            known = shared.get(value)
+            if known is not None:
+                return known
+        data = value.encode("utf-8")
+        result = len(heap), len(data)
+        heap.extend(data)
+        if field in SHARED_FIELDS:
+            heap.append(0)
+            shared[value] = result
+        return result
+
+    with open(path, "wb") as f:
+        f.write(b"\0" * HEADER.size)
+        pad(f)
+        records_offset = f.tell()
+        rows = []
+        for d in exhibits:
+            year = d.get("year")
+            kind, year_int = (YEAR_INT, year) if type(year) is int else (YEAR_STRING, 0)
+            refs = []
+            nulls = 0
+            for i, field in enumerate(STRING_FIELDS):
+                value = d.get(field)
+                if value is None or field == "year" and kind == YEAR_INT:
+                    nulls |= (value is None) << i
+                    refs.extend((0, 0))
+                else:
+                    refs.extend(ref(value, field))
+            rows.append(RECORD.pack(d["_id"], d.get("_version", 1), kind, nulls, year_int, *refs))
+            index.append((d["_id"], len(index)))
+            if len(rows) >= WRITE_CHUNK:
+                f.write(b"".join(rows))
+                rows = []
+        f.write(b"".join(rows))
+        pad(f)
+        index_offset = f.tell()
+        index.sort()
+        f.write(array.array("q", [target_id for target_id, _ in index]).tobytes())
+        f.write(array.array("I", [row for _, row in index]).tobytes())
+        pad(f)
+        heap_offset = f.tell()
+        f.write(heap)
+        galleries_offset = f.tell()
+        gallery_data = js.dumps(list(galleries), separators=(",", ":")).encode("utf-8")
+        f.write(gallery_data)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(index), records_offset, index_offset, heap_offset,
+                            len(heap), galleries_offset, len(gallery_data)))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+class BinaryStorage(JsonStorage):
+    # Binary snapshot with the same journal, locking and compaction as the JSON storage
+    def load(self, streaming=False):
+        # The mapped file is decoded row by row, so this always streams
+        try:
+            snapshot = BinarySnapshot(self.path)
+        except FileNotFoundError:
+            return
+        with snapshot:
+            for d in snapshot:
+                yield "exhibits", d
+            for g_data in snapshot.galleries():
+                yield "galleries", g_data
+
+    def write_snapshot(self, museum, path):
+        write_binary(path, (ex.to_dict() for ex in museum.exhibits), [gal.to_dict() for gal in museum.galleries])
+
+
+def lookup_exhibits(path, target_ids):
+    # Exhibits by _id without loading the museum: the rows come from the mapped index and
+    # only the journal records naming one of the ids are applied on top, as Museum.apply does.
+    # Returns {_id: Exhibit} for the ids that exist.
+    from museum_model import Exhibit  # museum_model imports this module for open_storage
+    storage = BinaryStorage(path)
+    found = {}
+    with storage.lock:
+        with BinarySnapshot(path) as snapshot:
+            for target_id in target_ids:
+                d = snapshot.get(target_id)
+                if d is not None:
+                    found[target_id] = Exhibit.from_dict(d)
+        wanted = set(target_ids)
+        for change in storage.read_journal():
+            op = change["op"]
+            if op == "add" and change["exhibit"]["_id"] in wanted:
+                d = change["exhibit"]
+                local = found.get(d["_id"])
+                if local is None or local._uid != d["_uid"]:
+                    found[d["_id"]] = Exhibit.from_dict(d)
+            elif op == "update" and change["id"] in found:
+                exhibit = found[change["id"]]
+                if change.get("version", exhibit._version + 1) > exhibit._version:
+                    fields = {field: getattr(exhibit, field) for field in Exhibit.EDIT_FIELDS}
+                    fields.update(change["fields"])
+                    exhibit.update(**fields)
+                    exhibit._version = change.get("version", exhibit._version)
+            elif op == "remove":
+                found.pop(change["id"], None)
+    return found
+
+
+# --- Converters ---
+def json_to_binary(json_path, binary_path):
+    galleries = []
+
+    def exhibits():
+        for section, item in iter_inventory(json_path):
+            if section == "exhibits":
+                yield item
+            elif section == "galleries":
+                galleries.append(item)
+    write_binary(binary_path, exhibits(), galleries)
+
+
+def binary_to_json(binary_path, json_path):
+    # Streams the envelope item by item, the snapshot is never decoded as a whole
+    with BinarySnapshot(binary_path) as snapshot, open(json_path, "w") as f:
+        f.write('{"exhibits": [\n')
+        for i, d in enumerate(snapshot):
+            f.write(("" if i == 0 else ",\n") + js.dumps(d))
+        f.write('\n], "galleries": [\n')
+        for i, g_data in enumerate(snapshot.galleries()):
+            f.write(("" if i == 0 else ",\n") + js.dumps(g_data))
+        f.write("\n]}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=f"Wandelt zwischen JSON und Binär-Snapshot ({BINARY_SUFFIX}) um.")
+    parser.add_argument("source")
+    parser.add_argument("target", nargs="?")
+    parser.add_argument("--show", type=int, nargs="+", metavar="ID",
+                        help="Zeigt Exponate eines Binär-Snapshots an, ohne das Inventar zu laden")
+    args = parser.parse_args()
+    started = time.perf_counter()
+    if args.show:
+        if not args.source.endswith(BINARY_SUFFIX):
+            parser.error(f"--show braucht einen Binär-Snapshot ({BINARY_SUFFIX}).")
+        found = lookup_exhibits(args.source, args.show)
+        for target_id in args.show:
+            print(found[target_id].display_info() if target_id in found else f"Kein Exponat mit ID {target_id}.\n")
+        return
+    if args.target is None:
+        parser.error("Ziel fehlt.")
+    if args.source.endswith(BINARY_SUFFIX):
+        binary_to_json(args.source, args.target)
+    else:
+        json_to_binary(args.source, args.target)
+    print(f"{args.source} -> {args.target} ({os.path.getsize(args.target) / 1e6:.1f} MB, "
+          f"{time.perf_counter() - started:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
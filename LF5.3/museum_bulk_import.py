@@ -0,0 +1,137 @@
+# Non-interactive bulk import of exhibits from CSV or JSON Lines
+
+import argparse
+import csv
+import json as js
+import time
+
+from museum_model import INVENTORY_FILE, Exhibit, Museum
+
+IMPORT_CHUNK_SIZE = 5000
+DEFAULT_STATUS = "Ungewiss"
+
+
+def iter_records(path, fmt=None):
+    fmt = fmt or ("csv" if path.lower().endswith(".csv") else "jsonl")
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    try:
+                        yield js.loads(line)
+                    except js.JSONDecodeError:
+                        # Counted as invalid by the importer, the other lines are still imported
+                        yield None
+
+
+def text_field(row, field):
+    # A missing field is empty, anything but a string rejects the row
+    value = row.get(field)
+    if value is None:
+        return ""
+    if not isinstance(value, str):
+        raise ValueError(f"{field} ist kein Text: {value!r}")
+    return value
+
+
+def id_field(value):
+    # Whole numbers only: int() would cut 2.7 down to 2 and take True for 1
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError(f"_id ist keine ganze Zahl: {value!r}")
+    return int(value)
+
+
+class BulkImporter:
+    def __init__(self, museum, chunk_size=IMPORT_CHUNK_SIZE):
+        self.museum = museum
+        self.chunk_size = chunk_size
+        self.seen_ids = set()
+        self.seen_uids = set()
+        self.imported = 0
+        self.duplicates = 0
+        self.invalid = 0
+
+    def validate(self, row):
+        # Returns a normalised record, or None if the row is rejected
+        if not isinstance(row, dict):
+            self.invalid += 1
+            return None
+        try:
+            title = text_field(row, "title").strip()
+            status = text_field(row, "status").strip() or DEFAULT_STATUS
+            year = row.get("year", "")
+            if not isinstance(year, (str, int)) or isinstance(year, bool):
+                raise ValueError(f"year ist keine Jahreszahl: {year!r}")
+            record = {
+                "title": title,
+                "creator": text_field(row, "creator").strip(),
+                "year": year,
+                "description": text_field(row, "description"),
+                "status": status,
+                "_uid": text_field(row, "_uid") or None,
+                "_id": None,
+            }
+            if row.get("_id") not in (None, ""):
+                record["_id"] = id_field(row["_id"])
+        except (TypeError, ValueError):
+            self.invalid += 1
+            return None
+        if not title or status not in Exhibit.STATUS_OPTIONS:
+            self.invalid += 1
+            return None
+        # De-duplicate against the inventory and against earlier rows of this import
+        if (record["_id"] is not None and (record["_id"] in self.museum.used_ids or record["_id"] in self.seen_ids)) \
+                or (record["_uid"] and (record["_uid"] in self.museum.used_uids or record["_uid"] in self.seen_uids)):
+            self.duplicates += 1
+            return None
+        if record["_id"] is not None:
+            self.seen_ids.add(record["_id"])
+            # Ids handed out automatically later must not collide with explicit ones
+            Exhibit.id_counter = max(Exhibit.id_counter, record["_id"] + 1)
+        if record["_uid"]:
+            self.seen_uids.add(record["_uid"])
+        return record
+
+    def commit(self, chunk):
+        if chunk:
+            self.museum.add_exhibits(Exhibit.from_dicts(chunk))
+            self.imported += len(chunk)
+
+    def run(self, rows):
+        chunk = []
+        # The whole import is one undo step (as long as it fits into the history)
+        with self.museum.history.grouped():
+            for row in rows:
+                record = self.validate(row)
+                if record is None:
+                    continue
+                chunk.append(record)
+                if len(chunk) >= self.chunk_size:
+                    self.commit(chunk)
+                    chunk = []
+            self.commit(chunk)
+        self.museum.save()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exponate aus CSV oder JSONL importieren.")
+    parser.add_argument("source", help="CSV- oder JSONL-Datei mit den Spalten title, creator, year, description, status")
+    parser.add_argument("--inventory", default=INVENTORY_FILE)
+    parser.add_argument("--format", choices=["csv", "jsonl"])
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    museum = Museum(args.inventory, streaming=True)
+    importer = BulkImporter(museum, args.chunk_size)
+    started = time.perf_counter()
+    importer.run(iter_records(args.source, args.format))
+    elapsed = time.perf_counter() - started
+    print(f"{importer.imported} Exponate importiert, {importer.duplicates} Duplikate und "
+          f"{importer.invalid} ungültige Zeilen übersprungen.")
+    print(f"{elapsed:.2f} s, {importer.imported / elapsed if elapsed else 0:.0f} Datensätze/s")
+
+
+if __name__ == "__main__":
+    main()
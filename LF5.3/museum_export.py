@@ -0,0 +1,181 @@
+# Export of the inventory to partner systems: YAML documents, JSONL or CSV, optionally gzip-compressed.
+# Records are streamed from the snapshot and written in chunks, memory does not grow with the inventory.
+
+import argparse
+import csv
+import gzip
+import itertools
+import json as js
+import os
+import re
+import sys
+import time
+
+from museum_model import INVENTORY_FILE, Exhibit, Museum, open_storage
+from museum_storage import JOURNAL_SUFFIX
+
+FORMATS = {".yaml": "yaml", ".yml": "yaml", ".jsonl": "jsonl", ".csv": "csv"}
+SECTION_FIELDS = {
+    "exhibits": Exhibit.FIELDS,
+    "galleries": ("name", "start", "end", "location", "exhibit_ids"),
+}
+EXPORT_CHUNK = 1000
+# Plain scalars YAML 1.1 resolves to booleans or null
+YAML_WORDS = {"y", "n", "yes", "no", "on", "off", "true", "false", "null", "~"}
+# Characters outside YAML's printable set, and the ones it reads as line breaks (U+0085, U+2028, U+2029)
+YAML_ESCAPED = re.compile("[\x7f-\x9f\u2028\u2029\ud800-\udfff\ufffe\uffff]")
+GZIP_LEVEL = 6
+
+
+class ExportError(Exception):
+    pass
+
+
+def iter_records(path, section="exhibits", use_model=None):
+    # Straight from the snapshot, unless changes are still in the journal: then the
+    # Museum model applies them first (and holds the inventory in memory)
+    if use_model is None:
+        journal = path + JOURNAL_SUFFIX
+        use_model = os.path.exists(journal) and os.path.getsize(journal) > 0
+    if use_model:
+        museum = Museum(path, streaming=True)
+        for item in museum.exhibits if section == "exhibits" else museum.galleries:
+            yield item.to_dict()
+        return
+    for item_section, item in open_storage(path).load(streaming=True):
+        if item_section == section:
+            yield item
+
+
+def chunked(records, size=EXPORT_CHUNK):
+    records = iter(records)
+    while True:
+        chunk = list(itertools.islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def write_jsonl(f, records, fields):
+    encode = js.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+    for chunk in chunked(records):
+        f.write("".join(encode({field: d.get(field) for field in fields}) + "\n" for d in chunk))
+
+
+json_encode = js.JSONEncoder(ensure_ascii=False).encode
+
+
+def yaml_scalar(value):
+    # JSON with the text as UTF-8: ensure_ascii would write characters outside the BMP as
+    # surrogate pair escapes, which YAML does not join back into one character
+    return YAML_ESCAPED.sub(lambda m: f"\\u{ord(m.group()):04x}", json_encode(value))
+
+
+def yaml_key(name, encode):
+    # Plain keys unless YAML would read them as something else (yes/no/null, numbers, ...)
+    if name.isidentifier() and name.lower() not in YAML_WORDS:
+        return name
+    return encode(name)
+
+
+def write_yaml(f, records, fields, key=None):
+    # One YAML document per record, or with key one block sequence under that key.
+    # Every value is written as a JSON scalar or flow sequence, which YAML reads as is.
+    # fields=None writes the keys of each record.
+    encode = yaml_scalar
+    names = None if fields is None else [yaml_key(field, encode) for field in fields]
+    first, rest = ("- ", "  ") if key else ("", "")
+    if key:
+        f.write(f"{yaml_key(key, encode)}:\n")
+    for chunk in chunked(records):
+        lines = []
+        for d in chunk:
+            if not key:
+                lines.append("---")
+            if names is None:
+                pairs = [(yaml_key(field, encode), value) for field, value in d.items()]
+            else:
+                pairs = zip(names, [d.get(field) for field in fields])
+            for i, (name, value) in enumerate(pairs):
+                lines.append(f"{rest if i else first}{name}: {encode(value)}")
+        f.write("\n".join(lines) + "\n")
+
+
+def csv_value(value):
+    if isinstance(value, (list, dict)):
+        return js.dumps(value, ensure_ascii=False)
+    return "" if value is None else value
+
+
+def write_csv(f, records, fields):
+    writer = csv.writer(f)
+    writer.writerow(fields)
+    for chunk in chunked(records):
+        writer.writerows([csv_value(d.get(field)) for field in fields] for d in chunk)
+
+
+WRITERS = {"yaml": write_yaml, "jsonl": write_jsonl, "csv": write_csv}
+
+
+def format_of(path):
+    base = path[:-3] if path.endswith(".gz") else path
+    fmt = FORMATS.get(os.path.splitext(base)[1].lower())
+    if fmt is None:
+        raise ExportError(f"Format von {path} unbekannt, bitte --format angeben.")
+    return fmt
+
+
+def open_output(path):
+    if path == "-":
+        return open(sys.stdout.fileno(), "w", encoding="utf-8", newline="", closefd=False)
+    if path.endswith(".gz"):
+        return gzip.open(path, "wt", encoding="utf-8", newline="", compresslevel=GZIP_LEVEL)
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def export(source, target, fmt=None, fields=None, section="exhibits", use_model=None):
+    # Returns the number of records written
+    if not os.path.exists(source):
+        raise ExportError(f"{source} nicht gefunden.")
+    fmt = fmt or format_of(target)
+    known = SECTION_FIELDS[section]
+    fields = tuple(fields) if fields else known
+    unknown = [field for field in fields if field not in known]
+    if unknown:
+        raise ExportError(f"Unbekannte Felder: {', '.join(unknown)} (möglich: {', '.join(known)})")
+    count = 0
+
+    def counted(records):
+        nonlocal count
+        for count, d in enumerate(records, 1):
+            yield d
+    with open_output(target) as f:
+        WRITERS[fmt](f, counted(iter_records(source, section, use_model)), fields)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exportiert das Inventar als YAML, JSONL oder CSV (optional .gz).")
+    parser.add_argument("target", help="Zieldatei, z.B. export.jsonl.gz; '-' für die Standardausgabe")
+    parser.add_argument("--source", default=INVENTORY_FILE,
+                        help="JSON-Datei, Binär-Snapshot (.mbin) oder SQLite-Datenbank (.db, .sqlite, .sqlite3)")
+    parser.add_argument("--format", choices=sorted(WRITERS))
+    parser.add_argument("--fields", help="Kommagetrennte Felder, z.B. _id,title,creator")
+    parser.add_argument("--section", choices=sorted(SECTION_FIELDS), default="exhibits")
+    parser.add_argument("--model", action="store_true", default=None,
+                        help="Über das Museum-Modell lesen (sonst nur, wenn das Journal Änderungen enthält)")
+    args = parser.parse_args()
+    fields = [field.strip() for field in args.fields.split(",")] if args.fields else None
+    started = time.perf_counter()
+    try:
+        count = export(args.source, args.target, args.format, fields, args.section, args.model)
+    except ExportError as e:
+        parser.exit(1, f"{e}\n")
+    if args.target != "-":
+        elapsed = time.perf_counter() - started
+        print(f"{count} Datensätze nach {args.target} exportiert ({os.path.getsize(args.target) / 1e6:.1f} MB, "
+              f"{elapsed:.2f} s, {count / max(elapsed, 1e-9):.0f} Datensätze/s)")
+
+
+if __name__ == "__main__":
+    main()
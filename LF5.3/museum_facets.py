@@ -0,0 +1,55 @@
+# Facet counters for the Museum Inventory App
+
+from collections import Counter
+
+FACET_FIELDS = ("status", "kh_epoche", "creator")
+
+
+def discount(counter, key):
+    counter[key] -= 1
+    if counter[key] <= 0:
+        del counter[key]
+
+
+class FacetCounts:
+    # Counts per value of each facet field, plus per (kh_epoche, status) pair.
+    # Kept up to date on every add, update and remove, so a query never scans the exhibits.
+    def __init__(self):
+        self.counts = {field: Counter() for field in FACET_FIELDS}
+        self.pairs = Counter()
+        self.total = 0
+
+    def add(self, exhibit):
+        for field, counter in self.counts.items():
+            counter[getattr(exhibit, field)] += 1
+        self.pairs[exhibit.kh_epoche, exhibit.status] += 1
+        self.total += 1
+
+    def remove(self, exhibit):
+        for field, counter in self.counts.items():
+            discount(counter, getattr(exhibit, field))
+        discount(self.pairs, (exhibit.kh_epoche, exhibit.status))
+        self.total -= 1
+
+    def update(self, exhibit, old):
+        # old holds the field values before the update
+        for field, counter in self.counts.items():
+            value = getattr(exhibit, field)
+            if old[field] != value:
+                discount(counter, old[field])
+                counter[value] += 1
+        pair = (exhibit.kh_epoche, exhibit.status)
+        if (old["kh_epoche"], old["status"]) != pair:
+            discount(self.pairs, (old["kh_epoche"], old["status"]))
+            self.pairs[pair] += 1
+
+    def count(self, field, value):
+        return self.counts[field][value]
+
+    def facet(self, field, options=()):
+        # Counts of one facet, listed options first (also with 0), then the rest by frequency
+        counter = self.counts[field]
+        result = {option: counter[option] for option in options}
+        for value, count in counter.most_common():
+            result.setdefault(value, count)
+        return result
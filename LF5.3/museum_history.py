@@ -0,0 +1,79 @@
+# Undo/redo history for the Museum Inventory App
+#
+# Every local change is journaled as a compact record (see Museum.record); alongside it the
+# history keeps the inverse record, built from the fields that actually changed. An undo step
+# runs the inverses of one user action as regular changes, which in turn yields the redo step.
+
+import contextlib
+from collections import deque
+
+HISTORY_STEPS = 100
+# Upper bound for the inverse records held over all steps; bigger actions cannot be undone
+HISTORY_CHANGES = 100000
+
+
+class History:
+    def __init__(self, steps=HISTORY_STEPS, max_changes=HISTORY_CHANGES):
+        self.undo_steps = deque(maxlen=steps)
+        self.redo_steps = deque(maxlen=steps)
+        self.max_changes = max_changes
+        # Inverses of the action in progress, None outside of group()
+        self.group = None
+        self.overflow = False
+
+    def size(self):
+        return sum(map(len, self.undo_steps)) + sum(map(len, self.redo_steps))
+
+    def push(self, steps, inverses):
+        steps.append(inverses)
+        while len(steps) > 1 and self.size() > self.max_changes:
+            (self.undo_steps if self.undo_steps else self.redo_steps).popleft()
+
+    def record(self, inverses):
+        if self.group is not None:
+            if not self.overflow:
+                self.group.extend(inverses)
+                self.overflow = len(self.group) > self.max_changes
+            return
+        if not inverses:
+            return
+        self.redo_steps.clear()
+        if len(inverses) > self.max_changes:
+            self.undo_steps.clear()
+            return
+        self.push(self.undo_steps, list(inverses))
+
+    @contextlib.contextmanager
+    def collect(self):
+        # Gathers the inverses recorded meanwhile into a list instead of a step of its own
+        outer, self.group = self.group, []
+        collected = self.group
+        try:
+            yield collected
+        finally:
+            self.group = outer
+
+    @contextlib.contextmanager
+    def grouped(self):
+        # All changes made inside become one undo step
+        if self.group is not None:
+            yield
+            return
+        try:
+            with self.collect() as inverses:
+                yield
+        finally:
+            # Also after an error: what was changed up to then can still be undone
+            overflow, self.overflow = self.overflow, False
+            if inverses:
+                self.redo_steps.clear()
+            if overflow:
+                self.undo_steps.clear()
+            elif inverses:
+                self.push(self.undo_steps, inverses)
+
+    def can_undo(self):
+        return bool(self.undo_steps)
+
+    def can_redo(self):
+        return bool(self.redo_steps)
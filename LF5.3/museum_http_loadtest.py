@@ -0,0 +1,115 @@
+# Load test for museum_http_server.py: concurrent keep-alive clients, requests/s and latency percentiles
+
+import argparse
+import asyncio
+import json as js
+import random as rd
+import time
+from urllib.parse import quote
+
+from museum_http_server import DEFAULT_HOST, DEFAULT_PORT
+from museum_model import Exhibit
+
+QUERIES = ["münze", "dürer", "1888", "zustand", "im lager", "xyz"]
+# Share of each request kind; the rest are lookups by _id
+MIX = {"search": 0.2, "gallery": 0.1, "update": 0.05}
+
+
+async def request(reader, writer, method, path, payload=None):
+    body = js.dumps(payload).encode("utf-8") if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: museum\r\nContent-Length: {len(body)}\r\n\r\n".encode("latin-1")
+                 + body)
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ", 2)[1])
+    length = 0
+    for line in lines[1:]:
+        if line.lower().startswith("content-length:"):
+            length = int(line.split(":", 1)[1])
+    return status, await reader.readexactly(length)
+
+
+def pick_request(rnd, ids, galleries):
+    roll = rnd.random()
+    if roll < MIX["search"]:
+        return "search", "GET", f"/search?q={quote(rnd.choice(QUERIES))}&limit=20", None
+    roll -= MIX["search"]
+    if roll < MIX["gallery"] and galleries:
+        return "gallery", "GET", f"/galleries/{rnd.choice(galleries)}", None
+    roll -= MIX["gallery"]
+    if roll < MIX["update"]:
+        return "update", "PATCH", f"/exhibits/{rnd.choice(ids)}", {"status": rnd.choice(Exhibit.STATUS_OPTIONS)}
+    return "lookup", "GET", f"/exhibits/{rnd.choice(ids)}", None
+
+
+async def client(host, port, deadline, ids, galleries, seed, results):
+    rnd = rd.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            kind, method, path, payload = pick_request(rnd, ids, galleries)
+            started = time.perf_counter()
+            status, _ = await request(reader, writer, method, path, payload)
+            results.append((kind, time.perf_counter() - started, status))
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def fetch_targets(host, port, sample):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        _, body = await request(reader, writer, "GET", f"/exhibits?limit={sample}")
+        ids = [ex["_id"] for ex in js.loads(body)["exhibits"]]
+        _, body = await request(reader, writer, "GET", "/galleries")
+        galleries = [quote(gal["name"], safe="") for gal in js.loads(body)["galleries"]]
+    finally:
+        writer.close()
+        await writer.wait_closed()
+    return ids, galleries
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def report(results, elapsed):
+    print(f"{len(results)} Anfragen in {elapsed:.1f} s: {len(results) / elapsed:.0f} Anfragen/s")
+    kinds = sorted({kind for kind, _, _ in results})
+    for kind in ["alle"] + kinds:
+        latencies = sorted(lat for k, lat, _ in results if kind == "alle" or k == kind)
+        errors = sum(1 for k, _, status in results if (kind == "alle" or k == kind) and status >= 500)
+        print(f"  {kind:<8} {len(latencies):8d}  p50 {percentile(latencies, 0.50) * 1e3:7.2f} ms  "
+              f"p99 {percentile(latencies, 0.99) * 1e3:7.2f} ms  Fehler {errors}")
+
+
+async def run(host, port, connections, duration, sample):
+    ids, galleries = await fetch_targets(host, port, sample)
+    if not ids:
+        print("Keine Exponate auf dem Server gefunden.")
+        return
+    results = []
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(client(host, port, deadline, ids, galleries, seed, results)
+                           for seed in range(connections)))
+    report(results, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Lasttest für museum_http_server.py. Enthält Schreibzugriffe, daher mit einer Kopie des Inventars starten.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("-c", "--connections", type=int, default=50)
+    parser.add_argument("-d", "--duration", type=float, default=10.0, help="Dauer in Sekunden")
+    parser.add_argument("--sample", type=int, default=1000, help="Anzahl IDs, die abgefragt werden")
+    args = parser.parse_args()
+    asyncio.run(run(args.host, args.port, args.connections, args.duration, args.sample))
+
+
+if __name__ == "__main__":
+    main()
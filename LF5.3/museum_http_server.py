@@ -0,0 +1,417 @@
+# HTTP/JSON front-end for the inventory: many kiosks and staff terminals on one Museum
+
+import argparse
+import asyncio
+import concurrent.futures
+import contextlib
+import json as js
+import traceback
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from museum_instrumentation import ENV_INSTRUMENT, ENV_PROFILE, configure
+from museum_model import INVENTORY_FILE, Exhibit, Museum
+from museum_service import ConflictError, MuseumService, NotFoundError, ServiceError, ValidationError
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+MAX_HEADER_SIZE = 1 << 16
+MAX_BODY_SIZE = 1 << 20
+DEFAULT_PAGE_SIZE = 50
+REFRESH_INTERVAL = 1.0
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+ERROR_STATUS = {NotFoundError: 404, ValidationError: 400, ConflictError: 409}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ReadWriteLock:
+    # Any number of readers share the lock; a writer waits for them to finish and holds it alone.
+    # Waiting writers stop new readers from entering, so a stream of reads cannot starve an edit.
+    def __init__(self):
+        self.condition = asyncio.Condition()
+        self.readers = 0
+        self.writing = False
+        self.waiting_writers = 0
+
+    @contextlib.asynccontextmanager
+    async def read(self):
+        async with self.condition:
+            await self.condition.wait_for(lambda: not self.writing and not self.waiting_writers)
+            self.readers += 1
+        try:
+            yield
+        finally:
+            async with self.condition:
+                self.readers -= 1
+                if not self.readers:
+                    self.condition.notify_all()
+
+    @contextlib.asynccontextmanager
+    async def write(self):
+        async with self.condition:
+            self.waiting_writers += 1
+            try:
+                await self.condition.wait_for(lambda: not self.writing and not self.readers)
+            finally:
+                self.waiting_writers -= 1
+            self.writing = True
+        try:
+            yield
+        finally:
+            async with self.condition:
+                self.writing = False
+                self.condition.notify_all()
+
+
+class ThreadWriteLock:
+    # The write side of a ReadWriteLock, taken from the worker thread: it waits on the event loop
+    # until the readers are out. Re-entrant; a no-op once the loop is gone (shutdown).
+    def __init__(self, lock):
+        self.lock = lock
+        self.loop = None
+        self.held = []
+
+    def __enter__(self):
+        if self.held or self.loop is None or self.loop.is_closed():
+            self.held.append(None)
+            return self
+        context = self.lock.write()
+        asyncio.run_coroutine_threadsafe(context.__aenter__(), self.loop).result()
+        self.held.append(context)
+        return self
+
+    def __exit__(self, *exc):
+        context = self.held.pop()
+        if context is not None:
+            asyncio.run_coroutine_threadsafe(context.__aexit__(None, None, None), self.loop).result()
+
+
+def exhibit_json(exhibit, galleries=None):
+    data = exhibit.to_dict(cached=True)
+    if galleries is not None:
+        data["galleries"] = galleries
+    return data
+
+
+def parse_int(value, name):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise HttpError(400, f"{name} muss eine Zahl sein.")
+
+
+class MuseumHttpServer:
+    # Reads run on the event loop under the shared lock. Writes run one after another in a worker
+    # thread and hold the exclusive lock only while they change the museum in memory; the journal
+    # write (file lock, fsync, changes of other processes, compaction) runs beside the readers.
+    def __init__(self, service: MuseumService):
+        self.service = service
+        self.lock = ReadWriteLock()
+        self.writer_thread = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.exclusive = ThreadWriteLock(self.lock)
+        service.exclude_readers_with(self.exclusive)
+        self.routes = [
+            ("GET", ("exhibits",), self.list_exhibits),
+            ("POST", ("exhibits",), self.add_exhibit),
+            ("GET", ("exhibits", None), self.get_exhibit),
+            ("PATCH", ("exhibits", None), self.update_exhibit),
+            ("DELETE", ("exhibits", None), self.remove_exhibit),
+            ("GET", ("search",), self.search),
+            ("GET", ("query",), self.query),
+            ("GET", ("stats",), self.statistics),
+            ("GET", ("galleries",), self.list_galleries),
+            ("POST", ("galleries",), self.create_gallery),
+            ("GET", ("galleries", None), self.get_gallery),
+            ("POST", ("galleries", None, "exhibits"), self.add_to_gallery),
+            ("DELETE", ("galleries", None, "exhibits", None), self.remove_from_gallery),
+            ("POST", ("save",), self.save),
+        ]
+
+    # --- Connection handling ---
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except HttpError as e:
+                    await write_response(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    break
+                method, target, headers, body, keep_alive = request
+                status, payload = await self.dispatch(method, target, body)
+                await write_response(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def dispatch(self, method, target, body):
+        url = urlsplit(target)
+        parts = tuple(unquote(part) for part in url.path.strip("/").split("/") if part)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        allowed = False
+        for route_method, pattern, handler in self.routes:
+            if len(pattern) != len(parts) or any(p is not None and p != part for p, part in zip(pattern, parts)):
+                continue
+            allowed = True
+            if route_method != method:
+                continue
+            args = [part for p, part in zip(pattern, parts) if p is None]
+            try:
+                return await handler(*args, query=query, body=body)
+            except HttpError as e:
+                return e.status, {"error": str(e)}
+            except ServiceError as e:
+                return self.service_error(e)
+            except Exception:
+                # A bug must not take the connection down with it; the client gets a 500, the console the traceback
+                traceback.print_exc()
+                return 500, {"error": "Interner Fehler."}
+        if allowed:
+            return 405, {"error": f"Methode {method} nicht erlaubt."}
+        return 404, {"error": "Unbekannter Pfad."}
+
+    def service_error(self, error):
+        for error_type, status in ERROR_STATUS.items():
+            if isinstance(error, error_type):
+                payload = {"error": str(error)}
+                galleries = getattr(error, "galleries", None)
+                if galleries is not None:
+                    payload["galleries"] = galleries
+                return status, payload
+        return 400, {"error": str(error)}
+
+    async def read(self, fn, *args, **kwargs):
+        async with self.lock.read():
+            return fn(*args, **kwargs)
+
+    async def write(self, fn, *args, **kwargs):
+        return await self.in_writer_thread(self.apply_write, fn, args, kwargs)
+
+    def apply_write(self, fn, args, kwargs):
+        # Worker thread: the readers wait only for the in-memory change, not for the disk
+        changes = []
+        try:
+            with self.exclusive, self.service.collect() as changes:
+                return fn(*args, **kwargs)
+        finally:
+            self.service.commit(changes)
+
+    async def in_writer_thread(self, fn, *args):
+        # Also for storage work without an edit (save, refresh): the museum takes the
+        # exclusive lock itself when it merges changes of other processes
+        loop = asyncio.get_running_loop()
+        self.exclusive.loop = loop
+        return await loop.run_in_executor(self.writer_thread, fn, *args)
+
+    # --- Exhibits ---
+    async def list_exhibits(self, query, body):
+        offset = parse_int(query.get("offset", 0), "offset")
+        limit = parse_int(query.get("limit", DEFAULT_PAGE_SIZE), "limit")
+
+        def page():
+            view = self.service.browse(status=query.get("status"), kh_epoche=query.get("epoche"))
+            return {"total": len(view), "offset": offset,
+                    "exhibits": [exhibit_json(ex) for ex in view[max(0, offset):max(0, offset) + max(0, limit)]]}
+        return 200, await self.read(page)
+
+    async def get_exhibit(self, target_id, query, body):
+        target_id = parse_int(target_id, "ID")
+
+        def lookup():
+            return exhibit_json(self.service.get_exhibit(target_id), self.service.galleries_of(target_id))
+        return 200, await self.read(lookup)
+
+    async def add_exhibit(self, query, body):
+        data = parse_body(body)
+        try:
+            args = [data[field] for field in ("title", "creator", "year", "description", "status")]
+        except KeyError as e:
+            raise HttpError(400, f"Feld fehlt: {e.args[0]}")
+        exhibit = await self.write(self.service.add_exhibit, *args)
+        return 201, exhibit_json(exhibit)
+
+    async def update_exhibit(self, target_id, query, body):
+        target_id = parse_int(target_id, "ID")
+        data = parse_body(body)
+        unknown = set(data) - set(Exhibit.EDIT_FIELDS)
+        if unknown:
+            raise HttpError(400, f"Unbekannte Felder: {', '.join(sorted(unknown))}")
+        fields = {field: data[field] for field in Exhibit.EDIT_FIELDS if field in data}
+        exhibit = await self.write(self.service.update_exhibit, target_id, **fields)
+        return 200, exhibit_json(exhibit)
+
+    async def remove_exhibit(self, target_id, query, body):
+        exhibit = await self.write(self.service.remove_exhibit, parse_int(target_id, "ID"))
+        return 200, exhibit_json(exhibit)
+
+    async def search(self, query, body):
+        text = query.get("q", "")
+        limit = parse_int(query["limit"], "limit") if "limit" in query else None
+
+        def run():
+            if query.get("fuzzy") in ("1", "true"):
+                return {"query": text, "exhibits": [dict(exhibit_json(ex), similarity=score)
+                                                    for ex, score in self.service.fuzzy_search(text, limit or 10)]}
+            return {"query": text, "exhibits": [exhibit_json(ex) for ex in self.service.search(text, limit)]}
+        return 200, await self.read(run)
+
+    async def query(self, query, body):
+        # /query?year_from=1600&year_to=1750&status=Im%20Lager&in_gallery=0; all parameters optional
+        criteria = {name: parse_int(query[name], name) for name in ("year_from", "year_to", "limit") if name in query}
+        for name in ("status", "kh_epoche", "creator", "gallery"):
+            if name in query:
+                criteria[name] = query[name]
+        if "in_gallery" in query:
+            criteria["in_gallery"] = query["in_gallery"] in ("1", "true")
+
+        def run():
+            return {"exhibits": [exhibit_json(ex) for ex in self.service.query(**criteria)]}
+        return 200, await self.read(run)
+
+    async def statistics(self, query, body):
+        return 200, await self.read(self.service.statistics)
+
+    # --- Galleries ---
+    async def list_galleries(self, query, body):
+        def run():
+            return {"galleries": [{"name": gal.name, "location": gal.location, "count": len(gal.exhibit_ids)}
+                                  for gal in self.service.list_galleries()]}
+        return 200, await self.read(run)
+
+    async def get_gallery(self, name, query, body):
+        def run():
+            data = self.service.get_gallery(name).to_dict()
+            data["exhibits"] = [exhibit_json(ex) if ex else {"_id": target_id}
+                                for target_id, ex in self.service.gallery_exhibits(name)]
+            return data
+        return 200, await self.read(run)
+
+    async def create_gallery(self, query, body):
+        data = parse_body(body)
+        gallery = await self.write(self.service.create_gallery, data.get("name", ""), data.get("start", ""),
+                                   data.get("end", ""), data.get("location", ""))
+        return 201, gallery.to_dict()
+
+    async def add_to_gallery(self, name, query, body):
+        data = parse_body(body)
+        target_id = parse_int(data.get("id"), "id")
+        exhibit = await self.write(self.service.add_to_gallery, name, target_id, bool(data.get("force")))
+        return 200, exhibit_json(exhibit)
+
+    async def remove_from_gallery(self, name, target_id, query, body):
+        target_id = parse_int(target_id, "ID")
+        exhibit = await self.write(self.service.remove_from_gallery, name, target_id)
+        return 200, exhibit_json(exhibit) if exhibit else {"_id": target_id}
+
+    # --- Persistence ---
+    async def save(self, query, body):
+        await self.in_writer_thread(self.service.save)
+        return 200, {"saved": True}
+
+
+def parse_body(body):
+    if not body:
+        return {}
+    try:
+        data = js.loads(body)
+    except (UnicodeDecodeError, js.JSONDecodeError):
+        raise HttpError(400, "Ungültiges JSON.")
+    if not isinstance(data, dict):
+        raise HttpError(400, "JSON-Objekt erwartet.")
+    return data
+
+
+async def read_request(reader):
+    # Minimal HTTP/1.1: request line, headers, optional Content-Length body, keep-alive
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.LimitOverrunError:
+        raise HttpError(413, "Header zu groß.")
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, version = lines[0].split(" ", 2)
+    except ValueError:
+        raise HttpError(400, "Ungültige Anfragezeile.")
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            key, value = line.split(":", 1)
+            headers[key.strip().lower()] = value.strip()
+    length = parse_int(headers.get("content-length", 0), "Content-Length")
+    if length > MAX_BODY_SIZE:
+        raise HttpError(413, "Anfrage zu groß.")
+    body = await reader.readexactly(length) if length > 0 else b""
+    connection = headers.get("connection", "").lower()
+    keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+    return method.upper(), target, headers, body, keep_alive
+
+
+async def write_response(writer, status, payload, keep_alive):
+    body = js.dumps(payload, ensure_ascii=False).encode("utf-8")
+    head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+
+
+async def refresh_periodically(app, interval=REFRESH_INTERVAL):
+    # Folds in what other processes wrote to the same inventory
+    while True:
+        await asyncio.sleep(interval)
+        await app.in_writer_thread(app.service.refresh)
+
+
+async def serve(service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    app = MuseumHttpServer(service)
+    server = await asyncio.start_server(app.handle_connection, host, port, limit=MAX_HEADER_SIZE)
+    print(f"Server läuft auf http://{host}:{port} (Strg+C zum Beenden)")
+    refresher = asyncio.create_task(refresh_periodically(app))
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        refresher.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP/JSON-Schnittstelle für die Museum Inventory App.")
+    parser.add_argument("inventory", nargs="?", default=INVENTORY_FILE,
+                        help="JSON-Datei, Binär-Snapshot (.mbin) oder SQLite-Datenbank (.db, .sqlite, .sqlite3)")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--lazy-texts", action="store_true",
+                        help="Beschreibungen auf der Platte lassen und bei Bedarf über einen Cache lesen")
+    parser.add_argument("--instrument", action="store_true",
+                        help=f"Laufzeiten der Kernoperationen messen und beim Beenden ausgeben (auch {ENV_INSTRUMENT}=1)")
+    parser.add_argument("--profile", metavar="DATEI",
+                        help=f"Event-Loop mit cProfile aufzeichnen und als pstats-Datei speichern (auch {ENV_PROFILE}=DATEI)")
+    args = parser.parse_args()
+    configure(args.instrument, args.profile)
+
+    museum = Museum(args.inventory, streaming=True, lazy_texts=args.lazy_texts)
+    print(f"{len(museum.exhibits)} Exponate und {len(museum.galleries)} Galerien geladen.")
+    service = MuseumService(museum)
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.save()
+        print("Daten gespeichert. Server beendet!")
+
+
+if __name__ == "__main__":
+    main()
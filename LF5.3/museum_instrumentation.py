@@ -0,0 +1,156 @@
+# Opt-in instrumentation of the hot paths of the Museum Inventory App: call counts and latency
+# histograms per operation, optionally a cProfile dump, and a summary when the process ends.
+#
+# Enabled with MUSEUM_INSTRUMENT=1 or --instrument; MUSEUM_PROFILE=<file> or --profile <file>
+# also writes a pstats file. The operations are wrapped at runtime only when enabled, so a
+# normal session runs the unchanged functions.
+
+import atexit
+import cProfile
+import functools
+import os
+import pstats
+import sys
+import threading
+import time
+
+from museum_binary import BinaryStorage
+from museum_model import Exhibit, Museum
+from museum_storage import JsonStorage
+
+ENV_INSTRUMENT = "MUSEUM_INSTRUMENT"
+ENV_PROFILE = "MUSEUM_PROFILE"
+# Loading (JSON parsing included), lookups, search and formatting, and the snapshot written by save()
+HOT_PATHS = {
+    Museum: ("__init__", "load", "replay", "sync", "save", "get_exhibit_by_id", "get_exhibits_by_ids",
+             "search", "fuzzy_search", "query", "statistics"),
+    Exhibit: ("display_info",),
+    JsonStorage: ("write_snapshot",),
+    BinaryStorage: ("write_snapshot",),
+}
+# Histogram bucket b holds the calls taking [2**(b-1), 2**b) nanoseconds
+BUCKETS = 64
+PROFILE_TOP = 15
+
+instrumentation = None
+
+
+class Timing:
+    __slots__ = ("calls", "errors", "total", "max", "buckets")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total = 0
+        self.max = 0
+        self.buckets = [0] * BUCKETS
+
+    def percentile(self, fraction):
+        # Upper bound of the bucket holding the percentile, in nanoseconds
+        rank = fraction * self.calls
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= rank:
+                return min(1 << bucket, self.max)
+        return self.max
+
+
+class Instrumentation:
+    def __init__(self, profile_path=None):
+        self.timings = {}
+        # Restores the originals on uninstall(): (owner, name, original)
+        self.wrapped = []
+        self.lock = threading.Lock()
+        self.profile_path = profile_path
+        self.profiler = None
+
+    def wrap(self, owner, name, label=None):
+        original = getattr(owner, name)
+        label = label or getattr(original, "__qualname__", name)
+        timing = self.timings.setdefault(label, Timing())
+        buckets = timing.buckets
+        clock = time.perf_counter_ns
+        lock = self.lock
+
+        # The bookkeeping is inlined, it runs on every call of the hot paths
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            started = clock()
+            try:
+                return original(*args, **kwargs)
+            except BaseException:
+                with lock:
+                    timing.errors += 1
+                raise
+            finally:
+                elapsed = clock() - started
+                with lock:
+                    timing.calls += 1
+                    timing.total += elapsed
+                    if elapsed > timing.max:
+                        timing.max = elapsed
+                    buckets[elapsed.bit_length()] += 1
+        setattr(owner, name, timed)
+        self.wrapped.append((owner, name, original))
+
+    def install(self, hot_paths=HOT_PATHS):
+        for cls, names in hot_paths.items():
+            for name in names:
+                # Only methods the class defines itself, inherited ones are timed on the base class
+                if name in vars(cls):
+                    self.wrap(cls, name)
+        if self.profile_path:
+            # Sees the calling thread only: in the HTTP server the event loop with the reads,
+            # its writes run on the worker thread and show up in the timings only
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def uninstall(self):
+        if self.profiler is not None:
+            self.profiler.disable()
+        for owner, name, original in reversed(self.wrapped):
+            setattr(owner, name, original)
+        self.wrapped = []
+
+    def summary(self):
+        lines = [f"{'Operation':<32} {'Aufrufe':>9} {'Fehler':>6} {'gesamt ms':>10} {'Mittel µs':>10} "
+                 f"{'p50 µs':>9} {'p99 µs':>9} {'max µs':>10}"]
+        # Nested operations (Museum.__init__ -> Museum.load) are counted in both
+        for label, timing in sorted(self.timings.items(), key=lambda item: -item[1].total):
+            if not timing.calls:
+                continue
+            lines.append(f"{label:<32} {timing.calls:9d} {timing.errors:6d} {timing.total / 1e6:10.1f} "
+                         f"{timing.total / timing.calls / 1e3:10.1f} {timing.percentile(0.5) / 1e3:9.1f} "
+                         f"{timing.percentile(0.99) / 1e3:9.1f} {timing.max / 1e3:10.1f}")
+        return "\n".join(lines)
+
+    def histogram(self, label):
+        # [(upper bound in ns, calls)] of the non-empty buckets
+        return [(1 << bucket, count) for bucket, count in enumerate(self.timings[label].buckets) if count]
+
+    def report(self, out=sys.stderr):
+        print("\n---- Laufzeiten ----", file=out)
+        print(self.summary(), file=out)
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profiler.dump_stats(self.profile_path)
+            print(f"\nProfil gespeichert in {self.profile_path}, die teuersten Funktionen:", file=out)
+            pstats.Stats(self.profile_path, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP)
+
+
+def configure(instrument=False, profile_path=None, app=None, app_functions=()):
+    # Called by the entry points with their flags; the environment variables enable it as well.
+    # app_functions are module-level functions of app (e.g. the CLI flows) to time too.
+    # Returns the Instrumentation, or None when disabled.
+    global instrumentation
+    instrument = instrument or os.environ.get(ENV_INSTRUMENT, "") not in ("", "0")
+    profile_path = profile_path or os.environ.get(ENV_PROFILE) or None
+    if not (instrument or profile_path) or instrumentation is not None:
+        return instrumentation
+    instrumentation = Instrumentation(profile_path)
+    instrumentation.install()
+    for name in app_functions:
+        instrumentation.wrap(app, name)
+    atexit.register(instrumentation.report)
+    return instrumentation
@@ -1,207 +1,126 @@
 # 5.3: Museum Inventory App
 
-import datetime as dt
-import random as rd
-import json as js
-import uuid
-
-# --- CLASSES ---
-class Exhibit:
-    EPOCHEN = [
-        (1945, 2026, "Zeitgenössische Kunst"),
-        (1890, 1945, "Moderne"),
-        (1848, 1890, "Realismus"),
-        (1750, 1848, "Klassizismus / Romantik"),
-        (1600, 1750, "Barock"),
-        (1400, 1600, "Renaissance"),
-        (500, 1400, "Mittelalter"),
-        (-3000, 500, "Antike")
-    ]
-    
-    STATUS_OPTIONS = ["Im Lager", "Ausgestellt", "Ungewiss"]
-    
-    id_counter = 1
-    def __init__(self, title, creator, year, description, status, _uid=None, _id=None, **kwargs):
-        self._uid = _uid if _uid else str(uuid.uuid4())
-        if _id is not None:
-            self._id = _id
-            Exhibit.id_counter = max(Exhibit.id_counter, _id + 1)
-        else:
-            self._id = Exhibit.id_counter
-            Exhibit.id_counter += 1
-        
-        self.title = title
-        self.creator = creator
-        self.year = year
-        self.description = description
-        self.status = status
-        self.year_epoch_helper()
-    
-    def determine_epoch(self):
-        if isinstance(self.year, int):
-            for start, end, kh_epoche in Exhibit.EPOCHEN:
-                if start <= self.year < end:
-                    return kh_epoche
-        return "Unbekannt"
-    
-    def year_epoch_helper(self):
-        try:
-            self.year = int(self.year)
-        except ValueError:
-            pass
-        self.kh_epoche = self.determine_epoch()
-    
-    def update(self, title, creator, year, description, status, **kwargs):
-        self.title = title
-        self.creator = creator
-        self.year = year
-        self.description = description
-        self.status = status
-        self.year_epoch_helper()
-
-    def display_info(self):
-        return f"ID: {self._id}\n Titel: {self.title}\n Schöpfer: {self.creator}\n Jahr/Epoche: {self.year}\n Beschreibung: {self.description}\n Status: {self.status}\n Kunsthistorische Epoche: {self.kh_epoche}\n"
-    
-class Museum:
-    def __init__(self):
-        self.exhibits = []
-        self.galleries = []
-        try:
-            with open("museum_exhibits.json", "r") as f:
-                data = js.load(f)
-                # If old format (list), handle gracefully
-                if isinstance(data, list):
-                    self.exhibits = [Exhibit(**d) for d in data]
-                else:
-                    # New format (dict)
-                    self.exhibits = [Exhibit(**d) for d in data.get("exhibits", [])]
-                    for g_data in data.get("galleries", []):
-                        gal = Gallery(g_data["name"], g_data["start"], g_data["end"], g_data["location"])
-                        gal.exhibit_ids = g_data["exhibit_ids"]
-                        self.galleries.append(gal)
-                print(f"{len(self.exhibits)} Exponate und {len(self.galleries)} Galerien geladen.")
-        except (FileNotFoundError, js.JSONDecodeError):
-            print("Nichts gefunden. Starte leer.")
-        
-        self.used_ids = set(ex._id for ex in self.exhibits)
-        self.used_uids = set(ex._uid for ex in self.exhibits)
-
-    def add_exhibit(self, exhibit):
-        if exhibit._id in self.used_ids:
-            raise ValueError(f"ID {exhibit._id} bereits vergeben.")
-        if exhibit._uid in self.used_uids:
-            raise ValueError(f"UID bereits vergeben.")
-        self.used_ids.add(exhibit._id)
-        self.used_uids.add(exhibit._uid)
-        self.exhibits.append(exhibit)
-
-    def list_exhibits(self):
-        for exhibit in self.exhibits:
-            print(exhibit.display_info())
-        choice = input("Zum Starten der Bearbeitung [b] eingeben: ")
-        if choice == "b":
-            update_exhibit_flow(self)
-        else:
-            pass
-            
-    def get_exhibit_by_id(self, target_id):
-        for ex in self.exhibits:
-            if ex._id == target_id:
-                return ex
-        return None
-
-class Gallery:
-    def __init__(self, name, start, end, location) -> None:
-        self.name = name
-        self.start = start
-        self.end = end
-        self.location = location
-        self.exhibit_ids = []
-        
-    def add_ex_to_gallery(self, museum, target_id):
-        exhibit = museum.get_exhibit_by_id(target_id)
-        if not exhibit:
-            print("ID nicht gefunden.")
-            return
-        
-        if exhibit.status == "Ausgestellt":
-            confirm = input(f"Objekt bereits ausgestellt! Trotzdem hinzufügen [j]?: ").strip().lower()
-            if confirm != "j":
-                return
-        
-        if target_id not in self.exhibit_ids:
-            self.exhibit_ids.append(target_id)
-            print(f"{exhibit.title} mit der ID: {exhibit._id} wurde der Galerie '{self.name}' hinzugefügt.")
-        else:
-            print(f"{exhibit.title} ist bereits Teil dieser Galerie.")
-    
-    def remove_ex_from_gallery(self, museum, target_id):
-        exhibit = museum.get_exhibit_by_id(target_id)
-        if target_id in self.exhibit_ids:
-            confirm = input(f"Exponat {target_id} wirklich aus '{self.name}' entfernen? [j/n]: ").strip().lower()
-            if confirm != "j":
-                print("Vorgang abgebrochen.")
-                return
-            self.exhibit_ids.remove(target_id)
-        else:
-            print("ID nicht in Galerie gefunden!")
-            return
-        if exhibit:
-            print(f"'{exhibit.title}' wurde aus der Galerie entfernt.")
-    
-    def display_gallery(self, museum):
-        print(f"---- {self.name} ----")
-        if not self.exhibit_ids:
-            print("Zurzeit keine Objekte hier.")
-            return
-        
-        for target_id in self.exhibit_ids:
-            exhibit = museum.get_exhibit_by_id(target_id)
-            if exhibit:
-                print(f"ID: {exhibit._id} --- {exhibit.title}")
-            else:
-                print("ID nicht gefunden.")
+import argparse
+import itertools
+import sys
+
+from museum_instrumentation import ENV_INSTRUMENT, ENV_PROFILE, configure
+from museum_model import INVENTORY_FILE, Exhibit, ExhibitList, Gallery, Museum
+from museum_service import AlreadyExhibitedError, MuseumService, ServiceError
 
-# --- END of CLASSES ---
+PAGE_SIZE = 10
+TOP_CREATORS = 10
+# Flows timed with --instrument, besides the Museum operations in museum_instrumentation.HOT_PATHS
+INSTRUMENTED_FLOWS = ("search_while_loop", "query_flow", "list_exhibits", "show_statistics", "display_gallery")
 
 # --- FUNCTIONALITY ---
-def run_inventory_app():
-    museum = Museum()
+def render_page(rows, start, total, page_size, label):
+    # Formats only the rows on screen and writes the page in one call
+    pages = max(1, -(-total // page_size))
+    header = f"---- Seite {start // page_size + 1}/{pages} ({total} Exponate{label}) ----\n"
+    footer = "[n] nächste  [v] vorherige  [s] Sprung zu ID  [f] Filter  [a] alle\n"
+    sys.stdout.write(header + "\n".join(exhibit.display_info() for exhibit in rows) + footer)
+    sys.stdout.flush()
+
+def filter_selector(service: MuseumService):
+    kind = input("Filtern nach [1] Status oder [2] Epoche: ").strip()
+    options = Exhibit.STATUS_OPTIONS if kind == "1" else service.epoch_options() if kind == "2" else None
+    if options is None:
+        print("Ungültige Auswahl.")
+        return None, ""
+    for i, option in enumerate(options, 1):
+        print(f"[{i}] {option}")
+    try:
+        value = options[int(input("Nummer: ")) - 1]
+    except (ValueError, IndexError):
+        print("Ungültige Auswahl.")
+        return None, ""
+    if kind == "1":
+        return service.browse(status=value), f", {value}"
+    return service.browse(kh_epoche=value), f", {value}"
+
+def page_exhibits(service: MuseumService, prompt, page_size=PAGE_SIZE, view=None, label=""):
+    # Pages through the exhibits; returns the first input that is not a navigation command
+    if view is None:
+        view = service.browse()
+    elif not isinstance(view, ExhibitList):
+        # Search and query results; indexed once, a jump to an ID is then a lookup
+        view = ExhibitList(view)
+    start = 0
+    while True:
+        total = len(view)
+        render_page(itertools.islice(view, start, start + page_size), start, total, page_size, label)
+        choice = input(prompt).strip().lower()
+        if choice == "n":
+            if start + page_size < total:
+                start += page_size
+        elif choice == "v":
+            start = max(0, start - page_size)
+        elif choice == "s":
+            try:
+                position = view.position(int(input("ID: ")))
+            except ValueError:
+                position = None
+            if position is None:
+                print("ID nicht in der aktuellen Ansicht.")
+            else:
+                start = position // page_size * page_size
+        elif choice == "f":
+            filtered, filter_label = filter_selector(service)
+            if filtered is not None:
+                view, label, start = filtered, filter_label, 0
+        elif choice == "a":
+            view, label, start = service.browse(), "", 0
+        else:
+            return choice
+
+def print_load_progress(exhibit_count, gallery_count):
+    print(f"{exhibit_count} Exponate geladen ...", end="\r", flush=True)
+
+def run_inventory_app(path=INVENTORY_FILE, lazy_texts=False):
+    museum = Museum(path, streaming=True, progress=print_load_progress, lazy_texts=lazy_texts)
+    if museum.exhibits or museum.galleries:
+        print(f"{len(museum.exhibits)} Exponate und {len(museum.galleries)} Galerien geladen.")
+    else:
+        print("Nichts gefunden. Starte leer.")
+    service = MuseumService(museum)
 
     while True:
+        # Other sessions may have changed the inventory meanwhile
+        service.refresh()
         print("\n🧭>> CLI-based Museum Inventory App <<🧭")
         print("[1] Exponat hinzufügen")
         print("[2] Exponat suchen")
         print("[3] Alle Exponate anzeigen und/oder editieren")
         print("[4] Galerie erstellen oder bearbeiten")
+        print("[5] Statistiken")
+        print("[6] Erweiterte Suche (Jahr, Status, Epoche, Galerie)")
+        print("[7] Letzte Änderung rückgängig machen")
+        print("[8] Rückgängig gemachte Änderung wiederholen")
         print("[Q] Speichern & Programm beenden")
 
         choice = input("Auswahl: ").strip().lower()
 
         if choice == "1":
-            add_exhibits_flow(museum)
+            add_exhibits_flow(service)
         elif choice == "2":
-            search_while_loop(museum)
+            search_while_loop(service)
         elif choice == "3":
-            museum.list_exhibits()
+            list_exhibits(service)
         elif choice == "4":
-            gallery_flow(museum)
+            gallery_flow(service)
+        elif choice == "5":
+            show_statistics(service)
+        elif choice == "6":
+            query_flow(service)
+        elif choice == "7":
+            count = service.undo()
+            print(f"{count} Änderung(en) rückgängig gemacht." if count else "Nichts rückgängig zu machen.")
+        elif choice == "8":
+            count = service.redo()
+            print(f"{count} Änderung(en) wiederholt." if count else "Nichts zu wiederholen.")
         elif choice == "q":
-            # The "Envelope" structure
-            full_inventory = {
-                "exhibits": [ex.__dict__ for ex in museum.exhibits],
-                "galleries": [
-                    {
-                        "name": gal.name, 
-                        "start": gal.start, 
-                        "end": gal.end, 
-                        "location": gal.location, 
-                        "exhibit_ids": gal.exhibit_ids
-                    } for gal in museum.galleries
-                ]
-            }
-            with open("museum_exhibits.json", "w") as f:
-                js.dump(full_inventory, f, indent=4)
+            service.save()
             print("Daten gespeichert. Programm beendet!")
             break
         else:
@@ -222,7 +141,7 @@ def status_selector(current_status=None):
         except (ValueError, IndexError):
             print("Ungültige Eingabe. Nummer aus Liste wählen.")
 
-def add_exhibits_flow(museum: Museum):
+def add_exhibits_flow(service: MuseumService):
     while True:
         title = input("Titel: ")
         creator = input("Schöpfer/Künstler: ")
@@ -230,59 +149,135 @@ def add_exhibits_flow(museum: Museum):
         description = input("Beschreibung: ")
         status = status_selector()
 
-        new_exhibit = Exhibit(title, creator, year, description, status)
-        museum.add_exhibit(new_exhibit)
-        print(f"Hinzugefügt:\n{new_exhibit.display_info()}")
+        try:
+            new_exhibit = service.add_exhibit(title, creator, year, description, status)
+            print(f"Hinzugefügt:\n{new_exhibit.display_info()}")
+        except ServiceError as e:
+            print(e)
         exit = input("Weiteres hinzufügen [a] oder zurück zum Menü: ").strip().lower()
         if exit != "a":
             return
         else:
             pass
 
-def search_while_loop(museum: Museum):
+def search_while_loop(service: MuseumService):
     search_target = input("Suchbegriff eingeben: ").lower()
-    index = 0
-    found_exhibit = None 
-
-    while index < len(museum.exhibits) and found_exhibit is None:
-        current_exhibit = museum.exhibits[index]
-        
-        if (search_target in current_exhibit.title.lower() or
-            search_target in current_exhibit.creator.lower() or
-            search_target in str(current_exhibit.year).lower() or
-            search_target in current_exhibit.description.lower() or
-            search_target in current_exhibit.status.lower()):
-            found_exhibit = current_exhibit
-        else:
-            index += 1
+    results = service.search(search_target)
 
-    if found_exhibit:
-        print(f"\nSuche mit \"{search_target}\" ergab Treffer:\n{found_exhibit.display_info()}")
+    if results:
+        print(f"\nSuche mit \"{search_target}\" ergab {len(results)} Treffer:")
+        # Paged like the listing, a short query can match a large part of the catalogue
+        choice = page_exhibits(service, "Zum Starten der Bearbeitung [b] eingeben: ", view=results,
+                               label=f", Suche \"{search_target}\"")
+        if choice == "b":
+            update_exhibit_flow(service)
     else:
         print(f"\nDie Suche mit \"{search_target}\" ergab keine Treffer.")
+        # Fall back to the typo-tolerant search over titles and creators
+        similar = service.fuzzy_search(search_target)
+        if similar:
+            print("Meinten Sie vielleicht:")
+            for exhibit, score in similar:
+                print(f"  ID: {exhibit._id} --- {exhibit.title} ({exhibit.creator}) [{score:.0%}]")
+
+def optional_year(prompt):
+    while True:
+        value = input(prompt).strip()
+        if not value:
+            return None
+        try:
+            return int(value)
+        except ValueError:
+            print("Bitte eine Jahreszahl eingeben oder Enter für beliebig.")
+
+def optional_choice(title, options):
+    print(f"{title}:")
+    for i, option in enumerate(options, 1):
+        print(f"[{i}] {option}")
+    while True:
+        value = input("Nummer oder Enter für beliebig: ").strip()
+        if not value:
+            return None
+        try:
+            return options[int(value) - 1]
+        except (ValueError, IndexError):
+            print("Ungültige Eingabe. Nummer aus Liste wählen.")
 
-def update_exhibit_flow(museum: Museum):
+def query_flow(service: MuseumService):
+    # All criteria are optional and combined with "und"
+    year_from = optional_year("Jahr von: ")
+    year_to = optional_year("Jahr bis: ")
+    status = optional_choice("Status", Exhibit.STATUS_OPTIONS)
+    kh_epoche = optional_choice("Epoche", service.epoch_options())
+    creator = input("Schöpfer (exakt, Enter für beliebig): ").strip() or None
+    gallery, in_gallery = None, None
+    placement = optional_choice("Galerie", ["in einer beliebigen Galerie", "in keiner Galerie", "in bestimmter Galerie"])
+    if placement == "in einer beliebigen Galerie":
+        in_gallery = True
+    elif placement == "in keiner Galerie":
+        in_gallery = False
+    elif placement:
+        gallery = input("Name der Galerie: ").strip()
+    try:
+        results = service.query(year_from, year_to, status, kh_epoche, creator, gallery, in_gallery)
+    except ServiceError as e:
+        print(e)
+        return
+    if not results:
+        print("Keine Exponate gefunden.")
+        return
+    choice = page_exhibits(service, "Zum Starten der Bearbeitung [b] eingeben: ", view=results, label=", Abfrage")
+    if choice == "b":
+        update_exhibit_flow(service)
+
+def list_exhibits(service: MuseumService):
+    choice = page_exhibits(service, "Zum Starten der Bearbeitung [b] eingeben: ")
+    if choice == "b":
+        update_exhibit_flow(service)
+    else:
+        pass
+
+def update_exhibit_flow(service: MuseumService):
     try:
         target_id = int(input("Welche ID möchten Sie bearbeiten? "))
-        exhibit = museum.get_exhibit_by_id(target_id)
-        
-        if exhibit:
-            print(f"Bearbeite: {exhibit.title}")
-            # Re-use the input logic to get new values
-            new_title = input(f"Neuer Titel [{exhibit.title}]: ") or exhibit.title
-            new_creator = input(f"Neuer Schöpfer [{exhibit.creator}]: ") or exhibit.creator
-            new_year = input(f"Neues Jahr [{exhibit.year}]: ") or exhibit.year
-            new_description = input(f"Neue Beschreibung [{exhibit.description}]: ") or exhibit.description
-            new_status = status_selector(exhibit.status)
-            # Call the renovation method we discussed
-            exhibit.update(new_title, new_creator, new_year, new_description, new_status)
-            print("Änderungen gespeichert.")
-        else:
-            print("ID nicht gefunden.")
+        exhibit = service.get_exhibit(target_id)
+        print(f"Bearbeite: {exhibit.title}")
+        # Re-use the input logic to get new values
+        new_title = input(f"Neuer Titel [{exhibit.title}]: ") or exhibit.title
+        new_creator = input(f"Neuer Schöpfer [{exhibit.creator}]: ") or exhibit.creator
+        new_year = input(f"Neues Jahr [{exhibit.year}]: ") or exhibit.year
+        new_description = input(f"Neue Beschreibung [{exhibit.description}]: ") or exhibit.description
+        new_status = status_selector(exhibit.status)
+        service.update_exhibit(target_id, title=new_title, creator=new_creator, year=new_year,
+                               description=new_description, status=new_status)
+        print("Änderungen gespeichert.")
     except ValueError:
-        print("Bitte eine gültige Nummer eingeben.")  
-    
-def create_gallery(museum: Museum):
+        print("Bitte eine gültige Nummer eingeben.")
+    except ServiceError as e:
+        print(e)
+
+def print_counts(title, counts, limit=None):
+    print(f"\n{title}:")
+    for i, (value, count) in enumerate(counts.items()):
+        if limit is not None and i >= limit:
+            print(f"  ... und {len(counts) - limit} weitere")
+            break
+        print(f"  {str(value) or '(leer)':<30} {count:6d}")
+
+def show_statistics(service: MuseumService):
+    stats = service.statistics()
+    print(f"\n---- Statistiken ({stats['total']} Exponate, {stats['in_galleries']} davon in Galerien) ----")
+    print_counts("Status", stats["status"])
+    print_counts("Kunsthistorische Epoche", stats["kh_epoche"])
+    print_counts("Schöpfer", stats["creator"], TOP_CREATORS)
+    if stats["galleries"]:
+        print_counts("Galerien", stats["galleries"])
+    if "texts" in stats:
+        texts = stats["texts"]
+        print(f"\nBeschreibungs-Cache: {texts['hits']} Treffer, {texts['misses']} Fehlgriffe "
+              f"({100 * texts['hit_rate']:.1f} %), {texts['cached']}/{texts['cache_size']} im Speicher")
+
+def create_gallery(service: MuseumService):
     while True:
         name = input("Name der Galerie: ")
         if not name:
@@ -291,96 +286,140 @@ def create_gallery(museum: Museum):
         start = input("Startdatum: ")
         end = input("Enddatum: ")
         location = input("Ort: ")
-        
-        new_gallery = Gallery(name, start, end, location)
-        museum.galleries.append(new_gallery)
-        print("Galerie wurde erfolgreich angelegt")
+
+        try:
+            service.create_gallery(name, start, end, location)
+            print("Galerie wurde erfolgreich angelegt")
+        except ServiceError as e:
+            print(e)
         exit = input("Weitere hinzufügen [1] oder zurück zum Menü: ").strip().lower()
         if exit != "1":
             return
         else:
             pass
 
-def show_galleries(museum: Museum):
-    if not museum.galleries:
+def display_gallery(service: MuseumService, gallery: Gallery):
+    print(f"---- {gallery.name} ----")
+    if not gallery.exhibit_ids:
+        print("Zurzeit keine Objekte hier.")
+        return
+
+    for target_id, exhibit in service.gallery_exhibits(gallery.name):
+        if exhibit:
+            print(f"ID: {exhibit._id} --- {exhibit.title}")
+        else:
+            print("ID nicht gefunden.")
+
+def add_ex_to_gallery(service: MuseumService, gallery: Gallery, target_id):
+    try:
+        try:
+            exhibit = service.add_to_gallery(gallery.name, target_id)
+        except AlreadyExhibitedError as e:
+            confirm = input(f"{e} Trotzdem hinzufügen [j]?: ").strip().lower()
+            if confirm != "j":
+                return
+            exhibit = service.add_to_gallery(gallery.name, target_id, force=True)
+        print(f"{exhibit.title} mit der ID: {exhibit._id} wurde der Galerie '{gallery.name}' hinzugefügt.")
+    except ServiceError as e:
+        print(e)
+
+def remove_ex_from_gallery(service: MuseumService, gallery: Gallery, target_id):
+    if target_id not in gallery.exhibit_ids:
+        print("ID nicht in Galerie gefunden!")
+        return
+    confirm = input(f"Exponat {target_id} wirklich aus '{gallery.name}' entfernen? [j/n]: ").strip().lower()
+    if confirm != "j":
+        print("Vorgang abgebrochen.")
+        return
+    try:
+        exhibit = service.remove_from_gallery(gallery.name, target_id)
+    except ServiceError as e:
+        print(e)
+        return
+    if exhibit:
+        print(f"'{exhibit.title}' wurde aus der Galerie entfernt.")
+
+def show_galleries(service: MuseumService):
+    galleries = service.list_galleries()
+    if not galleries:
         print("Es existieren noch keine Galerien.")
         return
     print("\nVerfügbare Galerien:")
-    for i, gal in enumerate(museum.galleries, 1):
+    for i, gal in enumerate(galleries, 1):
         print(f"[{i}] {gal.name}")
     try:
         idx = int(input("Welche Galerie anzeigen? (Nummer): ")) - 1
-        if idx <= 0 or idx >= len(museum.galleries):
+        if idx <= 0 or idx >= len(galleries):
             print("Ungültige Auswahl.")
             return
-        selected_gallery = museum.galleries[idx]
-        selected_gallery.display_gallery(museum)
+        selected_gallery = galleries[idx]
+        display_gallery(service, selected_gallery)
     except (ValueError, IndexError):
         print("Ungültige Auswahl.")
         return
-        
-def add_to_gallery(museum: Museum):
-    if not museum.galleries:
+
+def add_to_gallery(service: MuseumService):
+    if not service.list_galleries():
         print("Es existieren noch keine Galerien.")
         new = input("Jetzt eine neue Galerie erstellen? [j]")
         if new != "j":
             return
         else:
-            create_gallery(museum)
-            
+            create_gallery(service)
+
+    galleries = service.list_galleries()
     print("\nVerfügbare Galerien:")
-    for i, gal in enumerate(museum.galleries, 1):
+    for i, gal in enumerate(galleries, 1):
         print(f"[{i}] {gal.name}")
     try:
         idx = int(input("Welche Galerie bearbeiten? (Nummer): ")) - 1
-        if idx <= 0 or idx >= len(museum.galleries):
+        if idx <= 0 or idx >= len(galleries):
             print("Ungültige Auswahl.")
             return
-        selected_gallery = museum.galleries[idx]
+        selected_gallery = galleries[idx]
         add_or_del = input(f"[1] Objekte der Galerie '{selected_gallery.name}' hinzufügen\n[2] Objekte aus '{selected_gallery.name}' entfernen\n").strip().lower()
         if add_or_del == "1":
-            if not museum.exhibits:
+            if not service.browse():
                 print("Es gibt noch keine Exponate im Museum. Bitte zuerst Exponate anlegen.")
                 return
             print(f"Liste der Exponate:\n")
-            for exhibit in museum.exhibits:
-                print(exhibit.display_info())
+            choice = page_exhibits(service, "Welche Exponat-ID möchten Sie hinzufügen? ")
             try:
-                target_id = int(input("Welche Exponat-ID möchten Sie hinzufügen? "))
+                target_id = int(choice)
             except ValueError:
                 print("Ungültige Eingabe.")
                 return
-            selected_gallery.add_ex_to_gallery(museum, target_id)
+            add_ex_to_gallery(service, selected_gallery, target_id)
         elif add_or_del == "2":
             print(f"In '{selected_gallery.name}' befinden sich:\n")
-            selected_gallery.display_gallery(museum)
+            display_gallery(service, selected_gallery)
             try:
                 target_id = int(input("Welche Exponat-ID möchten Sie entfernen? "))
             except ValueError:
                 print("Ungültige Eingabe.")
                 return
-            selected_gallery.remove_ex_from_gallery(museum, target_id)
+            remove_ex_from_gallery(service, selected_gallery, target_id)
         else:
             print("Ungültige Auswahl.")
             return
     except (ValueError, IndexError):
         print("Ungültige Auswahl.")
-        
-def gallery_flow(museum: Museum):
+
+def gallery_flow(service: MuseumService):
     while True:
         print("\n>> 🖼️ Galerie-Verwaltung 🖼️ <<")
         print("[1] Neue Galerie erstellen")
         print("[2] Galerie-Inhalt anzeigen")
         print("[3] Exponat einer Galerie hinzufügen oder entfernen")
         print("[H] Zurück zum Hauptmenü")
-        
+
         choice = input("Auswahl: ").strip().lower()
         if choice == "1":
-            create_gallery(museum)
+            create_gallery(service)
         elif choice == "2":
-            show_galleries(museum)
+            show_galleries(service)
         elif choice == "3":
-            add_to_gallery(museum)
+            add_to_gallery(service)
         elif choice == "h":
             break
         else:
@@ -388,4 +427,15 @@ def gallery_flow(museum: Museum):
             return
 
 if __name__ == "__main__":
-    run_inventory_app()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="CLI-based Museum Inventory App")
+    parser.add_argument("inventory", nargs="?", default=INVENTORY_FILE,
+                        help="JSON-Datei, Binär-Snapshot (.mbin) oder SQLite-Datenbank (.db, .sqlite, .sqlite3)")
+    parser.add_argument("--lazy-texts", action="store_true",
+                        help="Beschreibungen auf der Platte lassen und bei Bedarf über einen Cache lesen")
+    parser.add_argument("--instrument", action="store_true",
+                        help=f"Laufzeiten der Kernoperationen messen und beim Beenden ausgeben (auch {ENV_INSTRUMENT}=1)")
+    parser.add_argument("--profile", metavar="DATEI",
+                        help=f"Sitzung mit cProfile aufzeichnen und als pstats-Datei speichern (auch {ENV_PROFILE}=DATEI)")
+    args = parser.parse_args()
+    configure(args.instrument, args.profile, sys.modules[__name__], INSTRUMENTED_FLOWS)
+    run_inventory_app(args.inventory, args.lazy_texts)
@@ -0,0 +1,824 @@
+# 5.3: Museum Inventory App - data model (exhibits, galleries, museum)
+
+import bisect
+import contextlib
+import functools
+import json as js
+import sys
+import uuid
+import weakref
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from museum_binary import BINARY_SUFFIX, BinaryStorage
+from museum_facets import FacetCounts
+from museum_history import History
+from museum_query import QueryIndexes, run_query
+from museum_search import FuzzyIndex, SearchIndex
+from museum_sqlite import SQLITE_SUFFIXES, SqliteStorage
+from museum_storage import JsonStorage
+from museum_texts import TEXT_CACHE_SIZE, TextStore, read_text
+
+INVENTORY_FILE = "museum_exhibits.json"
+LOAD_CHUNK_SIZE = 10000
+UNKNOWN_EPOCH = "Unbekannt"
+EPOCH_CACHE_SIZE = 8192
+NUMPY_MIN_BATCH = 1000
+# Share of removed slots at which the exhibit listing is compacted
+LISTING_HOLE_SHARE = 0.25
+
+# --- CLASSES ---
+def intern_value(value):
+    # Repeated values (status, epoch, creator) share one string object
+    return sys.intern(value) if isinstance(value, str) else value
+
+class Exhibit:
+    # No per-instance __dict__: nine fixed fields per exhibit. The description slot holds the
+    # text, or with lazy texts its locator in the museum's side store (see museum_texts)
+    __slots__ = ("_uid", "_id", "title", "creator", "year", "_description", "status", "kh_epoche", "_version")
+    FIELDS = ("_uid", "_id", "title", "creator", "year", "description", "status", "kh_epoche", "_version")
+
+    EPOCHEN = [
+        (1945, 2026, "Zeitgenössische Kunst"),
+        (1890, 1945, "Moderne"),
+        (1848, 1890, "Realismus"),
+        (1750, 1848, "Klassizismus / Romantik"),
+        (1600, 1750, "Barock"),
+        (1400, 1600, "Renaissance"),
+        (500, 1400, "Mittelalter"),
+        (-3000, 500, "Antike")
+    ]
+    
+    STATUS_OPTIONS = ["Im Lager", "Ausgestellt", "Ungewiss"]
+    EDIT_FIELDS = ("title", "creator", "year", "description", "status")
+    TRACKED_FIELDS = EDIT_FIELDS + ("kh_epoche",)
+    
+    # Museums holding this exhibit get notified on update() to refresh their indexes
+    observers = weakref.WeakSet()
+
+    id_counter = 1
+    def __init__(self, title, creator, year, description, status, _uid=None, _id=None, _version=1, **kwargs):
+        self.assign_ids(_uid, _id)
+        # Bumped on every change; concurrent sessions use it to detect edits of the same exhibit
+        self._version = _version
+        self.set_fields(title, creator, year, description, status)
+
+    def set_fields(self, title, creator, year, description, status, kh_epoche=None):
+        self.title = title
+        self.creator = intern_value(creator)
+        self.year = year
+        self.description = description
+        self.status = intern_value(status)
+        if kh_epoche is None:
+            self.year_epoch_helper()
+        else:
+            self.kh_epoche = kh_epoche
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(**d)
+
+    @classmethod
+    def from_dicts(cls, records):
+        # Batch construction for the loader: years are classified for the whole batch at once
+        years = [parse_year(d.get("year")) for d in records]
+        exhibits = []
+        for d, year, kh_epoche in zip(records, years, classify_epochs(years)):
+            exhibit = cls.__new__(cls)
+            exhibit.assign_ids(d.get("_uid"), d.get("_id"))
+            exhibit._version = d.get("_version", 1)
+            exhibit.set_fields(d["title"], d["creator"], year, d["description"], d["status"], kh_epoche)
+            exhibits.append(exhibit)
+        return exhibits
+
+    def assign_ids(self, _uid=None, _id=None):
+        self._uid = _uid if _uid else str(uuid.uuid4())
+        if _id is not None:
+            self._id = _id
+            Exhibit.id_counter = max(Exhibit.id_counter, _id + 1)
+        else:
+            self._id = Exhibit.id_counter
+            Exhibit.id_counter += 1
+
+    @property
+    def description(self):
+        return read_text(self._description)
+
+    @description.setter
+    def description(self, value):
+        self._description = value
+
+    def to_dict(self, cached=False):
+        # Saves and journal records read a lazy description past the text cache, views pass cached=True
+        return {
+            "_uid": self._uid,
+            "_id": self._id,
+            "title": self.title,
+            "creator": self.creator,
+            "year": self.year,
+            "description": read_text(self._description, cached),
+            "status": self.status,
+            "kh_epoche": self.kh_epoche,
+            "_version": self._version,
+        }
+    
+    def determine_epoch(self):
+        if type(self.year) is int:
+            return epoch_for_year(self.year)
+        return UNKNOWN_EPOCH
+    
+    def year_epoch_helper(self):
+        self.year = parse_year(self.year)
+        self.kh_epoche = self.determine_epoch()
+    
+    def update(self, title, creator, year, description, status, **kwargs):
+        old = {field: getattr(self, field) for field in Exhibit.TRACKED_FIELDS}
+        stored_description = self._description
+        self.set_fields(title, creator, year, description, status)
+        if description == old["description"]:
+            # A lazy description keeps its locator instead of holding the text again
+            self._description = stored_description
+        if any(getattr(self, field) != value for field, value in old.items()):
+            self._version += 1
+        for museum in list(Exhibit.observers):
+            museum.exhibit_updated(self, old)
+
+    def display_info(self):
+        return f"ID: {self._id}\n Titel: {self.title}\n Schöpfer: {self.creator}\n Jahr/Epoche: {self.year}\n Beschreibung: {self.description}\n Status: {self.status}\n Kunsthistorische Epoche: {self.kh_epoche}\n"
+    
+# Sorted epoch boundaries for bisect, derived from Exhibit.EPOCHEN
+EPOCH_TABLE = sorted(Exhibit.EPOCHEN)
+EPOCH_STARTS = [start for start, _, _ in EPOCH_TABLE]
+EPOCH_ENDS = [end for _, end, _ in EPOCH_TABLE]
+EPOCH_NAMES = [name for _, _, name in EPOCH_TABLE]
+
+def parse_year(year):
+    if type(year) is int:
+        return year
+    try:
+        return int(year)
+    except (TypeError, ValueError):
+        return year
+
+@functools.lru_cache(maxsize=EPOCH_CACHE_SIZE)
+def epoch_for_year(year):
+    i = bisect.bisect_right(EPOCH_STARTS, year) - 1
+    if i >= 0 and year < EPOCH_ENDS[i]:
+        return EPOCH_NAMES[i]
+    return UNKNOWN_EPOCH
+
+def classify_epochs(years):
+    # Epoch names for a batch of parsed years; non-integer years are "Unbekannt"
+    if np is not None and len(years) >= NUMPY_MIN_BATCH:
+        try:
+            return classify_epochs_numpy(years)
+        except OverflowError:
+            pass
+    return [epoch_for_year(year) if type(year) is int else UNKNOWN_EPOCH for year in years]
+
+def classify_epochs_numpy(years):
+    is_int = np.fromiter((type(year) is int for year in years), dtype=bool, count=len(years))
+    values = np.fromiter((year if type(year) is int else 0 for year in years), dtype=np.int64, count=len(years))
+    idx = np.searchsorted(np.asarray(EPOCH_STARTS), values, side="right") - 1
+    safe_idx = np.clip(idx, 0, len(EPOCH_STARTS) - 1)
+    known = is_int & (idx >= 0) & (values < np.asarray(EPOCH_ENDS)[safe_idx])
+    names = np.asarray(EPOCH_NAMES + [UNKNOWN_EPOCH], dtype=object)
+    return names[np.where(known, safe_idx, len(EPOCH_NAMES))].tolist()
+
+def open_storage(path):
+    # The file suffix picks the format: SQLite, binary snapshot, else the JSON envelope
+    if path.endswith(SQLITE_SUFFIXES):
+        return SqliteStorage(path)
+    if path.endswith(BINARY_SUFFIX):
+        return BinaryStorage(path)
+    return JsonStorage(path)
+
+class ExhibitList:
+    # The museum's exhibits in insertion order. A removal leaves a hole instead of shifting
+    # the list, so it stays O(1) and the order is kept; the holes are squeezed out once they
+    # are a share of the list, or before the next access by position.
+    # Filtered listings (MuseumService.browse) are lists of this kind too.
+    def __init__(self, exhibits=()):
+        self.items = []
+        # _id -> index in items
+        self.positions = {}
+        self.holes = 0
+        for exhibit in exhibits:
+            self.append(exhibit)
+
+    def __len__(self):
+        return len(self.items) - self.holes
+
+    def __iter__(self):
+        return (exhibit for exhibit in self.items if exhibit is not None)
+
+    def __getitem__(self, index):
+        self.compact()
+        return self.items[index]
+
+    def position(self, exhibit_id):
+        # Index of the exhibit in the listing, None if it is not in it
+        self.compact()
+        return self.positions.get(exhibit_id)
+
+    def append(self, exhibit):
+        self.positions[exhibit._id] = len(self.items)
+        self.items.append(exhibit)
+
+    def remove(self, exhibit_id):
+        position = self.positions.pop(exhibit_id)
+        if position == len(self.items) - 1:
+            self.items.pop()
+        else:
+            self.items[position] = None
+            self.holes += 1
+            if self.holes > LISTING_HOLE_SHARE * len(self.items):
+                self.compact()
+
+    def renumber(self, old_id, new_id):
+        self.positions[new_id] = self.positions.pop(old_id)
+
+    def compact(self):
+        if not self.holes:
+            return
+        self.items = [exhibit for exhibit in self.items if exhibit is not None]
+        self.positions = {exhibit._id: i for i, exhibit in enumerate(self.items)}
+        self.holes = 0
+
+class Museum:
+    def __init__(self, path=INVENTORY_FILE, streaming=False, progress=None, lazy_texts=False,
+                 text_cache_size=TEXT_CACHE_SIZE):
+        self.path = path
+        self.storage = open_storage(path)
+        # With lazy_texts the descriptions are kept in a side store on disk and read through an LRU cache
+        self.texts = None
+        if lazy_texts:
+            self.texts = TextStore(path, text_cache_size)
+            weakref.finalize(self, self.texts.close)
+        self.replaying = False
+        self.streaming = streaming
+        self.history = History()
+        # Changes made inside batch(), journaled together when it ends
+        self.pending_batch = None
+        # Held while sync() changes the in-memory state; a front end serving readers from other
+        # threads sets a lock that shuts them out (see museum_http_server)
+        self.exclusive = contextlib.nullcontext()
+        self.clear()
+        # Subscribe before the replay, journaled updates have to reach the indexes too
+        Exhibit.observers.add(self)
+        with self.storage.lock:
+            try:
+                self.load(streaming, progress)
+            except js.JSONDecodeError:
+                self.clear()
+            self.replay(self.storage.read_journal())
+
+    def clear(self):
+        self.exhibits = ExhibitList()
+        # old -> new _id of our exhibits the replay renumbered, for the pending changes still naming the old one
+        self.renumbered = {}
+        self.galleries = []
+        # Primary-key maps; used_ids/used_uids are live views on them
+        self.exhibits_by_id = {}
+        self.exhibits_by_uid = {}
+        self.used_ids = self.exhibits_by_id.keys()
+        self.used_uids = self.exhibits_by_uid.keys()
+        # Lazy texts: the search index keeps its lowercased descriptions in a store of its own
+        self.search_index = SearchIndex(TextStore(self.path, 0) if self.texts is not None else None)
+        self.fuzzy_index = FuzzyIndex()
+        self.facets = FacetCounts()
+        self.query_index = QueryIndexes()
+        self.galleries_by_name = {}
+        # Reverse membership index: exhibit _id -> names of the galleries showing it
+        self.galleries_by_exhibit = {}
+
+    def load(self, streaming=False, progress=None, chunk_size=LOAD_CHUNK_SIZE):
+        # Builds the exhibits chunk-wise; with streaming=True the snapshot is also
+        # parsed item by item, so only one chunk of raw records is held in memory
+        chunk = []
+        for section, item in self.storage.load(streaming):
+            if section == "exhibits":
+                chunk.append(item)
+                if len(chunk) >= chunk_size:
+                    self.load_chunk(chunk, progress)
+                    chunk = []
+            elif section == "galleries":
+                self.register_gallery(item)
+        self.load_chunk(chunk, progress)
+
+    def load_chunk(self, records, progress=None):
+        for exhibit in Exhibit.from_dicts(records):
+            self.register_exhibit(exhibit)
+        if progress:
+            progress(len(self.exhibits), len(self.galleries))
+
+    def register_exhibit(self, exhibit):
+        if self.texts is not None and type(exhibit._description) is str:
+            exhibit._description = self.texts.put(exhibit._description)
+        self.exhibits_by_id[exhibit._id] = exhibit
+        self.exhibits_by_uid[exhibit._uid] = exhibit
+        self.exhibits.append(exhibit)
+        self.search_index.add(exhibit)
+        self.fuzzy_index.add(exhibit)
+        self.facets.add(exhibit)
+        self.query_index.add(exhibit)
+
+    def register_gallery(self, g_data):
+        gal = Gallery(g_data["name"], g_data["start"], g_data["end"], g_data["location"])
+        self.galleries.append(gal)
+        self.galleries_by_name.setdefault(gal.name, gal)
+        for target_id in g_data["exhibit_ids"]:
+            self.link_exhibit(gal, target_id)
+        return gal
+
+    def get_gallery(self, name):
+        return self.galleries_by_name.get(name)
+
+    def add_gallery(self, gallery):
+        self.galleries.append(gallery)
+        self.galleries_by_name.setdefault(gallery.name, gallery)
+        for target_id in gallery.exhibit_ids:
+            self.galleries_by_exhibit.setdefault(target_id, set()).add(gallery.name)
+        self.record({"op": "gallery", "gallery": gallery.to_dict()}, {"op": "gallery_delete", "gallery": gallery.name})
+
+    def remove_gallery(self, gallery):
+        g_data = gallery.to_dict()
+        self.drop_gallery(gallery)
+        self.record({"op": "gallery_delete", "gallery": gallery.name}, {"op": "gallery", "gallery": g_data})
+
+    def drop_gallery(self, gallery):
+        for target_id in list(gallery.exhibit_ids):
+            self.unlink_exhibit(gallery, target_id)
+        self.galleries.remove(gallery)
+        if self.galleries_by_name.get(gallery.name) is gallery:
+            del self.galleries_by_name[gallery.name]
+            for other in self.galleries:
+                if other.name == gallery.name:
+                    self.galleries_by_name[gallery.name] = other
+                    break
+
+    # --- Gallery membership ---
+    def link_exhibit(self, gallery, target_id):
+        if target_id in gallery.exhibit_ids:
+            return False
+        gallery.exhibit_ids[target_id] = None
+        self.galleries_by_exhibit.setdefault(target_id, set()).add(gallery.name)
+        return True
+
+    def unlink_exhibit(self, gallery, target_id):
+        if target_id not in gallery.exhibit_ids:
+            return False
+        del gallery.exhibit_ids[target_id]
+        names = self.galleries_by_exhibit.get(target_id)
+        if names is not None:
+            names.discard(gallery.name)
+            if not names:
+                del self.galleries_by_exhibit[target_id]
+        return True
+
+    def gallery_add(self, gallery, target_id):
+        if self.link_exhibit(gallery, target_id):
+            self.record({"op": "gallery_add", "gallery": gallery.name, "id": target_id},
+                        self.target({"op": "gallery_remove", "gallery": gallery.name, "id": target_id}))
+            return True
+        return False
+
+    def gallery_remove(self, gallery, target_id):
+        if self.unlink_exhibit(gallery, target_id):
+            self.record({"op": "gallery_remove", "gallery": gallery.name, "id": target_id},
+                        self.target({"op": "gallery_add", "gallery": gallery.name, "id": target_id}))
+            return True
+        return False
+
+    def galleries_of(self, target_id):
+        return sorted(self.galleries_by_exhibit.get(target_id, ()))
+
+    def is_in_gallery(self, target_id):
+        return target_id in self.galleries_by_exhibit
+
+    # --- Journal ---
+    def record(self, change, inverse=None):
+        # inverse is the change that takes this one back, kept for undo
+        if self.replaying:
+            return
+        if inverse is not None:
+            self.history.record([inverse])
+        if self.pending_batch is not None:
+            self.pending_batch.append(change)
+            return
+        self.write([change])
+        if self.storage.needs_compaction():
+            self.save()
+
+    def record_many(self, changes, inverses=()):
+        # Bulk writes are not compacted in between, the caller saves once at the end
+        if self.replaying:
+            return
+        self.history.record(inverses)
+        if self.pending_batch is not None:
+            self.pending_batch.extend(changes)
+            return
+        self.write(changes)
+
+    def write(self, changes):
+        with self.storage.lock:
+            changes = self.sync(changes)
+            if changes:
+                self.storage.append_many(changes)
+
+    @contextlib.contextmanager
+    def batch(self):
+        # Changes made inside are journaled with one write at the end and form one undo step
+        if self.pending_batch is not None:
+            yield
+            return
+        changes = []
+        try:
+            with self.collect() as changes:
+                yield
+        finally:
+            self.commit(changes)
+
+    @contextlib.contextmanager
+    def collect(self):
+        # Yields the list of the changes made inside: applied in memory and one undo step,
+        # but not written before commit(changes)
+        changes = self.pending_batch = []
+        try:
+            with self.history.grouped():
+                yield changes
+        finally:
+            self.pending_batch = None
+
+    def commit(self, changes):
+        if changes:
+            self.write(changes)
+            if self.storage.needs_compaction():
+                self.save()
+
+    def refresh(self):
+        # Picks up the changes of other sessions without loading the snapshot again
+        with self.storage.lock:
+            self.sync()
+
+    def sync(self, pending=()):
+        # Applies what other sessions appended to the journal since our last read and
+        # rebases our pending (already applied, not yet written) changes on top of it.
+        # Call with the storage lock held; returns the pending changes still to write.
+        changes = self.storage.read_new()
+        if changes is not None and not changes:
+            return list(pending)
+        with self.exclusive:
+            if changes is None:
+                return self.reload(pending)
+            bases = {}
+            for change in pending:
+                if change["op"] == "update" and change["id"] not in bases:
+                    # The base is the version before our first pending change of the exhibit
+                    exhibit = self.get_exhibit_by_id(change["id"])
+                    if exhibit is not None:
+                        exhibit._version = bases[change["id"]] = change["version"] - 1
+            self.renumbered = {}
+            self.replay(changes)
+            return self.rebase(pending, bases)
+
+    def reload(self, pending=()):
+        # Fell behind more than one save of another session: start from the snapshot again.
+        # Lazy texts go to a fresh store, the old one only holds texts of the dropped exhibits.
+        old_texts = self.texts
+        if old_texts is not None:
+            self.texts = TextStore(self.path, old_texts.cache_size)
+            weakref.finalize(self, self.texts.close)
+        self.clear()
+        self.load(self.streaming)
+        self.replay(self.storage.read_journal())
+        pending = self.rebase(pending, {})
+        if old_texts is not None:
+            old_texts.close()
+        return pending
+
+    def rebase(self, pending, bases):
+        # Optimistic concurrency: an update whose exhibit changed meanwhile (version moved past
+        # its base) is merged field by field, our fields win, the others' fields are kept.
+        # Changes naming an exhibit that got a new _id meanwhile are rewritten to it first.
+        renumbered, self.renumbered = self.renumbered, {}
+        bases = {renumbered.get(target_id, target_id): base for target_id, base in bases.items()}
+        kept = []
+        self.replaying = True
+        try:
+            for change in pending:
+                op = change["op"]
+                if change.get("id") in renumbered:
+                    change["id"] = renumbered[change["id"]]
+                if op == "add":
+                    d = change["exhibit"]
+                    exhibit = self.get_exhibit_by_uid(d["_uid"])
+                    if exhibit is None:
+                        exhibit = Exhibit.from_dict(dict(d, _id=None) if d["_id"] in self.used_ids else d)
+                        self.register_exhibit(exhibit)
+                    if exhibit._id != d["_id"]:
+                        renumbered[d["_id"]] = exhibit._id
+                    change["exhibit"] = exhibit.to_dict()
+                elif op == "update":
+                    exhibit = self.get_exhibit_by_id(change["id"])
+                    if exhibit is None:
+                        # Removed by another session
+                        continue
+                    if exhibit._version == bases.get(change["id"]):
+                        exhibit._version = change["version"]
+                    else:
+                        version = exhibit._version
+                        fields = {field: getattr(exhibit, field) for field in Exhibit.EDIT_FIELDS}
+                        fields.update(change["fields"])
+                        exhibit.update(**fields)
+                        exhibit._version = change["version"] = version + 1
+                else:
+                    if op == "gallery_add" and self.get_exhibit_by_id(change["id"]) is None:
+                        continue
+                    if op == "gallery":
+                        g_data = change["gallery"]
+                        g_data["exhibit_ids"] = [renumbered.get(i, i) for i in g_data["exhibit_ids"]]
+                    self.apply(change)
+                kept.append(change)
+        finally:
+            self.replaying = False
+        return kept
+
+    def replay(self, changes):
+        # Every change is applied idempotently, a record may be seen twice after a crash
+        self.replaying = True
+        try:
+            for change in changes:
+                self.apply(change)
+        finally:
+            self.replaying = False
+
+    def apply(self, change):
+        op = change["op"]
+        if op == "add":
+            d = change["exhibit"]
+            if d["_uid"] not in self.used_uids:
+                local = self.get_exhibit_by_id(d["_id"])
+                if local is not None:
+                    # Another session handed out the same id first, ours moves on
+                    Exhibit.id_counter = max(Exhibit.id_counter, d["_id"] + 1)
+                    moved = self.renumber_exhibit(local)
+                    # An exhibit moved twice maps straight to its latest id
+                    for old_id, new_id in self.renumbered.items():
+                        self.renumbered[old_id] = moved.get(new_id, new_id)
+                    self.renumbered.update(moved)
+                self.register_exhibit(Exhibit.from_dict(d))
+        elif op == "update":
+            exhibit = self.get_exhibit_by_id(change["id"])
+            # Records without a version come from journals written before versioning
+            if exhibit and change.get("version", exhibit._version + 1) > exhibit._version:
+                fields = {field: getattr(exhibit, field) for field in Exhibit.EDIT_FIELDS}
+                fields.update(change["fields"])
+                exhibit.update(**fields)
+                exhibit._version = change.get("version", exhibit._version)
+        elif op == "remove":
+            self.remove_exhibit(change["id"])
+        elif op == "gallery":
+            if self.get_gallery(change["gallery"]["name"]) is None:
+                self.register_gallery(change["gallery"])
+        elif op == "gallery_delete":
+            gal = self.get_gallery(change["gallery"])
+            if gal:
+                self.drop_gallery(gal)
+        elif op == "gallery_add":
+            gal = self.get_gallery(change["gallery"])
+            if gal:
+                self.link_exhibit(gal, change["id"])
+        elif op == "gallery_remove":
+            gal = self.get_gallery(change["gallery"])
+            if gal:
+                self.unlink_exhibit(gal, change["id"])
+
+    # --- Undo / redo ---
+    def target(self, change):
+        # Adds the _uid of the exhibit a change refers to; the _id may move on an id collision
+        exhibit = self.get_exhibit_by_id(change["id"])
+        if exhibit is not None:
+            change["uid"] = exhibit._uid
+        return change
+
+    def target_id(self, change):
+        exhibit = self.get_exhibit_by_uid(change["uid"]) if "uid" in change else None
+        return exhibit._id if exhibit is not None else change["id"]
+
+    def execute(self, change):
+        # Runs a change from the history as a regular edit: indexed, journaled and itself undoable.
+        # Targets that another session removed meanwhile are skipped.
+        op = change["op"]
+        if op == "add":
+            d = change["exhibit"]
+            if d["_uid"] in self.used_uids:
+                return
+            exhibit = Exhibit.from_dict(dict(d, _id=None) if d["_id"] in self.used_ids else d)
+            self.add_exhibit(exhibit)
+            for name in change.get("galleries", ()):
+                gal = self.get_gallery(name)
+                if gal:
+                    self.gallery_add(gal, exhibit._id)
+        elif op == "update":
+            exhibit = self.get_exhibit_by_id(self.target_id(change))
+            if exhibit is not None:
+                fields = {field: getattr(exhibit, field) for field in Exhibit.EDIT_FIELDS}
+                fields.update(change["fields"])
+                exhibit.update(**fields)
+        elif op == "remove":
+            if self.get_exhibit_by_id(self.target_id(change)) is not None:
+                self.remove_exhibit(self.target_id(change))
+        elif op == "gallery":
+            if self.get_gallery(change["gallery"]["name"]) is None:
+                g_data = change["gallery"]
+                gallery = Gallery(g_data["name"], g_data["start"], g_data["end"], g_data["location"])
+                for target_id in g_data["exhibit_ids"]:
+                    gallery.exhibit_ids[target_id] = None
+                self.add_gallery(gallery)
+        elif op == "gallery_delete":
+            gal = self.get_gallery(change["gallery"])
+            if gal:
+                self.remove_gallery(gal)
+        elif op in ("gallery_add", "gallery_remove"):
+            gal = self.get_gallery(change["gallery"])
+            if gal:
+                (self.gallery_add if op == "gallery_add" else self.gallery_remove)(gal, self.target_id(change))
+
+    def undo(self):
+        # Takes back the last action; returns the number of changes undone, 0 if there was none
+        return self.step(self.history.undo_steps, self.history.redo_steps)
+
+    def redo(self):
+        return self.step(self.history.redo_steps, self.history.undo_steps)
+
+    def step(self, source, target):
+        if not source:
+            return 0
+        inverses = source.pop()
+        with self.history.collect() as opposite:
+            try:
+                with self.batch():
+                    for change in reversed(inverses):
+                        self.execute(change)
+            finally:
+                if opposite:
+                    self.history.push(target, opposite)
+        return len(inverses)
+
+    def to_inventory(self):
+        # The "Envelope" structure
+        return {
+            "exhibits": [ex.to_dict() for ex in self.exhibits],
+            "galleries": [gal.to_dict() for gal in self.galleries]
+        }
+
+    def save(self):
+        with self.storage.lock:
+            self.sync()
+            self.storage.save(self)
+
+    def add_exhibit(self, exhibit):
+        if exhibit._id in self.used_ids:
+            raise ValueError(f"ID {exhibit._id} bereits vergeben.")
+        if exhibit._uid in self.used_uids:
+            raise ValueError("UID bereits vergeben.")
+        self.register_exhibit(exhibit)
+        self.record({"op": "add", "exhibit": exhibit.to_dict()}, {"op": "remove", "id": exhibit._id, "uid": exhibit._uid})
+
+    def add_exhibits(self, exhibits):
+        # Adds a batch with one journal write; the batch is checked as a whole before anything is added
+        ids = set()
+        uids = set()
+        for exhibit in exhibits:
+            if exhibit._id in self.used_ids or exhibit._id in ids:
+                raise ValueError(f"ID {exhibit._id} bereits vergeben.")
+            if exhibit._uid in self.used_uids or exhibit._uid in uids:
+                raise ValueError("UID bereits vergeben.")
+            ids.add(exhibit._id)
+            uids.add(exhibit._uid)
+        for exhibit in exhibits:
+            self.register_exhibit(exhibit)
+        self.record_many([{"op": "add", "exhibit": exhibit.to_dict()} for exhibit in exhibits],
+                         [{"op": "remove", "id": exhibit._id, "uid": exhibit._uid} for exhibit in exhibits])
+
+    def remove_exhibit(self, target_id):
+        exhibit = self.exhibits_by_id.pop(target_id, None)
+        if exhibit is None:
+            return None
+        del self.exhibits_by_uid[exhibit._uid]
+        self.exhibits.remove(target_id)
+        self.search_index.remove(target_id)
+        self.fuzzy_index.remove(target_id)
+        self.facets.remove(exhibit)
+        self.query_index.remove(exhibit)
+        names = self.galleries_of(target_id)
+        for name in names:
+            self.unlink_exhibit(self.galleries_by_name[name], target_id)
+        self.record({"op": "remove", "id": target_id}, {"op": "add", "exhibit": exhibit.to_dict(), "galleries": names})
+        return exhibit
+
+    def renumber_exhibit(self, exhibit):
+        # Gives the exhibit the next free _id; returns {old_id: new_id}
+        old_id = exhibit._id
+        names = self.galleries_of(old_id)
+        for name in names:
+            self.unlink_exhibit(self.galleries_by_name[name], old_id)
+        del self.exhibits_by_id[old_id]
+        self.search_index.remove(old_id)
+        self.fuzzy_index.remove(old_id)
+        self.query_index.remove(exhibit)
+        exhibit._id = Exhibit.id_counter
+        Exhibit.id_counter += 1
+        self.exhibits_by_id[exhibit._id] = exhibit
+        self.exhibits.renumber(old_id, exhibit._id)
+        self.search_index.add(exhibit)
+        self.fuzzy_index.add(exhibit)
+        self.query_index.add(exhibit)
+        for name in names:
+            self.link_exhibit(self.galleries_by_name[name], exhibit._id)
+        return {old_id: exhibit._id}
+
+    def exhibit_updated(self, exhibit, old):
+        if self.exhibits_by_id.get(exhibit._id) is exhibit:
+            # Only the changed fields are journaled, so concurrent edits of other fields merge
+            fields = {f: getattr(exhibit, f) for f, value in old.items() if getattr(exhibit, f) != value}
+            if not fields:
+                return
+            if "description" in fields and self.texts is not None:
+                exhibit._description = self.texts.put(exhibit._description)
+            self.search_index.update(exhibit)
+            if "title" in fields or "creator" in fields:
+                self.fuzzy_index.update(exhibit)
+            self.facets.update(exhibit, old)
+            self.query_index.update(exhibit, old)
+            self.record({"op": "update", "id": exhibit._id, "fields": fields, "version": exhibit._version},
+                        {"op": "update", "id": exhibit._id, "uid": exhibit._uid,
+                         "fields": {f: old[f] for f in fields if f in Exhibit.EDIT_FIELDS}})
+
+    def search(self, query, limit=None):
+        return self.get_exhibits_by_ids(self.search_index.search(query, limit))
+
+    def fuzzy_search(self, query, limit=10):
+        # [(exhibit, similarity)] for titles and creators, tolerant of typos and umlauts
+        return [(self.exhibits_by_id[exhibit_id], score) for exhibit_id, score in self.fuzzy_index.search(query, limit)]
+
+    def query(self, *predicates, limit=None):
+        # Exhibits matching all predicates (see museum_query), ordered by _id
+        ids = run_query(self, predicates)
+        return self.get_exhibits_by_ids(ids if limit is None else ids[:limit])
+
+    def statistics(self):
+        # Counts per facet from the maintained counters; galleries cost one len() each
+        stats = {
+            "total": self.facets.total,
+            "status": self.facets.facet("status", Exhibit.STATUS_OPTIONS),
+            "kh_epoche": self.facets.facet("kh_epoche", EPOCH_NAMES + [UNKNOWN_EPOCH]),
+            "creator": self.facets.facet("creator"),
+            "galleries": {gal.name: len(gal.exhibit_ids) for gal in self.galleries},
+            "in_galleries": len(self.galleries_by_exhibit),
+        }
+        if self.texts is not None:
+            # Hits and misses of the description cache
+            stats["texts"] = self.texts.statistics()
+        return stats
+
+    def count_exhibits(self, status=None, kh_epoche=None):
+        if status is not None and kh_epoche is not None:
+            return self.facets.pairs[kh_epoche, status]
+        if status is not None:
+            return self.facets.count("status", status)
+        if kh_epoche is not None:
+            return self.facets.count("kh_epoche", kh_epoche)
+        return self.facets.total
+
+    def get_exhibit_by_id(self, target_id):
+        return self.exhibits_by_id.get(target_id)
+
+    def get_exhibit_by_uid(self, target_uid):
+        return self.exhibits_by_uid.get(target_uid)
+
+    def get_exhibits_by_ids(self, target_ids):
+        # Resolves a whole batch in one pass, None for unknown ids
+        return list(map(self.exhibits_by_id.get, target_ids))
+
+class Gallery:
+    def __init__(self, name, start, end, location) -> None:
+        self.name = name
+        self.start = start
+        self.end = end
+        self.location = location
+        # Ordered set: dict keys keep insertion order with O(1) membership and removal
+        self.exhibit_ids = {}
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "start": self.start,
+            "end": self.end,
+            "location": self.location,
+            "exhibit_ids": list(self.exhibit_ids)
+        }
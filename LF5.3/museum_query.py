@@ -0,0 +1,180 @@
+# Multi-criteria queries for the Museum Inventory App: indexes, predicates and the planner
+
+import bisect
+
+INDEXED_FIELDS = ("status", "kh_epoche", "creator")
+# Pending year changes are merged into the sorted arrays once they exceed this share
+YEAR_MERGE_SHARE = 0.01
+YEAR_MERGE_MIN = 1000
+
+
+class YearIndex:
+    # Exhibits with an integer year, sorted by year in two parallel lists for bisect.
+    # Changes collect in a small delta (added / removed) and are merged in batches,
+    # so loading a million exhibits costs one sort instead of a million inserts.
+    def __init__(self):
+        self.years = []
+        self.ids = []
+        self.added = {}
+        self.removed = set()
+
+    def add(self, exhibit):
+        if type(exhibit.year) is int:
+            self.added[exhibit._id] = exhibit.year
+
+    def remove(self, exhibit_id):
+        self.added.pop(exhibit_id, None)
+        # Hides a stale entry in the sorted arrays until the next merge
+        self.removed.add(exhibit_id)
+
+    def merge(self):
+        pairs = [(year, exhibit_id) for year, exhibit_id in zip(self.years, self.ids)
+                 if exhibit_id not in self.removed]
+        pairs.extend((year, exhibit_id) for exhibit_id, year in self.added.items())
+        pairs.sort()
+        self.years = [year for year, _ in pairs]
+        self.ids = [exhibit_id for _, exhibit_id in pairs]
+        self.added = {}
+        self.removed = set()
+
+    def bounds(self, start, end):
+        if len(self.added) + len(self.removed) > max(YEAR_MERGE_MIN, len(self.years) * YEAR_MERGE_SHARE):
+            self.merge()
+        lo = 0 if start is None else bisect.bisect_left(self.years, start)
+        hi = len(self.years) if end is None else bisect.bisect_right(self.years, end)
+        return lo, hi
+
+    def estimate(self, start, end):
+        lo, hi = self.bounds(start, end)
+        return hi - lo + len(self.added)
+
+    def range(self, start, end):
+        lo, hi = self.bounds(start, end)
+        removed = self.removed
+        result = {exhibit_id for exhibit_id in self.ids[lo:hi] if exhibit_id not in removed}
+        result.update(exhibit_id for exhibit_id, year in self.added.items()
+                      if (start is None or year >= start) and (end is None or year <= end))
+        return result
+
+
+class QueryIndexes:
+    # value -> ids per indexed field, plus the year index
+    def __init__(self):
+        self.fields = {field: {} for field in INDEXED_FIELDS}
+        self.year = YearIndex()
+
+    def add(self, exhibit):
+        for field, index in self.fields.items():
+            value = getattr(exhibit, field)
+            ids = index.get(value)
+            if ids is None:
+                index[value] = {exhibit._id}
+            else:
+                ids.add(exhibit._id)
+        self.year.add(exhibit)
+
+    def remove(self, exhibit, values=None):
+        # values overrides the exhibit's current field values, e.g. the ones before an update
+        for field, index in self.fields.items():
+            value = getattr(exhibit, field) if values is None else values[field]
+            ids = index.get(value)
+            if ids is not None:
+                ids.discard(exhibit._id)
+                if not ids:
+                    del index[value]
+        self.year.remove(exhibit._id)
+
+    def update(self, exhibit, old):
+        self.remove(exhibit, old)
+        self.add(exhibit)
+
+
+# --- Predicates ---
+# Each predicate can estimate its result size from the indexes, produce its ids,
+# and test a single exhibit; the planner starts with the smallest estimate.
+class YearRange:
+    def __init__(self, start=None, end=None):
+        self.start = start
+        self.end = end
+
+    def estimate(self, museum):
+        return museum.query_index.year.estimate(self.start, self.end)
+
+    def ids(self, museum):
+        return museum.query_index.year.range(self.start, self.end)
+
+    def matches(self, exhibit, museum):
+        return type(exhibit.year) is int and (self.start is None or exhibit.year >= self.start) \
+            and (self.end is None or exhibit.year <= self.end)
+
+
+class FieldIs:
+    # Field equals one of the given values
+    def __init__(self, field, *values):
+        self.field = field
+        self.values = set(values)
+
+    def estimate(self, museum):
+        index = museum.query_index.fields[self.field]
+        return sum(len(index.get(value, ())) for value in self.values)
+
+    def ids(self, museum):
+        index = museum.query_index.fields[self.field]
+        return set().union(*(index.get(value, ()) for value in self.values))
+
+    def matches(self, exhibit, museum):
+        return getattr(exhibit, self.field) in self.values
+
+
+class InGallery:
+    # Shown in the named gallery, or in any gallery if name is None
+    def __init__(self, name=None):
+        self.name = name
+
+    def members(self, museum):
+        if self.name is None:
+            return museum.galleries_by_exhibit
+        gallery = museum.get_gallery(self.name)
+        return gallery.exhibit_ids if gallery else {}
+
+    def estimate(self, museum):
+        return len(self.members(museum))
+
+    def ids(self, museum):
+        return {exhibit_id for exhibit_id in self.members(museum) if exhibit_id in museum.exhibits_by_id}
+
+    def matches(self, exhibit, museum):
+        return exhibit._id in self.members(museum)
+
+
+class Not:
+    def __init__(self, predicate):
+        self.predicate = predicate
+
+    def estimate(self, museum):
+        return len(museum.exhibits_by_id) - self.predicate.estimate(museum)
+
+    def ids(self, museum):
+        return set(museum.exhibits_by_id).difference(self.predicate.ids(museum))
+
+    def matches(self, exhibit, museum):
+        return not self.predicate.matches(exhibit, museum)
+
+
+def run_query(museum, predicates):
+    # Sorted ids of the exhibits matching all predicates. The most selective predicate
+    # yields the candidates, the others either intersect (when their own result is
+    # smaller) or test the remaining candidates one by one.
+    if not predicates:
+        return sorted(museum.exhibits_by_id)
+    plan = sorted(((p.estimate(museum), i, p) for i, p in enumerate(predicates)), key=lambda item: item[:2])
+    candidates = plan[0][2].ids(museum)
+    for estimate, _, predicate in plan[1:]:
+        if not candidates:
+            break
+        if estimate < len(candidates):
+            candidates &= predicate.ids(museum)
+        else:
+            exhibits = museum.exhibits_by_id
+            candidates = {exhibit_id for exhibit_id in candidates if predicate.matches(exhibits[exhibit_id], museum)}
+    return sorted(candidates)
@@ -0,0 +1,258 @@
+# Search index for the Museum Inventory App
+
+import heapq
+import itertools
+import unicodedata
+import weakref
+from array import array
+
+from museum_texts import TEXT_SLOTS, Locator, read_text
+
+SEARCH_FIELDS = ("title", "creator", "year", "description", "status")
+DESCRIPTION = SEARCH_FIELDS.index("description")
+FIELD_WEIGHTS = {"title": 5, "creator": 3, "year": 2, "description": 1, "status": 1}
+GRAM_SIZE = 3
+FUZZY_FIELDS = ("title", "creator")
+# Grams in more than this share of the exhibits only count for candidates found by rarer grams
+COMMON_GRAM_SHARE = 0.1
+# Upper bound for exhibits counted per query, keeps latency flat on large catalogues
+FUZZY_SCAN = 5000
+# Candidates that get an exact similarity score, the rest is cut by shared gram count
+FUZZY_CANDIDATES = 300
+MIN_SIMILARITY = 0.3
+# Description candidates from text_postings few enough to confirm by reading them: intersecting
+# further costs a pass over each (unsorted) id array
+TEXT_CANDIDATES = 64
+
+
+def ngrams(text, n=GRAM_SIZE):
+    # Values shorter than n are indexed as a whole so short titles stay findable
+    if len(text) < n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def fold(text):
+    # Case- and accent-insensitive key: "Bürgermeister" -> "burgermeister"
+    text = str(text).casefold()
+    if text.isascii():
+        return text
+    return "".join(ch for ch in unicodedata.normalize("NFKD", text) if not unicodedata.combining(ch))
+
+
+def padded_grams(text, n=GRAM_SIZE):
+    # Padding makes word starts and ends grams of their own, short values still get grams
+    return ngrams(f"  {text} ", n) if text else set()
+
+
+class SearchIndex:
+    # Inverted n-gram index: gram -> ids of exhibits containing it in any search field.
+    # The lowercased field values are kept per exhibit, so a query never has to
+    # lowercase the whole collection again.
+    # With a text store (lazy texts) the lowercased copy of a long description goes to the store
+    # and the key is its locator. Its grams go to text_postings, compact append-only id arrays;
+    # ids of removed or changed descriptions stay in them, score() drops those candidates.
+    def __init__(self, texts=None):
+        self.postings = {}
+        self.text_postings = {}
+        self.keys = {}
+        self.texts = texts
+        if texts is not None:
+            weakref.finalize(self, texts.close)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, exhibit, indexed=None):
+        # The raw slots, a lazy description is read past the museum's text cache.
+        # indexed: the lowercased description whose grams are in text_postings for this id already
+        keys = tuple(str(read_text(getattr(exhibit, TEXT_SLOTS.get(field, field)), cached=False)).lower()
+                     for field in SEARCH_FIELDS)
+        if self.texts is not None:
+            description = keys[DESCRIPTION]
+            locator = self.texts.put(description)
+            if type(locator) is Locator:
+                keys = keys[:DESCRIPTION] + (locator,) + keys[DESCRIPTION + 1:]
+                if description != indexed:
+                    for gram in ngrams(description):
+                        ids = self.text_postings.get(gram)
+                        if ids is None:
+                            ids = self.text_postings[gram] = array("i")
+                        ids.append(exhibit._id)
+        self.keys[exhibit._id] = keys
+        for key in keys:
+            if type(key) is Locator:
+                continue
+            for gram in ngrams(key):
+                ids = self.postings.get(gram)
+                if ids is None:
+                    self.postings[gram] = {exhibit._id}
+                else:
+                    ids.add(exhibit._id)
+
+    def remove(self, exhibit_id):
+        keys = self.keys.pop(exhibit_id, None)
+        if keys is None:
+            return
+        for key in keys:
+            if type(key) is Locator:
+                continue
+            for gram in ngrams(key):
+                ids = self.postings.get(gram)
+                if ids is None:
+                    continue
+                ids.discard(exhibit_id)
+                if not ids:
+                    del self.postings[gram]
+
+    def update(self, exhibit):
+        # An unchanged lazy description is not indexed a second time
+        key = self.keys.get(exhibit._id, ())[DESCRIPTION:DESCRIPTION + 1]
+        indexed = read_text(key[0], cached=False) if key and type(key[0]) is Locator else None
+        self.remove(exhibit._id)
+        self.add(exhibit, indexed)
+
+    def candidates(self, query):
+        result = postings_candidates(self.postings, query)
+        if self.text_postings:
+            result |= postings_candidates(self.text_postings, query, TEXT_CANDIDATES)
+        return result
+
+    def score(self, exhibit_id, query):
+        score = 0
+        for field, key in zip(SEARCH_FIELDS, self.keys[exhibit_id]):
+            key = read_text(key, cached=False)
+            pos = key.find(query)
+            if pos < 0:
+                continue
+            weight = FIELD_WEIGHTS[field]
+            if key == query:
+                weight *= 4
+            elif pos == 0:
+                weight *= 2
+            score += weight
+        return score
+
+    def search(self, query, limit=None):
+        query = query.lower()
+        if not query:
+            return []
+        candidates = self.candidates(query)
+        ranked = []
+        for exhibit_id in candidates:
+            if exhibit_id not in self.keys:
+                # Left in text_postings by a removed exhibit
+                continue
+            # n-gram hits are only candidates, the substring check confirms them
+            score = self.score(exhibit_id, query)
+            if score:
+                ranked.append((-score, exhibit_id))
+        if limit is not None:
+            # Top-k selection, the server asks for small pages of large result sets
+            ranked = heapq.nsmallest(limit, ranked)
+        else:
+            ranked.sort()
+        return [exhibit_id for _, exhibit_id in ranked]
+
+
+def postings_candidates(postings, query, enough=0):
+    if len(query) >= GRAM_SIZE:
+        posting_lists = []
+        for gram in ngrams(query):
+            ids = postings.get(gram)
+            if not ids:
+                return set()
+            posting_lists.append(ids)
+        # Intersect starting with the rarest gram to keep the working set small
+        posting_lists.sort(key=len)
+        result = set(posting_lists[0])
+        for ids in posting_lists[1:]:
+            if len(result) <= enough:
+                break
+            result.intersection_update(ids)
+            if not result:
+                break
+        return result
+    # Queries shorter than a gram: every gram containing the query is a hit,
+    # so this is bounded by the gram vocabulary, not by the catalogue size
+    result = set()
+    for gram, ids in postings.items():
+        if query in gram:
+            result.update(ids)
+    return result
+
+
+class FuzzyIndex:
+    # Typo-tolerant lookup over titles and creators: folded trigram postings give
+    # candidates, only the best of them are scored by gram similarity
+    def __init__(self):
+        self.postings = {}
+        self.keys = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, exhibit):
+        keys = tuple(fold(getattr(exhibit, field)) for field in FUZZY_FIELDS)
+        self.keys[exhibit._id] = keys
+        for gram in set().union(*map(padded_grams, keys)):
+            ids = self.postings.get(gram)
+            if ids is None:
+                self.postings[gram] = {exhibit._id}
+            else:
+                ids.add(exhibit._id)
+
+    def remove(self, exhibit_id):
+        keys = self.keys.pop(exhibit_id, None)
+        if keys is None:
+            return
+        for gram in set().union(*map(padded_grams, keys)):
+            ids = self.postings.get(gram)
+            if ids is None:
+                continue
+            ids.discard(exhibit_id)
+            if not ids:
+                del self.postings[gram]
+
+    def update(self, exhibit):
+        self.remove(exhibit._id)
+        self.add(exhibit)
+
+    def candidates(self, grams):
+        # Shared gram counts per exhibit, rarest grams first. Common grams (e.g. "  b")
+        # only raise counts of exhibits that are already candidates, and at most
+        # FUZZY_SCAN exhibits are counted at all
+        common = max(1, int(len(self.keys) * COMMON_GRAM_SHARE))
+        counts = {}
+        for ids in sorted((self.postings[gram] for gram in grams if gram in self.postings), key=len):
+            if counts and (len(ids) > common or len(counts) + len(ids) > FUZZY_SCAN):
+                for exhibit_id in counts:
+                    if exhibit_id in ids:
+                        counts[exhibit_id] += 1
+            else:
+                for exhibit_id in itertools.islice(ids, FUZZY_SCAN):
+                    counts[exhibit_id] = counts.get(exhibit_id, 0) + 1
+        return heapq.nlargest(FUZZY_CANDIDATES, counts, key=counts.get)
+
+    def similarity(self, query_grams, key):
+        # How much of the query is found in the key, with a little weight on
+        # overall likeness so a close full match ranks above a long title containing it
+        grams = padded_grams(key)
+        if not grams:
+            return 0.0
+        shared = len(query_grams & grams)
+        return 0.8 * shared / len(query_grams) + 0.2 * 2 * shared / (len(query_grams) + len(grams))
+
+    def search(self, query, limit=10, min_similarity=MIN_SIMILARITY):
+        # [(exhibit_id, similarity)] best first
+        query = fold(query).strip()
+        grams = padded_grams(query)
+        if not grams:
+            return []
+        scored = []
+        for exhibit_id in self.candidates(grams):
+            score = max(self.similarity(grams, key) for key in self.keys[exhibit_id])
+            if score >= min_similarity:
+                scored.append((score, exhibit_id))
+        best = heapq.nsmallest(limit, scored, key=lambda item: (-item[0], item[1]))
+        return [(exhibit_id, round(score, 3)) for score, exhibit_id in best]
@@ -0,0 +1,208 @@
+# 5.3: Museum Inventory App - service layer without any terminal I/O
+
+from museum_model import EPOCH_NAMES, UNKNOWN_EPOCH, Exhibit, ExhibitList, Gallery, Museum
+from museum_query import FieldIs, InGallery, Not, YearRange
+
+
+class ServiceError(Exception):
+    pass
+
+
+class NotFoundError(ServiceError):
+    pass
+
+
+class ValidationError(ServiceError):
+    pass
+
+
+class ConflictError(ServiceError):
+    pass
+
+
+class AlreadyExhibitedError(ConflictError):
+    def __init__(self, exhibit, galleries):
+        shown_in = f" (in: {', '.join(galleries)})" if galleries else ""
+        super().__init__(f"Objekt bereits ausgestellt{shown_in}!")
+        self.exhibit = exhibit
+        self.galleries = galleries
+
+
+class MuseumService:
+    # Every operation returns its result or raises a ServiceError; the caller decides how to talk to the user
+    def __init__(self, museum: Museum):
+        self.museum = museum
+
+    # --- Exhibits ---
+    def get_exhibit(self, target_id):
+        exhibit = self.museum.get_exhibit_by_id(target_id)
+        if exhibit is None:
+            raise NotFoundError("ID nicht gefunden.")
+        return exhibit
+
+    def get_exhibits(self, target_ids):
+        return self.museum.get_exhibits_by_ids(target_ids)
+
+    def validate_status(self, status):
+        if status not in Exhibit.STATUS_OPTIONS:
+            raise ValidationError(f"Ungültiger Status: {status}")
+
+    def validate_fields(self, fields):
+        # Checked before anything changes: the museum updates its indexes one after another
+        for field, value in fields.items():
+            if field == "year":
+                if not isinstance(value, (str, int)) or isinstance(value, bool):
+                    raise ValidationError(f"Ungültiges Jahr: {value!r}")
+            elif not isinstance(value, str):
+                raise ValidationError(f"Ungültiger Wert für {field}: {value!r}")
+        if "status" in fields:
+            self.validate_status(fields["status"])
+
+    def add_exhibit(self, title, creator, year, description, status):
+        self.validate_fields({"title": title, "creator": creator, "year": year,
+                              "description": description, "status": status})
+        exhibit = Exhibit(title, creator, year, description, status)
+        try:
+            self.museum.add_exhibit(exhibit)
+        except ValueError as e:
+            raise ConflictError(str(e)) from e
+        return exhibit
+
+    def update_exhibit(self, target_id, **changes):
+        # Fields that are not given keep their current value
+        exhibit = self.get_exhibit(target_id)
+        unknown = set(changes) - set(Exhibit.EDIT_FIELDS)
+        if unknown:
+            raise ValidationError(f"Unbekannte Felder: {', '.join(sorted(unknown))}")
+        # Only the given fields, older inventories may hold other types in the rest
+        self.validate_fields(changes)
+        fields = {field: changes.get(field, getattr(exhibit, field)) for field in Exhibit.EDIT_FIELDS}
+        exhibit.update(**fields)
+        return exhibit
+
+    def remove_exhibit(self, target_id):
+        exhibit = self.museum.remove_exhibit(target_id)
+        if exhibit is None:
+            raise NotFoundError("ID nicht gefunden.")
+        return exhibit
+
+    def search(self, query, limit=None):
+        return self.museum.search(query, limit)
+
+    def fuzzy_search(self, query, limit=10):
+        return self.museum.fuzzy_search(query, limit)
+
+    def browse(self, status=None, kh_epoche=None):
+        # The sequence the exhibit listing pages through; unfiltered it is the museum's own list.
+        # A filter takes its matches from the query indexes and puts them in listing order.
+        listing = self.museum.exhibits
+        predicates = [FieldIs(field, value) for field, value in (("status", status), ("kh_epoche", kh_epoche))
+                      if value is not None]
+        if not predicates:
+            return listing
+        return ExhibitList(sorted(self.museum.query(*predicates), key=lambda ex: listing.positions[ex._id]))
+
+    def query(self, year_from=None, year_to=None, status=None, kh_epoche=None, creator=None,
+              gallery=None, in_gallery=None, limit=None):
+        # All given criteria must hold; in_gallery=True/False asks for membership in any gallery
+        predicates = []
+        if year_from is not None or year_to is not None:
+            if year_from is not None and year_to is not None and year_from > year_to:
+                raise ValidationError("Startjahr liegt nach dem Endjahr.")
+            predicates.append(YearRange(year_from, year_to))
+        if status is not None:
+            self.validate_status(status)
+            predicates.append(FieldIs("status", status))
+        if kh_epoche is not None:
+            predicates.append(FieldIs("kh_epoche", kh_epoche))
+        if creator is not None:
+            predicates.append(FieldIs("creator", creator))
+        if gallery is not None:
+            self.get_gallery(gallery)
+            predicates.append(InGallery(gallery))
+        if in_gallery is not None:
+            predicates.append(InGallery() if in_gallery else Not(InGallery()))
+        return self.museum.query(*predicates, limit=limit)
+
+    def epoch_options(self):
+        return EPOCH_NAMES + [UNKNOWN_EPOCH]
+
+    def statistics(self):
+        return self.museum.statistics()
+
+    def count_exhibits(self, status=None, kh_epoche=None):
+        return self.museum.count_exhibits(status, kh_epoche)
+
+    # --- Galleries ---
+    def list_galleries(self):
+        return list(self.museum.galleries)
+
+    def get_gallery(self, name):
+        gallery = self.museum.get_gallery(name)
+        if gallery is None:
+            raise NotFoundError(f"Galerie '{name}' nicht gefunden.")
+        return gallery
+
+    def create_gallery(self, name, start="", end="", location=""):
+        if not name:
+            raise ValidationError("Name darf nicht leer sein!")
+        if self.museum.get_gallery(name) is not None:
+            raise ConflictError(f"Galerie '{name}' existiert bereits.")
+        gallery = Gallery(name, start, end, location)
+        self.museum.add_gallery(gallery)
+        return gallery
+
+    def gallery_exhibits(self, name):
+        # (id, exhibit) pairs in gallery order; exhibit is None for ids that no longer exist
+        gallery = self.get_gallery(name)
+        return list(zip(gallery.exhibit_ids, self.museum.get_exhibits_by_ids(gallery.exhibit_ids)))
+
+    def add_to_gallery(self, name, target_id, force=False):
+        gallery = self.get_gallery(name)
+        exhibit = self.get_exhibit(target_id)
+        if target_id in gallery.exhibit_ids:
+            raise ConflictError(f"{exhibit.title} ist bereits Teil dieser Galerie.")
+        if not force and (exhibit.status == "Ausgestellt" or self.museum.is_in_gallery(target_id)):
+            raise AlreadyExhibitedError(exhibit, self.museum.galleries_of(target_id))
+        self.museum.gallery_add(gallery, target_id)
+        return exhibit
+
+    def remove_from_gallery(self, name, target_id):
+        gallery = self.get_gallery(name)
+        if not self.museum.gallery_remove(gallery, target_id):
+            raise NotFoundError("ID nicht in Galerie gefunden!")
+        return self.museum.get_exhibit_by_id(target_id)
+
+    def galleries_of(self, target_id):
+        return self.museum.galleries_of(target_id)
+
+    # --- History ---
+    def undo(self):
+        # Number of changes taken back, 0 if there is nothing to undo
+        return self.museum.undo()
+
+    def redo(self):
+        return self.museum.redo()
+
+    def batch(self):
+        # Context manager: the changes made inside are undone as one step
+        return self.museum.batch()
+
+    def collect(self):
+        # Like batch(), but the changes are only written by commit(changes): a front end can let
+        # its readers in again before the journal write
+        return self.museum.collect()
+
+    def commit(self, changes):
+        self.museum.commit(changes)
+
+    def exclude_readers_with(self, lock):
+        # Taken by the museum whenever changes of other sessions are merged into memory
+        self.museum.exclusive = lock
+
+    # --- Persistence ---
+    def refresh(self):
+        self.museum.refresh()
+
+    def save(self):
+        self.museum.save()
@@ -0,0 +1,237 @@
+# SQLite storage backend for the Museum Inventory App
+
+import argparse
+import json as js
+import sqlite3
+import threading
+import time
+
+from museum_storage import iter_inventory
+
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+IMPORT_CHUNK_SIZE = 10000
+# Change log records kept on save; a session further behind loads the tables again
+CHANGE_LOG_KEEP = 10000
+# Seconds a writer waits for another process's transaction
+BUSY_TIMEOUT = 30
+EXHIBIT_COLUMNS = ("_id", "_uid", "title", "creator", "year", "description", "status", "kh_epoche", "_version")
+COLUMN_DEFAULTS = {"kh_epoche": "Unbekannt", "_version": 1}
+GALLERY_COLUMNS = ("name", "start", "end", "location")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS exhibits (
+    _id INTEGER PRIMARY KEY,
+    _uid TEXT NOT NULL UNIQUE,
+    title TEXT,
+    creator TEXT,
+    year,
+    description TEXT,
+    status TEXT,
+    kh_epoche TEXT,
+    _version INTEGER NOT NULL DEFAULT 1
+);
+-- No column indexes: the museum loads every row and filters in memory (museum_query),
+-- they would only slow down each write. Databases created before that drop them.
+DROP INDEX IF EXISTS idx_exhibits_status;
+DROP INDEX IF EXISTS idx_exhibits_kh_epoche;
+DROP INDEX IF EXISTS idx_exhibits_year;
+CREATE TABLE IF NOT EXISTS galleries (
+    name TEXT PRIMARY KEY,
+    start TEXT,
+    "end" TEXT,
+    location TEXT
+);
+CREATE TABLE IF NOT EXISTS gallery_exhibits (
+    gallery TEXT NOT NULL,
+    exhibit_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (gallery, exhibit_id)
+);
+CREATE INDEX IF NOT EXISTS idx_gallery_exhibits_exhibit ON gallery_exhibits(exhibit_id);
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    record TEXT NOT NULL
+);
+"""
+
+# Plain INSERT: an _id handed out twice is renumbered by Museum.sync before the write, never replaced
+INSERT_EXHIBIT = f"INSERT INTO exhibits ({', '.join(EXHIBIT_COLUMNS)}) VALUES ({', '.join('?' * len(EXHIBIT_COLUMNS))})"
+INSERT_GALLERY = 'INSERT OR IGNORE INTO galleries (name, start, "end", location) VALUES (?, ?, ?, ?)'
+INSERT_MEMBER = """INSERT OR IGNORE INTO gallery_exhibits (gallery, exhibit_id, position)
+    VALUES (?, ?, (SELECT COALESCE(MAX(position), 0) + 1 FROM gallery_exhibits WHERE gallery = ?))"""
+
+
+def exhibit_row(d):
+    return tuple(d.get(column, COLUMN_DEFAULTS.get(column)) for column in EXHIBIT_COLUMNS)
+
+
+class TransactionLock:
+    # The storage lock of a database: a write transaction (BEGIN IMMEDIATE), so SQLite itself
+    # serialises the processes. Re-entrant within the process like FileLock.
+    def __init__(self, db):
+        self.db = db
+        self.depth = 0
+        self.thread_lock = threading.RLock()
+
+    def __enter__(self):
+        self.thread_lock.acquire()
+        if self.depth == 0:
+            try:
+                self.db.execute("BEGIN IMMEDIATE")
+            except BaseException:
+                self.thread_lock.release()
+                raise
+        self.depth += 1
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        self.depth -= 1
+        try:
+            if self.depth == 0:
+                self.db.execute("COMMIT" if exc_type is None else "ROLLBACK")
+        finally:
+            self.thread_lock.release()
+
+
+class SqliteStorage:
+    # Same interface as JsonStorage, but every change is written as its own
+    # statement, so a save costs O(change) and there is nothing to compact.
+    # The storage lock is a write transaction on the database, and the
+    # changes table tells the other sessions what was written meanwhile.
+    def __init__(self, path):
+        self.path = path
+        self.pending = 0
+        # Transactions are opened by the lock only (isolation_level=None). Callers serialise
+        # access themselves (the HTTP server writes from a worker thread).
+        self.db = sqlite3.connect(path, timeout=BUSY_TIMEOUT, isolation_level=None, check_same_thread=False)
+        self.lock = TransactionLock(self.db)
+        # Last change log record this process has seen
+        self.seq = 0
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        if "_version" not in {row[1] for row in self.db.execute("PRAGMA table_info(exhibits)")}:
+            # Databases created before exhibits carried a version
+            self.db.execute("ALTER TABLE exhibits ADD COLUMN _version INTEGER NOT NULL DEFAULT 1")
+
+    def load(self, streaming=False):
+        # Cursors are iterated row by row, so this always streams
+        for row in self.db.execute(f"SELECT {', '.join(EXHIBIT_COLUMNS)} FROM exhibits ORDER BY _id"):
+            yield "exhibits", dict(zip(EXHIBIT_COLUMNS, row))
+        members = {}
+        for gallery, exhibit_id in self.db.execute(
+                "SELECT gallery, exhibit_id FROM gallery_exhibits ORDER BY gallery, position"):
+            members.setdefault(gallery, []).append(exhibit_id)
+        for row in self.db.execute('SELECT name, start, "end", location FROM galleries ORDER BY rowid'):
+            g_data = dict(zip(GALLERY_COLUMNS, row))
+            g_data["exhibit_ids"] = members.get(g_data["name"], [])
+            yield "galleries", g_data
+
+    def last_seq(self):
+        row = self.db.execute("SELECT seq FROM sqlite_sequence WHERE name = 'changes'").fetchone()
+        return row[0] if row else 0
+
+    def read_journal(self):
+        # The tables already hold every change; call with the lock held, right after load()
+        self.seq = self.last_seq()
+        return iter(())
+
+    def read_new(self):
+        # Changes other processes wrote since our last read; call with the lock held.
+        # None if some of them were trimmed from the log already: the tables have to be loaded again.
+        first = self.db.execute("SELECT MIN(seq) FROM changes").fetchone()[0]
+        if first is None:
+            return [] if self.seq >= self.last_seq() else None
+        if self.seq < first - 1:
+            return None
+        records = []
+        for seq, record in self.db.execute("SELECT seq, record FROM changes WHERE seq > ? ORDER BY seq", (self.seq,)):
+            records.append(js.loads(record))
+            self.seq = seq
+        return records
+
+    def append(self, change):
+        self.append_many([change])
+
+    def append_many(self, changes):
+        # Call with the log read to the end (Museum.write syncs first)
+        with self.lock:
+            for change in changes:
+                self.apply(change)
+                self.seq = self.db.execute("INSERT INTO changes (record) VALUES (?)",
+                                           (js.dumps(change, separators=(",", ":")),)).lastrowid
+
+    def apply(self, change):
+        op = change["op"]
+        if op == "add":
+            self.db.execute(INSERT_EXHIBIT, exhibit_row(change["exhibit"]))
+        elif op == "update":
+            fields = {column: value for column, value in change["fields"].items() if column in EXHIBIT_COLUMNS}
+            if "version" in change:
+                fields["_version"] = change["version"]
+            assignments = ", ".join(f"{column} = ?" for column in fields)
+            self.db.execute(f"UPDATE exhibits SET {assignments} WHERE _id = ?", (*fields.values(), change["id"]))
+        elif op == "remove":
+            self.db.execute("DELETE FROM exhibits WHERE _id = ?", (change["id"],))
+            self.db.execute("DELETE FROM gallery_exhibits WHERE exhibit_id = ?", (change["id"],))
+        elif op == "gallery":
+            self.insert_gallery(change["gallery"])
+        elif op == "gallery_delete":
+            self.db.execute("DELETE FROM gallery_exhibits WHERE gallery = ?", (change["gallery"],))
+            self.db.execute("DELETE FROM galleries WHERE name = ?", (change["gallery"],))
+        elif op == "gallery_add":
+            self.db.execute(INSERT_MEMBER, (change["gallery"], change["id"], change["gallery"]))
+        elif op == "gallery_remove":
+            self.db.execute("DELETE FROM gallery_exhibits WHERE gallery = ? AND exhibit_id = ?",
+                            (change["gallery"], change["id"]))
+
+    def insert_gallery(self, g_data):
+        self.db.execute(INSERT_GALLERY, tuple(g_data[column] for column in GALLERY_COLUMNS))
+        self.db.executemany(INSERT_MEMBER, ((g_data["name"], exhibit_id, g_data["name"])
+                                            for exhibit_id in g_data["exhibit_ids"]))
+
+    def needs_compaction(self):
+        return False
+
+    def save(self, museum):
+        # Every change is in the tables already, only the change log is trimmed
+        with self.lock:
+            self.db.execute("DELETE FROM changes WHERE seq <= ?", (self.last_seq() - CHANGE_LOG_KEEP,))
+
+    def close(self):
+        self.db.close()
+
+
+def import_json(json_path, db_path, chunk_size=IMPORT_CHUNK_SIZE):
+    # One-shot import of the JSON envelope, streamed and inserted in chunks
+    storage = SqliteStorage(db_path)
+    count = 0
+    chunk = []
+    with storage.lock:
+        for section, item in iter_inventory(json_path):
+            if section == "exhibits":
+                chunk.append(exhibit_row(item))
+                if len(chunk) >= chunk_size:
+                    storage.db.executemany(INSERT_EXHIBIT, chunk)
+                    count += len(chunk)
+                    chunk = []
+            elif section == "galleries":
+                storage.insert_gallery(item)
+        storage.db.executemany(INSERT_EXHIBIT, chunk)
+        count += len(chunk)
+    storage.close()
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importiert museum_exhibits.json in eine SQLite-Datenbank.")
+    parser.add_argument("json_path", nargs="?", default="museum_exhibits.json")
+    parser.add_argument("db_path", nargs="?", default="museum_exhibits.db")
+    args = parser.parse_args()
+    started = time.perf_counter()
+    count = import_json(args.json_path, args.db_path)
+    print(f"{count} Exponate nach {args.db_path} importiert ({time.perf_counter() - started:.2f} s).")
+
+
+if __name__ == "__main__":
+    main()
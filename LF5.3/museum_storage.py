@@ -0,0 +1,348 @@
+# Storage helpers for the Museum Inventory App
+
+import json as js
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+READ_SIZE = 1 << 16
+COMPACT_EVERY = 1000
+JOURNAL_SUFFIX = ".journal"
+LOCK_SUFFIX = ".lock"
+WHITESPACE = " \t\n\r"
+NUMBER_CHARS = frozenset("0123456789+-.eE")
+
+_decoder = js.JSONDecoder()
+
+
+class _StreamReader:
+    # Keeps only the unparsed tail of the file in memory
+    def __init__(self, f, read_size=READ_SIZE):
+        self.f = f
+        self.read_size = read_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        chunk = self.f.read(self.read_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise js.JSONDecodeError(f"Expecting {char!r}", self.buf, self.pos)
+        self.pos += 1
+
+    def skip(self, char):
+        if self.peek() == char:
+            self.pos += 1
+            return True
+        return False
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+            except js.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            # A number followed by nothing but number characters up to the end of the buffer may
+            # continue in the next chunk: raw_decode stops before a trailing "." or "e"
+            if (type(obj) in (int, float) and not self.eof
+                    and all(c in NUMBER_CHARS for c in self.buf[end:]) and self.fill()):
+                continue
+            self.pos = end
+            return obj
+
+
+def _iter_array(reader):
+    reader.expect("[")
+    if reader.skip("]"):
+        return
+    while True:
+        yield reader.value()
+        if reader.skip(","):
+            continue
+        reader.expect("]")
+        return
+
+
+def iter_inventory(path, read_size=READ_SIZE):
+    # Yields (section, item) pairs, e.g. ("exhibits", {...}), one array item at a time.
+    # Handles the envelope format as well as the old plain list of exhibits.
+    with open(path, "r") as f:
+        reader = _StreamReader(f, read_size)
+        if reader.peek() == "[":
+            for item in _iter_array(reader):
+                yield "exhibits", item
+            return
+        reader.expect("{")
+        if reader.skip("}"):
+            return
+        while True:
+            key = reader.value()
+            reader.expect(":")
+            if reader.peek() == "[":
+                for item in _iter_array(reader):
+                    yield key, item
+            else:
+                reader.value()
+            if reader.skip(","):
+                continue
+            reader.expect("}")
+            return
+
+
+def lock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    elif msvcrt is not None:
+        f.seek(0)
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                # LK_LOCK gives up after ten seconds, keep waiting
+                continue
+
+
+def unlock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    elif msvcrt is not None:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class FileLock:
+    # Exclusive advisory lock on a side file, shared by all processes using the same inventory.
+    # Re-entrant within the process; without fcntl/msvcrt it only guards the threads of this process.
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.depth = 0
+        self.thread_lock = threading.RLock()
+
+    def __enter__(self):
+        self.thread_lock.acquire()
+        if self.depth == 0:
+            try:
+                if self.file is None:
+                    self.file = open(self.path, "a+")
+                lock_file(self.file)
+            except BaseException:
+                self.thread_lock.release()
+                raise
+        self.depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self.depth -= 1
+        if self.depth == 0:
+            unlock_file(self.file)
+        self.thread_lock.release()
+
+    def read(self):
+        self.file.seek(0)
+        return self.file.read()
+
+    def write(self, text):
+        self.file.seek(0)
+        self.file.truncate()
+        self.file.write(text)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def fsync_directory(path):
+    # Makes a rename durable; not supported on every platform
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def read_lines(path, offset=0):
+    # Complete journal lines from offset on; a torn last line is left for later.
+    # Returns the records and the offset after the last complete line.
+    records = []
+    try:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    records.append(js.loads(line))
+                except (UnicodeDecodeError, js.JSONDecodeError):
+                    # Torn line of a crashed session
+                    continue
+    except FileNotFoundError:
+        pass
+    return records, offset
+
+
+class JsonStorage:
+    # The JSON envelope is the snapshot; every change since then is appended
+    # as one compact line to the journal and folded into the snapshot on compaction.
+    # Several processes may share the files: all writes happen under the lock file,
+    # which also holds the journal generation. A save moves the journal aside as
+    # <journal>.<generation>, so a process that has not read it to the end yet can catch up.
+    def __init__(self, path, compact_every=COMPACT_EVERY):
+        self.path = path
+        self.journal_path = path + JOURNAL_SUFFIX
+        self.compact_every = compact_every
+        self.journal = None
+        self.pending = 0
+        self.lock = FileLock(path + LOCK_SUFFIX)
+        # Journal generation and byte offset this process has read up to
+        self.generation = 0
+        self.offset = 0
+
+    def load(self, streaming=False):
+        try:
+            if streaming:
+                yield from iter_inventory(self.path)
+                return
+            with open(self.path, "r") as f:
+                data = js.load(f)
+        except FileNotFoundError:
+            return
+        # If old format (list), handle gracefully
+        if isinstance(data, list):
+            data = {"exhibits": data}
+        for section in ("exhibits", "galleries"):
+            for item in data.get(section, []):
+                yield section, item
+
+    def rotated_path(self, generation):
+        return f"{self.journal_path}.{generation}"
+
+    def read_generation(self):
+        text = self.lock.read().strip()
+        return int(text) if text.isdigit() else 0
+
+    def read_journal(self):
+        # The whole journal of the current generation; call with the lock held
+        self.close()
+        self.generation = self.read_generation()
+        records, self.offset = read_lines(self.journal_path)
+        self.pending = len(records)
+        return iter(records)
+
+    def read_new(self):
+        # Records other processes appended since the last read; call with the lock held.
+        # None if this process fell behind more than one save and has to load the snapshot again.
+        generation = self.read_generation()
+        if generation == self.generation:
+            try:
+                if os.path.getsize(self.journal_path) < self.offset:
+                    return None
+            except FileNotFoundError:
+                if self.offset:
+                    return None
+            records, self.offset = read_lines(self.journal_path, self.offset)
+        elif generation == self.generation + 1:
+            # Without a rotated journal the save found nothing to move aside
+            rotated = self.rotated_path(self.generation)
+            if self.offset and not os.path.exists(rotated):
+                return None
+            records, _ = read_lines(rotated, self.offset)
+            self.close()
+            self.generation = generation
+            newer, self.offset = read_lines(self.journal_path)
+            records += newer
+        else:
+            return None
+        self.pending += len(records)
+        return records
+
+    def append(self, record):
+        self.append_many([record])
+
+    def append_many(self, records):
+        # Call with the lock held and the journal read to the end
+        if self.journal is None:
+            self.journal = open(self.journal_path, "a+b")
+            # Start on a fresh line if the last session crashed mid-write
+            if self.journal.tell() > 0:
+                self.journal.seek(self.journal.tell() - 1)
+                if self.journal.read(1) != b"\n":
+                    self.journal.write(b"\n")
+        self.journal.write("".join(js.dumps(record, separators=(",", ":")) + "\n" for record in records).encode("utf-8"))
+        self.journal.flush()
+        os.fsync(self.journal.fileno())
+        self.offset = self.journal.tell()
+        self.pending += len(records)
+
+    def needs_compaction(self):
+        return self.pending >= self.compact_every
+
+    def save(self, museum):
+        # Call with the lock held and the museum synced with the journal
+        tmp_path = self.path + ".tmp"
+        self.write_snapshot(museum, tmp_path)
+        os.replace(tmp_path, self.path)
+        fsync_directory(self.path)
+        # Replaying is idempotent, so a crash before this point only replays twice
+        self.close()
+        if os.path.exists(self.journal_path):
+            os.replace(self.journal_path, self.rotated_path(self.generation))
+        try:
+            os.remove(self.rotated_path(self.generation - 1))
+        except FileNotFoundError:
+            pass
+        self.generation += 1
+        self.lock.write(str(self.generation))
+        self.offset = 0
+        self.pending = 0
+
+    def write_snapshot(self, museum, path):
+        with open(path, "w") as f:
+            js.dump(museum.to_inventory(), f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def close(self):
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
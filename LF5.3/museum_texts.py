@@ -0,0 +1,128 @@
+# Side store for large free-text fields (the description) of the Museum Inventory App.
+#
+# With lazy texts an exhibit keeps a small int locator instead of its description; the text
+# sits in a temporary file next to the inventory and is read on demand through an LRU cache.
+# The search index keeps the lowercased descriptions in a store of its own (its grams stay in memory).
+# The snapshot stays the source of truth: a store is filled while loading, lives as long as
+# the session and is never read by another process.
+
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+# Fields that may be kept out of memory, with the slot holding the text or its locator
+TEXT_SLOTS = {"description": "_description"}
+TEXT_CACHE_SIZE = 4096
+# Shorter texts cost less in memory than their locator and stay where they are
+LAZY_MIN_LENGTH = 32
+# Written texts are collected and appended in blocks of this size
+WRITE_BUFFER = 1 << 20
+# A locator is (offset << LENGTH_BITS | length) << STORE_BITS | store number
+STORE_BITS = 8
+LENGTH_BITS = 24
+
+stores = [None] * (1 << STORE_BITS)
+
+
+class Locator(int):
+    # Own type, so a description that happens to be a number is never taken for a locator
+    __slots__ = ()
+
+
+def locator_offset(locator):
+    return locator >> STORE_BITS >> LENGTH_BITS
+
+
+def read_text(value, cached=True):
+    # The text of a lazy field; plain values (str, None, numbers) are returned as they are
+    if type(value) is not Locator:
+        return value
+    store = stores[value & ((1 << STORE_BITS) - 1)]
+    return store.get(value) if cached else store.read(value)
+
+
+class TextStore:
+    def __init__(self, inventory_path, cache_size=TEXT_CACHE_SIZE):
+        try:
+            self.number = stores.index(None)
+        except ValueError:
+            raise RuntimeError("Zu viele offene Textspeicher.")
+        directory = os.path.dirname(os.path.abspath(inventory_path))
+        # Removed by the system when closed, even after a crash
+        self.file = tempfile.TemporaryFile(dir=directory, prefix=os.path.basename(inventory_path) + ".texts.")
+        self.flushed = 0
+        self.buffer = bytearray()
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        # Views and search may read from several threads (HTTP server)
+        self.lock = threading.Lock()
+        stores[self.number] = self
+
+    def put(self, text):
+        if len(text) < LAZY_MIN_LENGTH:
+            return text
+        data = text.encode("utf-8")
+        if len(data) >= 1 << LENGTH_BITS:
+            # Too long for a locator, stays in memory
+            return text
+        with self.lock:
+            offset = self.flushed + len(self.buffer)
+            self.buffer += data
+            if len(self.buffer) >= WRITE_BUFFER:
+                self.flush()
+        return Locator((offset << LENGTH_BITS | len(data)) << STORE_BITS | self.number)
+
+    def flush(self):
+        self.file.seek(self.flushed)
+        self.file.write(self.buffer)
+        self.file.flush()
+        self.flushed += len(self.buffer)
+        self.buffer = bytearray()
+
+    def read(self, locator):
+        # Uncached, for saving and searching: they would only push the viewed texts out of the cache
+        position = locator >> STORE_BITS
+        offset, length = position >> LENGTH_BITS, position & ((1 << LENGTH_BITS) - 1)
+        with self.lock:
+            if offset >= self.flushed:
+                start = offset - self.flushed
+                data = self.buffer[start:start + length]
+            else:
+                self.file.seek(offset)
+                data = self.file.read(length)
+        return data.decode("utf-8")
+
+    def get(self, locator):
+        with self.lock:
+            text = self.cache.get(locator)
+            if text is not None:
+                self.cache.move_to_end(locator)
+                self.hits += 1
+                return text
+            self.misses += 1
+        text = self.read(locator)
+        with self.lock:
+            self.cache[locator] = text
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return text
+
+    def statistics(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "cached": len(self.cache),
+            "cache_size": self.cache_size,
+            "bytes": self.flushed + len(self.buffer),
+        }
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            stores[self.number] = None
@@ -0,0 +1,208 @@
+# Staff directory for the museum: slotted staff records with role and birth-year indexes.
+# Records render like Person/MuseumStaff in 535-staff_inherits_person_logic.py; the staff
+# list is saved next to the inventory (museum_exhibits.json -> museum_exhibits.staff.json).
+
+import argparse
+import bisect
+import datetime
+import json as js
+import os
+import sys
+
+from museum_model import INVENTORY_FILE
+from museum_storage import fsync_directory
+
+STAFF_SUFFIX = ".staff.json"
+# Same numbering as MuseumStaff.staff_role
+STAFF_ROLES = {0: "Administrator", 1: "Curator", 2: "Researcher", 3: "Archivist"}
+
+
+def staff_path(inventory_path=INVENTORY_FILE):
+    return os.path.splitext(inventory_path)[0] + STAFF_SUFFIX
+
+
+def role_name(role):
+    # Role number as in MuseumStaff, or the name itself
+    if role in STAFF_ROLES:
+        return STAFF_ROLES[role]
+    if role in STAFF_ROLES.values():
+        return sys.intern(role)
+    raise ValueError(f"Unbekannte Rolle: {role}")
+
+
+class StaffRecord:
+    # Public fields (name, birth_year, theoretical_age) and the private _staff_role, like MuseumStaff.
+    # All of them are read-only: the directory indexes them, so they change through its methods.
+    # The rendered texts are built once and dropped when a field changes.
+    __slots__ = ("_name", "_birth_year", "_theoretical_age", "_staff_role", "_public_text", "_private_text")
+    PUBLIC_FIELDS = ("name", "birth_year", "theoretical_age")
+    PRIVATE_FIELDS = ("_staff_role",)
+
+    def __init__(self, name, birth_year, staff_role):
+        self._name = name
+        self.set_birth_year(birth_year)
+        self._staff_role = role_name(staff_role)
+
+    def __setattr__(self, field, value):
+        object.__setattr__(self, field, value)
+        if field[1:] in StaffRecord.PUBLIC_FIELDS:
+            object.__setattr__(self, "_public_text", None)
+        elif field in StaffRecord.PRIVATE_FIELDS:
+            object.__setattr__(self, "_private_text", None)
+
+    def set_birth_year(self, birth_year):
+        # The age follows the birth year; on a registered record use StaffDirectory.change_birth_year
+        self._birth_year = birth_year
+        self._theoretical_age = datetime.datetime.now().year - birth_year
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def birth_year(self):
+        return self._birth_year
+
+    @property
+    def theoretical_age(self):
+        return self._theoretical_age
+
+    @property
+    def staff_role(self):
+        return self._staff_role
+
+    def __str__(self):
+        if self._public_text is None:
+            self._public_text = "\n".join(f"{field}: {getattr(self, field)}" for field in StaffRecord.PUBLIC_FIELDS)
+        return self._public_text
+
+    def get_private_info(self):
+        if self._private_text is None:
+            self._private_text = "\n".join(f"{field}: {getattr(self, field)}" for field in StaffRecord.PRIVATE_FIELDS)
+        return self._private_text
+
+    def to_dict(self):
+        return {"name": self.name, "birth_year": self.birth_year, "staff_role": self._staff_role}
+
+
+class StaffDirectory:
+    def __init__(self, path=None):
+        self.path = path or staff_path()
+        self.records = []
+        # role -> records (dict as ordered set), birth year -> records plus the sorted years for ranges
+        self.by_role = {role: {} for role in STAFF_ROLES.values()}
+        self.by_birth_year = {}
+        self.birth_years = []
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                data = js.load(f)
+        except FileNotFoundError:
+            return
+        for d in data:
+            self.register(StaffRecord(d["name"], d["birth_year"], d["staff_role"]))
+
+    def register(self, record):
+        self.records.append(record)
+        self.by_role[record.staff_role][record] = None
+        self.index_birth_year(record)
+
+    def index_birth_year(self, record):
+        year = record.birth_year
+        if year not in self.by_birth_year:
+            self.by_birth_year[year] = {}
+            bisect.insort(self.birth_years, year)
+        self.by_birth_year[year][record] = None
+
+    def unindex_birth_year(self, record):
+        records = self.by_birth_year[record.birth_year]
+        del records[record]
+        if not records:
+            del self.by_birth_year[record.birth_year]
+            del self.birth_years[bisect.bisect_left(self.birth_years, record.birth_year)]
+
+    def add(self, name, birth_year, staff_role):
+        record = StaffRecord(name, birth_year, staff_role)
+        self.register(record)
+        return record
+
+    def remove(self, record):
+        self.records.remove(record)
+        del self.by_role[record.staff_role][record]
+        self.unindex_birth_year(record)
+
+    def rename(self, record, name):
+        record._name = name
+
+    def change_birth_year(self, record, birth_year):
+        self.unindex_birth_year(record)
+        record.set_birth_year(birth_year)
+        self.index_birth_year(record)
+
+    def change_role(self, record, staff_role):
+        del self.by_role[record.staff_role][record]
+        record._staff_role = role_name(staff_role)
+        self.by_role[record.staff_role][record] = None
+
+    def with_role(self, staff_role):
+        return list(self.by_role[role_name(staff_role)])
+
+    def born_between(self, start, end):
+        lo = bisect.bisect_left(self.birth_years, start)
+        hi = bisect.bisect_right(self.birth_years, end)
+        return [record for year in self.birth_years[lo:hi] for record in self.by_birth_year[year]]
+
+    def render(self, records=None, private=False):
+        # Joins the cached texts, one block per record
+        records = self.records if records is None else records
+        if private:
+            return "\n\n".join(f"{record}\n{record.get_private_info()}" for record in records)
+        return "\n\n".join(map(str, records))
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            js.dump([record.to_dict() for record in self.records], f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        fsync_directory(self.path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mitarbeiterverzeichnis des Museums.")
+    parser.add_argument("--inventory", default=INVENTORY_FILE, help="Inventar, neben dem das Verzeichnis liegt")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="Mitarbeiter hinzufügen")
+    add.add_argument("name")
+    add.add_argument("birth_year", type=int)
+    add.add_argument("role", help=", ".join(f"{number}={name}" for number, name in STAFF_ROLES.items()))
+    show = commands.add_parser("list", help="Mitarbeiter anzeigen")
+    show.add_argument("--role")
+    show.add_argument("--born", type=int, nargs=2, metavar=("VON", "BIS"))
+    show.add_argument("--private", action="store_true", help="auch die Rolle anzeigen")
+    args = parser.parse_args()
+
+    directory = StaffDirectory(staff_path(args.inventory))
+    try:
+        if args.command == "add":
+            role = int(args.role) if args.role.isdigit() else args.role
+            record = directory.add(args.name, args.birth_year, role)
+            directory.save()
+            print(f"Hinzugefügt:\n{record}\n{record.get_private_info()}")
+            return
+        records = directory.records
+        if args.role is not None:
+            records = directory.with_role(int(args.role) if args.role.isdigit() else args.role)
+        if args.born:
+            born = set(directory.born_between(*args.born))
+            records = [record for record in records if record in born]
+    except ValueError as e:
+        parser.exit(1, f"{e}\n")
+    print(directory.render(records, args.private) if records else "Keine Mitarbeiter gefunden.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+# Shared fixtures for the tests of the Museum Inventory App: a small generated catalogue per test
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_inventory import generate_catalogue  # noqa: E402
+
+CATALOGUE_SIZE = 200
+
+
+@pytest.fixture
+def inventory(tmp_path):
+    path = str(tmp_path / "museum_exhibits.json")
+    generate_catalogue(path, CATALOGUE_SIZE, gallery_count=5, gallery_size=10)
+    return path
+
+
+def museum_state(museum):
+    # Everything a session persists, independent of list order and of the _id a session handed out
+    exhibits = sorted((e._uid, e.title, e.creator, e.year, e.description, e.status, e.kh_epoche)
+                      for e in museum.exhibits)
+    galleries = sorted((g.name, g.location, tuple(sorted(museum.get_exhibit_by_id(i)._uid for i in g.exhibit_ids)))
+                       for g in museum.galleries)
+    return exhibits, galleries
+
+
+@pytest.fixture
+def state():
+    return museum_state
@@ -0,0 +1,44 @@
+# Binary snapshot (museum_binary): conversion both ways and the journal on top of it
+
+import pytest
+
+from museum_binary import BINARY_SUFFIX, binary_to_json, json_to_binary, lookup_exhibits
+from museum_model import Museum
+from museum_service import MuseumService
+
+from test_journal import make_changes
+
+
+@pytest.fixture
+def snapshot(inventory, tmp_path):
+    path = str(tmp_path / ("museum_exhibits" + BINARY_SUFFIX))
+    json_to_binary(inventory, path)
+    return path
+
+
+def test_conversion_keeps_the_inventory(inventory, snapshot, state, tmp_path):
+    assert state(Museum(snapshot)) == state(Museum(inventory))
+    back = str(tmp_path / "zurück.json")
+    binary_to_json(snapshot, back)
+    assert state(Museum(back)) == state(Museum(inventory))
+
+
+def test_changes_survive_a_restart_and_a_save(snapshot, state):
+    museum = Museum(snapshot)
+    make_changes(MuseumService(museum))
+    assert state(Museum(snapshot)) == state(museum)
+    museum.save()
+    assert museum.storage.pending == 0
+    assert state(Museum(snapshot)) == state(museum)
+
+
+def test_lookup_sees_the_journal(snapshot):
+    museum = Museum(snapshot)
+    service = MuseumService(museum)
+    make_changes(service)
+    added = service.add_exhibit("Neu", "C", "1650", "", "Im Lager")
+    service.update_exhibit(added._id, year="1950")
+    wanted = [1, 2, 3, added._id, 10 ** 9] + [ex._id for ex in museum.exhibits[:20]]
+    found = lookup_exhibits(snapshot, wanted)
+    expected = {i: museum.get_exhibit_by_id(i) for i in wanted}
+    assert {i: ex.to_dict() for i, ex in found.items()} == {i: ex.to_dict() for i, ex in expected.items() if ex}
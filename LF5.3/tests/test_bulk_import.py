@@ -0,0 +1,30 @@
+# Bulk import (museum_bulk_import): a bad row is skipped and counted, the rest is imported
+
+import json as js
+
+from museum_bulk_import import BulkImporter, iter_records
+from museum_model import Museum
+
+
+def test_bad_rows_are_counted_as_invalid(inventory, tmp_path):
+    source = tmp_path / "neu.jsonl"
+    rows = [
+        js.dumps({"title": "Gutes Objekt", "creator": "A", "year": "1900", "status": "Im Lager"}),
+        '{"title": "abgeschnitten", ',
+        js.dumps(["keine", "Zuordnung"]),
+        js.dumps({"title": "Liste", "creator": ["a", "b"]}),
+        js.dumps({"title": {"de": "Zuordnung"}}),
+        js.dumps({"title": "Objekt", "_id": [1]}),
+        js.dumps({"title": "Bruchteil", "_id": 9002.7}),
+        js.dumps({"title": "Wahrheitswert", "_id": True}),
+        js.dumps({"title": "Ganze Kommazahl", "_id": 9003.0}),
+        js.dumps({"title": "Noch ein Objekt", "description": "Öl auf Leinwand"}),
+    ]
+    source.write_text("\n".join(rows) + "\n", encoding="utf-8")
+    museum = Museum(inventory)
+    before = len(museum.exhibits)
+    importer = BulkImporter(museum)
+    importer.run(iter_records(str(source)))
+    assert (importer.imported, importer.duplicates, importer.invalid) == (3, 0, 7)
+    assert len(Museum(inventory).exhibits) == before + 3
+    assert Museum(inventory).get_exhibit_by_id(9003).title == "Ganze Kommazahl"
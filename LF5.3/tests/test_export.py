@@ -0,0 +1,19 @@
+# YAML export (museum_export.write_yaml): every string reads back unchanged
+
+import io
+
+import pytest
+
+from museum_export import write_yaml
+
+yaml = pytest.importorskip("yaml")
+
+
+def test_yaml_strings_read_back():
+    records = [
+        {"title": "Farbpalette \U0001F3A8", "creator": "Émile  Zeile", "description": "a\x85b\x7fc d"},
+        {"title": "yes", "creator": None, "description": "\U0001F600\tTab \"Zitat\" \\"},
+    ]
+    f = io.StringIO()
+    write_yaml(f, records, ["title", "creator", "description"])
+    assert list(yaml.safe_load_all(f.getvalue())) == records
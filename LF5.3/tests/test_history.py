@@ -0,0 +1,80 @@
+# Undo and redo (museum_history, Museum.undo/redo): every step taken back is journaled like an edit
+
+from museum_model import Museum
+from museum_service import MuseumService
+
+from test_journal import make_changes
+
+
+def test_undo_and_redo_step_by_step(inventory, state):
+    museum = Museum(inventory)
+    service = MuseumService(museum)
+    first_member = next(iter(service.get_gallery("Galerie 1").exhibit_ids))
+    states = [state(museum)]
+    for action in (lambda: service.add_exhibit("Neues Objekt", "Albrecht Dürer", "1510", "", "Im Lager"),
+                   lambda: service.update_exhibit(1, title="Umbenannt", status="Ungewiss"),
+                   lambda: service.remove_exhibit(2),
+                   lambda: service.create_gallery("Sonderschau", location="Saal 9"),
+                   lambda: service.add_to_gallery("Sonderschau", 3, force=True),
+                   lambda: service.remove_from_gallery("Galerie 1", first_member)):
+        action()
+        states.append(state(museum))
+
+    for expected in reversed(states[:-1]):
+        assert service.undo() > 0
+        assert state(museum) == expected
+    assert service.undo() == 0
+    assert state(Museum(inventory)) == states[0]
+
+    for expected in states[1:]:
+        assert service.redo() > 0
+        assert state(museum) == expected
+    assert service.redo() == 0
+    assert state(Museum(inventory)) == states[-1]
+
+
+def test_undo_remove_restores_the_galleries(inventory, state):
+    museum = Museum(inventory)
+    service = MuseumService(museum)
+    target_id = next(iter(service.get_gallery("Galerie 1").exhibit_ids))
+    service.add_to_gallery("Galerie 2", target_id, force=True)
+    before = state(museum)
+    uid = museum.get_exhibit_by_id(target_id)._uid
+
+    service.remove_exhibit(target_id)
+    assert not museum.galleries_of(target_id)
+    service.undo()
+    restored = museum.get_exhibit_by_uid(uid)
+    assert sorted(museum.galleries_of(restored._id)) == ["Galerie 1", "Galerie 2"]
+    assert state(museum) == before
+    assert state(Museum(inventory)) == before
+
+
+def test_undo_gallery_with_members(inventory, state):
+    museum = Museum(inventory)
+    service = MuseumService(museum)
+    before = state(museum)
+    with service.batch():
+        service.create_gallery("Sonderschau", location="Saal 9")
+        for target_id in (3, 4, 5):
+            service.add_to_gallery("Sonderschau", target_id, force=True)
+    with_gallery = state(museum)
+
+    service.undo()
+    assert museum.get_gallery("Sonderschau") is None
+    assert state(museum) == before
+    service.redo()
+    assert list(service.get_gallery("Sonderschau").exhibit_ids) == [3, 4, 5]
+    assert state(museum) == with_gallery
+    assert state(Museum(inventory)) == with_gallery
+
+
+def test_batch_is_one_step(inventory, state):
+    museum = Museum(inventory)
+    service = MuseumService(museum)
+    before = state(museum)
+    with service.batch():
+        make_changes(service)
+    assert service.undo() > 1
+    assert state(museum) == before
+    assert service.undo() == 0
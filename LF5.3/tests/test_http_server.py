@@ -0,0 +1,66 @@
+# Request dispatch of the HTTP front-end (museum_http_server.MuseumHttpServer), without a socket
+
+import asyncio
+import json as js
+import threading
+
+import pytest
+
+from museum_http_server import MuseumHttpServer
+from museum_model import Museum
+from museum_service import MuseumService
+
+
+def request(server, method, target, data=None):
+    body = js.dumps(data).encode() if data is not None else b""
+    return asyncio.run(server.dispatch(method, target, body))
+
+
+@pytest.fixture
+def server(inventory):
+    return MuseumHttpServer(MuseumService(Museum(inventory)))
+
+
+@pytest.mark.parametrize("method, target, data", [
+    ("PATCH", "/exhibits/1", {"creator": ["a", "b"]}),
+    ("PATCH", "/exhibits/1", {"target_id": 3}),
+    ("POST", "/exhibits", {"title": "T", "creator": {"name": "A"}, "year": "1900", "description": "",
+                           "status": "Im Lager"}),
+])
+def test_bad_bodies_are_rejected(server, state, method, target, data):
+    museum = server.service.museum
+    before = state(museum)
+    status, payload = request(server, method, target, data)
+    assert status == 400 and "error" in payload
+    assert state(museum) == before
+    assert museum.facets.total == len(museum.exhibits)
+
+
+def test_unexpected_errors_answer_500(server, monkeypatch):
+    def broken():
+        raise RuntimeError("kaputt")
+    monkeypatch.setattr(server.service, "statistics", broken)
+    assert request(server, "GET", "/stats")[0] == 500
+    assert request(server, "GET", "/exhibits/1")[0] == 200
+
+
+def test_reads_do_not_wait_for_the_journal_write(server, monkeypatch):
+    storage = server.service.museum.storage
+    writing, release = threading.Event(), threading.Event()
+    append_many = storage.append_many
+
+    def slow_append_many(changes):
+        writing.set()
+        release.wait(5)
+        append_many(changes)
+    monkeypatch.setattr(storage, "append_many", slow_append_many)
+
+    async def run():
+        write = asyncio.ensure_future(server.dispatch("PATCH", "/exhibits/1", js.dumps({"title": "Neu"}).encode()))
+        await asyncio.get_running_loop().run_in_executor(None, writing.wait, 5)
+        # The edit is in memory already, the journal write is still blocked
+        status, payload = await asyncio.wait_for(server.dispatch("GET", "/exhibits/1", b""), 1)
+        release.set()
+        return status, payload, await write
+    status, payload, (write_status, _) = asyncio.run(run())
+    assert (status, payload["title"], write_status) == (200, "Neu", 200)
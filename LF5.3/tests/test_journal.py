@@ -0,0 +1,89 @@
+# Journal replay and compaction of the JSON inventory (museum_storage.JsonStorage)
+
+import os
+
+from museum_model import Museum
+from museum_service import MuseumService
+from museum_storage import JOURNAL_SUFFIX
+
+
+def make_changes(service):
+    service.add_exhibit("Neues Objekt", "Albrecht Dürer", "1510", "Kupferstich", "Im Lager")
+    service.update_exhibit(1, title="Umbenannt", status="Ungewiss")
+    service.remove_exhibit(2)
+    service.create_gallery("Sonderschau", location="Saal 9")
+    service.add_to_gallery("Sonderschau", 3, force=True)
+    service.remove_from_gallery("Galerie 1", next(iter(service.get_gallery("Galerie 1").exhibit_ids)))
+
+
+def test_changes_are_journaled_until_save(inventory, state):
+    museum = Museum(inventory)
+    make_changes(MuseumService(museum))
+    assert os.path.getsize(inventory + JOURNAL_SUFFIX) > 0
+    assert state(Museum(inventory)) == state(museum)
+
+
+def test_replayed_updates_reach_the_indexes(inventory):
+    # The museum has to observe its exhibits before the replay, not after it
+    museum = Museum(inventory)
+    old_title = museum.get_exhibit_by_id(1).title
+    MuseumService(museum).update_exhibit(1, title="Zauberflöte", status="Ungewiss")
+
+    restarted = Museum(inventory)
+    assert [e._id for e in restarted.search("zauberflöte")] == [1]
+    assert 1 not in [e._id for e in restarted.search(old_title.lower())]
+    assert restarted.count_exhibits(status="Ungewiss") == museum.count_exhibits(status="Ungewiss")
+
+
+def test_replay_is_idempotent(inventory, state):
+    museum = Museum(inventory)
+    make_changes(MuseumService(museum))
+    journal = inventory + JOURNAL_SUFFIX
+    with open(journal, "rb") as f:
+        records = f.read()
+    # A crash between writing the snapshot and moving the journal aside replays everything twice
+    with open(journal, "ab") as f:
+        f.write(records)
+    assert state(Museum(inventory)) == state(museum)
+
+
+def test_torn_last_line_is_ignored(inventory, state):
+    museum = Museum(inventory)
+    make_changes(MuseumService(museum))
+    with open(inventory + JOURNAL_SUFFIX, "ab") as f:
+        f.write(b'{"op": "update", "id": 5, "fiel')
+    assert state(Museum(inventory)) == state(museum)
+
+
+def test_save_compacts_the_journal(inventory, state):
+    museum = Museum(inventory)
+    make_changes(MuseumService(museum))
+    museum.save()
+    assert not os.path.exists(inventory + JOURNAL_SUFFIX) or os.path.getsize(inventory + JOURNAL_SUFFIX) == 0
+    assert museum.storage.pending == 0
+    assert state(Museum(inventory)) == state(museum)
+
+
+def test_compaction_after_many_records(inventory, state):
+    museum = Museum(inventory)
+    museum.storage.compact_every = 10
+    service = MuseumService(museum)
+    for i in range(25):
+        service.update_exhibit(1 + i % 5, title=f"Fassung {i}")
+    # Compacted twice, only the records since the last compaction are left
+    assert museum.storage.pending == 5
+    assert state(Museum(inventory)) == state(museum)
+
+
+def test_removals_keep_the_listing_order(inventory):
+    museum = Museum(inventory)
+    service = MuseumService(museum)
+    ids = [ex._id for ex in museum.exhibits]
+    removed = set(ids[::3]) | {ids[-1]}
+    for target_id in removed:
+        service.remove_exhibit(target_id)
+    kept = [i for i in ids if i not in removed]
+    assert [ex._id for ex in museum.exhibits] == kept
+    assert museum.exhibits.position(kept[5]) == 5
+    museum.save()
+    assert [ex._id for ex in Museum(inventory).exhibits] == kept
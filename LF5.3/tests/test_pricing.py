@@ -0,0 +1,20 @@
+# Ticket prices (pricing_engine.PricingEngine): the rules price_logic.py used to hard-code
+
+import pytest
+
+from pricing_engine import PricingEngine
+
+
+@pytest.mark.parametrize("age, price", [(-3, 7.5), (0, 7.5), (16, 7.5), (17, 15.0), (64, 15.0), (65, 11.25)])
+def test_age_bands(age, price):
+    assert PricingEngine().price(age) == price
+
+
+def test_batch_paths_agree():
+    np = pytest.importorskip("numpy")
+    engine = PricingEngine()
+    ages = [-3, 0, 16, 17, 40, 65, 90]
+    members = [True, False, False, True, False, True, False]
+    expected = [engine.price(age, is_member=member) for age, member in zip(ages, members)]
+    assert engine.price_batch(ages, is_member=members) == expected
+    assert engine.price_batch(np.array(ages), is_member=np.array(members)).tolist() == expected
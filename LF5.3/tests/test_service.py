@@ -0,0 +1,41 @@
+# Validation in the service layer (museum_service.MuseumService): rejected before the museum changes
+
+import pytest
+
+from museum_model import Museum
+from museum_service import MuseumService, ValidationError
+
+
+@pytest.mark.parametrize("fields", [
+    {"title": ["a", "b"]},
+    {"creator": {"name": "A"}},
+    {"description": 42},
+    {"year": [1900]},
+    {"status": "Verschollen"},
+])
+def test_invalid_fields_change_nothing(inventory, state, fields):
+    museum = Museum(inventory)
+    service = MuseumService(museum)
+    before = state(museum)
+    add = dict({"title": "Objekt", "creator": "A", "year": "1900", "description": "", "status": "Im Lager"}, **fields)
+    with pytest.raises(ValidationError):
+        service.add_exhibit(**add)
+    with pytest.raises(ValidationError):
+        service.update_exhibit(1, **fields)
+    assert state(museum) == before
+    assert museum.facets.total == len(museum.exhibits)
+    assert state(Museum(inventory)) == before
+
+
+def test_filtered_listing_follows_the_listing_order(inventory):
+    museum = Museum(inventory)
+    service = MuseumService(museum)
+    for target_id in range(1, 60, 4):
+        service.remove_exhibit(target_id)
+    status = museum.get_exhibit_by_id(2).status
+    epoch = museum.get_exhibit_by_id(2).kh_epoche
+    for filters in ({"status": status}, {"kh_epoche": epoch}, {"status": status, "kh_epoche": epoch}):
+        view = service.browse(**filters)
+        expected = [ex for ex in museum.exhibits if all(getattr(ex, f) == v for f, v in filters.items())]
+        assert list(view) == expected
+        assert view.position(expected[-1]._id) == len(expected) - 1
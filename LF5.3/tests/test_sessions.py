@@ -0,0 +1,105 @@
+# Two sessions on one inventory: journal merge, id renumbering and optimistic concurrency
+
+import pytest
+
+from museum_model import Exhibit, Museum
+from museum_service import MuseumService
+
+
+def test_same_id_from_two_sessions(inventory, state):
+    first = Museum(inventory)
+    second = Museum(inventory)
+    # Both sessions hand out the same next _id, as two processes would
+    next_id = Exhibit.id_counter
+    added = MuseumService(first).add_exhibit("Erstes", "A", "1900", "", "Im Lager")
+    Exhibit.id_counter = next_id
+    other = MuseumService(second).add_exhibit("Zweites", "B", "1901", "", "Im Lager")
+    MuseumService(second).add_to_gallery("Galerie 1", other._id, force=True)
+
+    assert added._id == next_id and other._id != next_id
+    first.refresh()
+    assert first.get_exhibit_by_id(other._id).title == "Zweites"
+    assert state(first) == state(second) == state(Museum(inventory))
+
+
+def test_updates_of_different_fields_are_merged(inventory, state):
+    first = Museum(inventory)
+    second = Museum(inventory)
+    MuseumService(first).update_exhibit(1, title="Neuer Titel")
+    MuseumService(second).update_exhibit(1, status="Ungewiss")
+
+    exhibit = second.get_exhibit_by_id(1)
+    assert (exhibit.title, exhibit.status) == ("Neuer Titel", "Ungewiss")
+    first.refresh()
+    assert state(first) == state(second) == state(Museum(inventory))
+
+
+def test_later_session_wins_on_the_same_field(inventory, state):
+    first = Museum(inventory)
+    second = Museum(inventory)
+    MuseumService(first).update_exhibit(1, title="Erster")
+    MuseumService(second).update_exhibit(1, title="Zweiter")
+    first.refresh()
+    assert first.get_exhibit_by_id(1).title == "Zweiter"
+    assert state(first) == state(Museum(inventory))
+
+
+def test_update_of_an_exhibit_removed_meanwhile_is_dropped(inventory, state):
+    first = Museum(inventory)
+    second = Museum(inventory)
+    MuseumService(first).remove_exhibit(1)
+    MuseumService(second).update_exhibit(1, title="Zu spät")
+    assert second.get_exhibit_by_id(1) is None
+    assert state(second) == state(first) == state(Museum(inventory))
+
+
+def test_batch_with_two_updates_of_one_exhibit(inventory, state):
+    # The rebase base is the version before the first update of the batch, not the last one
+    first = Museum(inventory)
+    second = Museum(inventory)
+    MuseumService(first).update_exhibit(1, status="Ungewiss")
+    service = MuseumService(second)
+    with second.batch():
+        service.update_exhibit(1, title="Neuer Titel")
+        service.update_exhibit(1, creator="Neuer Schöpfer")
+
+    exhibit = Museum(inventory).get_exhibit_by_id(1)
+    assert (exhibit.title, exhibit.creator, exhibit.status) == ("Neuer Titel", "Neuer Schöpfer", "Ungewiss")
+    assert state(second) == state(Museum(inventory))
+
+
+def test_session_behind_two_saves_reloads(inventory, state):
+    first = Museum(inventory)
+    second = Museum(inventory)
+    service = MuseumService(first)
+    service.update_exhibit(1, title="Vor dem Speichern")
+    first.save()
+    service.update_exhibit(2, title="Nach dem Speichern")
+    first.save()
+    service.update_exhibit(3, title="Im Journal")
+    second.refresh()
+    assert state(second) == state(first)
+
+
+@pytest.mark.parametrize("saves", [0, 2])
+def test_id_clash_during_a_batch(inventory, state, saves):
+    # The pending records of the batch follow the renumbered exhibit (saves=2: via a reload)
+    first = Museum(inventory)
+    second = Museum(inventory)
+    service = MuseumService(first)
+    next_id = Exhibit.id_counter
+    with first.batch():
+        added = service.add_exhibit("X von A", "A", "1900", "", "Im Lager")
+        service.update_exhibit(added._id, title="X von A (neu)")
+        service.add_to_gallery("Galerie 1", added._id, force=True)
+        Exhibit.id_counter = next_id
+        other = MuseumService(second).add_exhibit("X von B", "B", "1901", "", "Im Lager")
+        for _ in range(saves):
+            second.save()
+
+    restarted = Museum(inventory)
+    mine = restarted.get_exhibit_by_uid(added._uid)
+    theirs = restarted.get_exhibit_by_uid(other._uid)
+    assert (theirs._id, theirs.title, restarted.galleries_of(theirs._id)) == (next_id, "X von B", [])
+    assert (mine.title, restarted.galleries_of(mine._id)) == ("X von A (neu)", ["Galerie 1"])
+    assert state(first) == state(restarted)
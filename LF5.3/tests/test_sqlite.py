@@ -0,0 +1,59 @@
+# SQLite backend (museum_sqlite.SqliteStorage): round trip and two sessions on one database
+
+import pytest
+
+from museum_model import Exhibit, Museum
+from museum_service import MuseumService
+from museum_sqlite import import_json
+
+from test_journal import make_changes
+
+
+@pytest.fixture
+def database(inventory, tmp_path):
+    path = str(tmp_path / "museum_exhibits.db")
+    import_json(inventory, path)
+    return path
+
+
+def test_import_keeps_the_inventory(inventory, database, state):
+    assert state(Museum(database)) == state(Museum(inventory))
+
+
+def test_changes_survive_a_restart(database, state):
+    museum = Museum(database)
+    make_changes(MuseumService(museum))
+    assert state(Museum(database)) == state(museum)
+    museum.save()
+    assert state(Museum(database)) == state(museum)
+
+
+def test_same_id_from_two_sessions(database, state):
+    first = Museum(database)
+    second = Museum(database)
+    # Both sessions hand out the same next _id, as two processes would
+    next_id = Exhibit.id_counter
+    added = MuseumService(first).add_exhibit("Erstes", "A", "1900", "", "Im Lager")
+    Exhibit.id_counter = next_id
+    other = MuseumService(second).add_exhibit("Zweites", "B", "1901", "", "Im Lager")
+
+    assert added._id == next_id
+    assert other._id != next_id
+    restarted = Museum(database)
+    assert restarted.get_exhibit_by_id(added._id).title == "Erstes"
+    assert restarted.get_exhibit_by_id(other._id).title == "Zweites"
+    first.refresh()
+    assert state(first) == state(second) == state(restarted)
+
+
+def test_session_behind_the_trimmed_log_reloads(database, state, monkeypatch):
+    monkeypatch.setattr("museum_sqlite.CHANGE_LOG_KEEP", 2)
+    first = Museum(database)
+    second = Museum(database)
+    service = MuseumService(second)
+    for i in range(5):
+        service.update_exhibit(1, title=f"Fassung {i}")
+    second.save()
+    first.refresh()
+    assert first.get_exhibit_by_id(1).title == "Fassung 4"
+    assert state(first) == state(second)
@@ -0,0 +1,51 @@
+# Staff directory (staff_directory): indexes and rendered texts follow every change
+
+import datetime
+
+import pytest
+
+from staff_directory import StaffDirectory
+
+
+@pytest.fixture
+def directory(tmp_path):
+    directory = StaffDirectory(str(tmp_path / "museum_exhibits.staff.json"))
+    directory.add("Ada", 1970, 1)
+    directory.add("Ben", 1985, "Archivist")
+    return directory
+
+
+def test_fields_are_read_only(directory):
+    record = directory.records[0]
+    for field in ("name", "birth_year", "theoretical_age", "staff_role"):
+        with pytest.raises(AttributeError):
+            setattr(record, field, "x")
+
+
+def test_change_birth_year_reindexes(directory):
+    record = directory.records[0]
+    str(record)
+    directory.change_birth_year(record, 1990)
+    assert record.theoretical_age == datetime.datetime.now().year - 1990
+    assert directory.born_between(1960, 1980) == []
+    assert directory.born_between(1986, 1995) == [record]
+    assert directory.birth_years == [1985, 1990]
+    assert "birth_year: 1990" in str(record)
+
+
+def test_rename_and_change_role_rerender(directory):
+    record = directory.records[0]
+    text, private = str(record), record.get_private_info()
+    directory.rename(record, "Ada L.")
+    directory.change_role(record, 3)
+    assert str(record) != text and "name: Ada L." in str(record)
+    assert record.get_private_info() != private
+    assert directory.with_role("Archivist") == [directory.records[1], record]
+
+
+def test_save_and_load(directory):
+    directory.change_birth_year(directory.records[1], 2000)
+    directory.save()
+    loaded = StaffDirectory(directory.path)
+    assert [record.to_dict() for record in loaded.records] == [record.to_dict() for record in directory.records]
+    assert loaded.born_between(2000, 2000)[0].name == "Ben"
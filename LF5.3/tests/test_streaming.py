@@ -0,0 +1,34 @@
+# Streaming parser of the inventory (museum_storage.iter_inventory): every chunk boundary, down to one character
+
+import json as js
+
+import pytest
+
+from museum_storage import iter_inventory
+
+
+def stream(path, read_size):
+    items = {}
+    for section, item in iter_inventory(path, read_size):
+        items.setdefault(section, []).append(item)
+    return items
+
+
+@pytest.mark.parametrize("text", [
+    '{"ids": [1e-05]}',
+    '[3.5, 1]',
+    '{"values": [-0.25, 12E+3, 7, 100], "galleries": []}',
+])
+def test_numbers_across_chunk_boundaries(tmp_path, text):
+    path = tmp_path / "werte.json"
+    path.write_text(text)
+    data = js.loads(text)
+    expected = {"exhibits": data} if isinstance(data, list) else {k: v for k, v in data.items() if v}
+    for read_size in range(1, len(text) + 1):
+        assert stream(str(path), read_size) == expected
+
+
+def test_inventory_with_tiny_reads(inventory):
+    with open(inventory, "r") as f:
+        data = js.load(f)
+    assert stream(inventory, 7) == data
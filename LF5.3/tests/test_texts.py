@@ -0,0 +1,50 @@
+# Lazy texts (museum_texts.TextStore): descriptions stay in the side store through edits and reloads
+
+import shutil
+
+from museum_model import Museum
+from museum_service import MuseumService
+from museum_texts import Locator
+
+
+def test_update_of_other_fields_keeps_the_locator(inventory):
+    museum = Museum(inventory, lazy_texts=True)
+    exhibit = museum.get_exhibit_by_id(1)
+    assert type(exhibit._description) is Locator
+    stored = museum.texts.statistics()["bytes"]
+    MuseumService(museum).update_exhibit(1, status="Ungewiss")
+    assert type(exhibit._description) is Locator
+    assert museum.texts.statistics()["bytes"] == stored
+
+    MuseumService(museum).update_exhibit(1, description="Eine neue, ausreichend lange Beschreibung.")
+    assert type(exhibit._description) is Locator
+    assert exhibit.description == "Eine neue, ausreichend lange Beschreibung."
+
+
+def test_reload_starts_a_fresh_store(inventory, state):
+    museum = Museum(inventory, lazy_texts=True)
+    stored = museum.texts.statistics()["bytes"]
+    old_texts = museum.texts
+    for _ in range(3):
+        with museum.storage.lock:
+            museum.reload()
+    assert museum.texts is not old_texts and old_texts.file is None
+    assert museum.texts.statistics()["bytes"] == stored
+    assert state(museum) == state(Museum(inventory))
+
+
+def test_search_finds_the_same_as_without_lazy_texts(inventory):
+    # Each on its own copy, the edits are made twice
+    copy = inventory.replace(".json", "_lazy.json")
+    shutil.copy(inventory, copy)
+    museums = [Museum(inventory), Museum(copy, lazy_texts=True)]
+    for museum in museums:
+        service = MuseumService(museum)
+        service.update_exhibit(1, description="Ein Spinnrad aus Eichenholz, gut erhalten und vollständig.")
+        service.update_exhibit(2, description="Kurz")
+        service.update_exhibit(3, status="Ungewiss")
+        service.remove_exhibit(4)
+        museum.undo()
+        service.remove_exhibit(5)
+    for query in ("spinnrad", "eichenholz, gut", "kurz", "e", "zustand", "inventar 1", "xyz"):
+        assert [e._id for e in museums[1].search(query)] == [e._id for e in museums[0].search(query)]